@@ -0,0 +1,64 @@
+"""
+Benchmark of the start-up time of the command line interface. It runs
+
+python -X importtime -m repro_eval --help
+
+several times and reports the median cumulative import time of all top-level modules
+and the slowest imports. With --max-ms the script fails if the median exceeds the given
+budget, so it can be used as a regression check in CI.
+
+python benchmarks/importtime.py [--repeat 5] [--top 10] [--max-ms 250]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+COMMAND = [sys.executable, '-X', 'importtime', '-m', 'repro_eval', '--help']
+
+
+def import_times(stderr):
+    """
+    Parses the output of -X importtime into a dictionary with the cumulative import time (in microseconds)
+    of every module and the total import time of all top-level modules.
+    """
+    cumulative = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        cumulative_us = int(cumulative_us)
+        cumulative[name.strip()] = cumulative_us
+        if not name[1:].startswith(' '):  # nested imports are indented
+            total += cumulative_us
+    return total, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float)
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.repeat):
+        proc = subprocess.run(COMMAND, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              universal_newlines=True, check=True)
+        total, cumulative = import_times(proc.stderr)
+        totals.append(total)
+
+    median_ms = statistics.median(totals) / 1000
+    print('{}: {:.1f} ms (median of {} runs)'.format(' '.join(COMMAND[1:]), median_ms, args.repeat))
+    for name, cumulative_us in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print('{:>10.1f} ms  {}'.format(cumulative_us / 1000, name))
+
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print('Import time exceeds the budget of {:.1f} ms.'.format(args.max_ms))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark of the Kendall's tau Union (KTU) kernel against the former implementation
+that looks up the position of every document in the sorted union with list.index().
+
+python benchmarks/ktu.py
+
+The reference implementation is shared with the tests in repro_eval/test/test_ktu.py.
+"""
+
+import os
+import random
+import sys
+import time
+
+# run from a source checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repro_eval.run import Run
+from repro_eval.measure.document_order import KTU
+from repro_eval.test.test_ktu import reference_ktu, random_run
+
+
+def main():
+    rng = random.Random(0)
+    for depth, n_topics in [(1000, 50), (10000, 2)]:
+        topics = [str(topic) for topic in range(n_topics)]
+        docs = ['doc{:08d}'.format(i) for i in range(3 * depth)]
+        orig_run = Run.from_dict(random_run(rng, topics, docs, depth)).break_ties()
+        rep_run = Run.from_dict(random_run(rng, topics, docs, depth)).break_ties()
+
+        start = time.perf_counter()
+        ktu = KTU(orig_run, rep_run, trim_thresh=depth, per_topic=True)
+        kernel = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _ktu = {topic: reference_ktu(list(orig_run[topic].keys())[:depth], list(rep_run[topic].keys())[:depth])
+                for topic in rep_run}
+        reference = time.perf_counter() - start
+
+        assert ktu == _ktu
+        print('depth {:6d}  topics {:3d}  reference {:8.3f}s  kernel {:8.4f}s  speedup {:8.1f}x'.format(
+            depth, n_topics, reference, kernel, reference / kernel))
+
+
+if __name__ == '__main__':
+    main()
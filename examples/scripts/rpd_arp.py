@@ -1,7 +1,5 @@
-import pytrec_eval
 from repro_eval.Evaluator import RpdEvaluator
-from repro_eval.util import arp, arp_scores
-from repro_eval.util import trim
+from repro_eval.util import arp_scores, load_run
 import pandas as pd
 from matplotlib import pyplot as plt
 import seaborn as sns
@@ -66,20 +64,18 @@ def average_retrieval_performance(baseline_scores, reproduced_scores: dict, meas
 
 
 def main():
-    rpd_eval = RpdEvaluator(qrel_orig_path=QREL,
+    rpd_eval = RpdEvaluator(qrels_orig_path=QREL,
                             run_b_orig_path=ORIG_B,
                             run_a_orig_path=ORIG_A,
-                            run_b_rep_path=None,
-                            run_a_rep_path=None)
+                            measures=['P_10', 'ndcg', 'bpref', 'map'])
 
     rpd_eval.trim()
     rpd_eval.evaluate()
 
     for run_name, info in runs_rpd.items():
-        with open(info.get('path')) as run_file:
-            info['run'] = pytrec_eval.parse_run(run_file)
-            trim(info['run'])
-            info['scores'] = rpd_eval.evaluate(info['run'])
+        info['run'] = load_run(info.get('path'))
+        rpd_eval.trim(run=info['run'])
+        info['scores'] = rpd_eval.evaluate(run=info['run'])
 
     average_retrieval_performance(rpd_eval.run_b_orig_score,
                                   {
@@ -89,7 +85,7 @@ def main():
                                       'tf_4': runs_rpd.get('rpd_wcr04_tf_4').get('scores'),
                                       'tf_5': runs_rpd.get('rpd_wcr04_tf_5').get('scores'),
                                   },
-                                  measures=['P_10', 'ndcg', 'bpref', 'map'],
+                                  measures=['P@10', 'nDCG', 'Bpref', 'AP'],
                                   xlabel='Reproduced run (wcr04)',
                                   ylabel='Score',
                                   outfile='data/plots/rpd_b_arp.pdf')
@@ -102,7 +98,7 @@ def main():
                                       'tf_4': runs_rpd.get('rpd_wcr0405_tf_4').get('scores'),
                                       'tf_5': runs_rpd.get('rpd_wcr0405_tf_5').get('scores'),
                                   },
-                                  measures=['P_10', 'ndcg', 'bpref', 'map'],
+                                  measures=['P@10', 'nDCG', 'Bpref', 'AP'],
                                   xlabel='Reproduced run (wcr0405)',
                                   ylabel='Score',
                                   outfile='data/plots/rpd_a_arp.pdf')
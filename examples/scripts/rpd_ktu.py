@@ -1,11 +1,9 @@
 from repro_eval.Evaluator import RpdEvaluator
-from repro_eval.util import print_base_adv, print_simple_line, trim, arp
 import matplotlib.pyplot as plt
 import seaborn as sns
 sns.set(style="darkgrid")
 import pandas as pd
 import matplotlib.pyplot as plt
-import pytrec_eval
 
 QREL = './data/qrels/core17.txt'
 ORIG_B = './data/runs/orig/input.WCrobust04'
@@ -44,21 +42,15 @@ def main():
 
     # BASELINE
     for run_name, info in zip(list(runs_rpd.keys())[::2], list(runs_rpd.values())[::2]):
-        rpd_eval = RpdEvaluator(qrel_orig_path=QREL,
+        rpd_eval = RpdEvaluator(qrels_orig_path=QREL,
                                 run_b_orig_path=ORIG_B,
-                                run_a_orig_path=ORIG_A,
-                                run_b_rep_path=None,
-                                run_a_rep_path=None)
+                                run_b_rep_path=info.get('path'),
+                                measures=[])
 
         rpd_eval.trim()
-        rpd_eval.evaluate()
-
-        with open(info.get('path')) as run_file:
-            info['run'] = pytrec_eval.parse_run(run_file)
-            for cutoff in cutoffs:
-                rpd_eval.trim(cutoff)
-                rpd_eval.trim(cutoff, info['run'])
-                info['ktu_' + str(cutoff)] = arp(rpd_eval.ktau_union(info['run'])['baseline'])
+        sweep = rpd_eval.sweep(cutoffs)
+        for cutoff in cutoffs:
+            info['ktu_' + str(cutoff)] = sweep[cutoff]['ktu']['baseline']
 
     df_content = {}
     for run_name, info in zip(list(runs_rpd.keys())[::2], list(runs_rpd.values())[::2]):
@@ -72,22 +64,15 @@ def main():
 
     # ADVANCED
     for run_name, info in zip(list(runs_rpd.keys())[1::2], list(runs_rpd.values())[1::2]):
-        rpd_eval = RpdEvaluator(qrel_orig_path=QREL,
-                                run_b_orig_path=ORIG_B,
+        rpd_eval = RpdEvaluator(qrels_orig_path=QREL,
                                 run_a_orig_path=ORIG_A,
-                                run_b_rep_path=None,
-                                run_a_rep_path=None)
+                                run_a_rep_path=info.get('path'),
+                                measures=[])
 
         rpd_eval.trim()
-        rpd_eval.evaluate()
-
-        with open(info.get('path')) as run_file:
-            info['run'] = pytrec_eval.parse_run(run_file)
-            for cutoff in cutoffs:
-                rpd_eval.trim(cutoff)
-                rpd_eval.trim(cutoff, info['run'])
-                # scores = rpl_eval.evaluate(info['run'])
-                info['ktu_' + str(cutoff)] = arp(rpd_eval.ktau_union(info['run'])['baseline'])
+        sweep = rpd_eval.sweep(cutoffs)
+        for cutoff in cutoffs:
+            info['ktu_' + str(cutoff)] = sweep[cutoff]['ktu']['advanced']
 
     df_content = {}
     for run_name, info in zip(list(runs_rpd.keys())[1::2], list(runs_rpd.values())[1::2]):
@@ -1,7 +1,5 @@
-import pytrec_eval
 from repro_eval.Evaluator import RpdEvaluator
-from repro_eval.util import arp, arp_scores
-from repro_eval.util import trim
+from repro_eval.util import arp_scores, load_run
 import pandas as pd
 from matplotlib import pyplot as plt
 import seaborn as sns
@@ -66,21 +64,21 @@ def average_retrieval_performance(baseline_scores, reproduced_scores: dict, meas
 
 
 def main():
-    rpd_eval = RpdEvaluator(qrel_orig_path=QREL,
+    # the cut-off values are those of the measure (nDCG@k), the runs are evaluated only once,
+    # cf. Evaluator.sweep() for reproducibility measures of runs that are trimmed to several cut-off values
+    rpd_eval = RpdEvaluator(qrels_orig_path=QREL,
                             run_b_orig_path=ORIG_B,
                             run_a_orig_path=ORIG_A,
-                            run_b_rep_path=None,
-                            run_a_rep_path=None)
+                            measures=['ndcg_cut'])
 
     rpd_eval.trim()
     rpd_eval.evaluate()
 
     for run_name, info in runs_rpd.items():
-        with open(info.get('path')) as run_file:
-            info['run'] = pytrec_eval.parse_run(run_file)
-            trim(info['run'])
-            info['scores'] = rpd_eval.evaluate(info['run'])
-            info['rmse'] = rpd_eval.rmse(run_b_score=info['scores'])
+        info['run'] = load_run(info.get('path'))
+        rpd_eval.trim(run=info['run'])
+        info['scores'] = rpd_eval.evaluate(run=info['run'])
+        info['rmse'] = rpd_eval.rmse(run_b_score=info['scores'])
 
 
     baseline_runs = ['rpd_wcr04_tf_1', 'rpd_wcr04_tf_2', 'rpd_wcr04_tf_3', 'rpd_wcr04_tf_4', 'rpd_wcr04_tf_5']
@@ -89,7 +87,7 @@ def main():
 
     df_content = {}
     for run_name in baseline_runs:
-        df_content[run_name] = [runs_rpd[run_name]['rmse']['baseline']['ndcg_cut_' + co] for co in cutoffs]
+        df_content[run_name] = [runs_rpd[run_name]['rmse']['baseline']['nDCG@' + co] for co in cutoffs]
 
     df = pd.DataFrame(df_content, index=cutoffs)
     ax = df.plot.line(style='o-')
@@ -100,7 +98,7 @@ def main():
 
     df_content = {}
     for run_name in advanced_runs:
-        df_content[run_name] = [runs_rpd[run_name]['rmse']['baseline']['ndcg_cut_' + co] for co in cutoffs]
+        df_content[run_name] = [runs_rpd[run_name]['rmse']['baseline']['nDCG@' + co] for co in cutoffs]
 
     df = pd.DataFrame(df_content, index=cutoffs)
     ax = df.plot.line(style='o-')
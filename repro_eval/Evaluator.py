@@ -1,34 +1,171 @@
+import os
+from itertools import islice
 from repro_eval.util import trim_run, break_ties, load_run, load_qrels, load_measures, evaluate_run
-from repro_eval.measure.statistics import ttest
-from repro_eval.measure.overall_effects import ER, DRI
+from repro_eval.measure.statistics import ttest, ttest_batch, permutation_test
+from repro_eval.measure.overall_effects import ER, DRI, er_batch, dri_batch
 from repro_eval.measure.document_order import KTU, RBO
-from repro_eval.measure.effectiveness import RMSE, nRMSE
-from repro_eval import RUN_LENGTH, ERR_MSG, RBO_DEPTH, RBO_P
+from repro_eval.measure.effectiveness import RMSE, rmse_batch
+from repro_eval.run import as_run
+from repro_eval.cache import ScoreCache, RunCache, fingerprint, file_content_hash
+from repro_eval.result import ResultTable
+from repro_eval import parallel
+from repro_eval import RUN_LENGTH, ERR_MSG, RBO_DEPTH, RBO_P, BATCH_SIZE, SCORE_CACHE_SIZE, PERMUTATION_RESAMPLES
+
+
+class _LazyLoad(object):
+    """
+    Descriptor for runs and qrels that are loaded from the path in path_attr on first access.
+    Assigning a value (e.g., a trimmed run) replaces the loaded one.
+
+    @param path_attr: Name of the attribute with the path to the file.
+    @param load: Function that loads the file, cf. repro_eval.util.load_run() and load_qrels().
+    """
+
+    def __init__(self, path_attr, load):
+        self.path_attr = path_attr
+        self.load = load
+
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.name not in instance.__dict__:
+            path = getattr(instance, self.path_attr, None)
+            instance.__dict__[self.name] = self.load(path, cache_dir=instance.cache_dir) if path else None
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
 
 
 class Evaluator(object):
     """
     An abstract evaluator that holds the original baseline and advanced run as well as
     the reproduced/replicated baseline and advanced run.
+
+    The runs and qrels are loaded on first access, so constructing an Evaluator is cheap and
+    runs that are not needed (e.g., when reproduced runs are passed to ktu() directly) are never read.
+
+    Optionally, the evaluation can be restricted to a list of measures with the 'measures'
+    keyword argument, cf. repro_eval.util.load_measures(). If an empty list is provided,
+    the runs are not evaluated at all, e.g., when only KTU or RBO are determined.
+
+    The scores of evaluated runs are kept in a cache with least-recently-used eviction that is
+    keyed by the content of the run and qrels, so evaluating the same run again (e.g., first
+    with er() and then with dri()) is free. The number of cached runs can be set with the
+    'score_cache_size' keyword argument (0 disables the cache).
+
+    The reproducibility measures can be collected in a tidy table with results(), cf. repro_eval.result.ResultTable.
     """
+    repro_measures = ('er', 'dri')  # reproducibility measures of results()
+    qrels_orig = _LazyLoad('qrels_orig_path', load_qrels)
+    run_b_orig = _LazyLoad('run_b_orig_path', load_run)
+    run_a_orig = _LazyLoad('run_a_orig_path', load_run)
+    run_b_rep = _LazyLoad('run_b_rep_path', load_run)
+    run_a_rep = _LazyLoad('run_a_rep_path', load_run)
 
     def __init__(self, **kwargs):
+        self.cache_dir = kwargs.get('cache_dir', None)
         self.qrels_orig_path = kwargs.get('qrels_orig_path', None)
-        self.qrels_orig = load_qrels(self.qrels_orig_path)
         self.run_b_orig_path = kwargs.get('run_b_orig_path', None)
         self.run_a_orig_path = kwargs.get('run_a_orig_path', None)
         self.run_b_rep_path = kwargs.get('run_b_rep_path', None)
         self.run_a_rep_path = kwargs.get('run_a_rep_path', None)
-        self.run_b_orig = load_run(self.run_b_orig_path) if self.run_b_orig_path else None
-        self.run_a_orig = load_run(self.run_a_orig_path) if self.run_a_orig_path else None
-        self.run_b_rep = load_run(self.run_b_rep_path) if self.run_b_rep_path else None
-        self.run_a_rep = load_run(self.run_a_rep_path) if self.run_a_rep_path else None
         self.run_b_orig_score = None
         self.run_a_orig_score = None
         self.run_b_rep_score = None
         self.run_a_rep_score = None
-        self.measures = load_measures()
+        self.measures = load_measures(kwargs.get('measures', None))
+        self.score_cache = ScoreCache(kwargs.get('score_cache_size', SCORE_CACHE_SIZE))
+        self._qrels_fingerprints = {}
 
+    @property
+    def _qrels_rep(self):
+        """
+        The qrels used for the evaluation of the reproduced/replicated runs.
+        """
+        return self.qrels_orig
+
+    def _qrels_key(self, qrels):
+        """
+        Helping function that returns the (memoized) content fingerprint of the qrels.
+        """
+        cached = self._qrels_fingerprints.get(id(qrels))
+        if cached is None or cached[0] is not qrels:
+            cached = (qrels, fingerprint(qrels))
+            self._qrels_fingerprints[id(qrels)] = cached
+        return cached[1]
+
+    def _evaluate_run(self, run, qrels):
+        """
+        Helping function that evaluates a run or returns its scores from the cache.
+
+        @param run: Run object or nested dictionary with the run.
+        @param qrels: Qrels used for the evaluation.
+        @return: ScoreMatrix with the scores of the run.
+        """
+        key = ('run', fingerprint(run), self._qrels_key(qrels), tuple(map(str, self.measures)))
+        scores = self.score_cache.get(key)
+        if scores is None:
+            scores = evaluate_run(self.measures, qrels, run)
+            self.score_cache.put(key, scores)
+        return scores
+
+    def _evaluate_path(self, path, qrels):
+        """
+        Helping function that evaluates a run file. The scores are cached by the content hash of the file,
+        so the run does not have to be parsed again if it was evaluated before. The content hash is
+        only recomputed if the size or modification time of the file changed. Runs evaluated by path
+        only occupy a single cache entry, they are not fingerprinted.
+
+        @param path: Path to the run file.
+        @param qrels: Qrels used for the evaluation.
+        @return: ScoreMatrix with the scores of the run.
+        """
+        content_hash = RunCache(self.cache_dir).content_hash(path) if self.cache_dir else file_content_hash(path)
+        key = ('path', content_hash, self._qrels_key(qrels), tuple(map(str, self.measures)))
+        scores = self.score_cache.get(key)
+        if scores is None:
+            run = break_ties(load_run(path, cache_dir=self.cache_dir))
+            scores = evaluate_run(self.measures, qrels, run)
+            self.score_cache.put(key, scores)
+        return scores
+
+
+    def results(self, repro_measures=None, run=None, per_topic=False, scores=False):
+        """
+        Determines the reproducibility measures of the reproduced/replicated runs of the Evaluator
+        and collects them in a tidy table. ER and DRI are only determined if the advanced runs are evaluated.
+
+        @param repro_measures: List with the names of the reproducibility measures, e.g., ['ktu', 'rmse', 'er'].
+                               If not specified, all measures of the Evaluator are determined (cf. repro_measures).
+        @param run: Name of the reproduced/replicated run in the table.
+                    If not specified, the filename of the reproduced/replicated baseline run is used.
+        @param per_topic: Boolean value indicating if the KTU and RBO values of the single topics are determined.
+        @param scores: Boolean value indicating if the topic scores of the original and reproduced/replicated runs
+                       are added with the repro_measures 'orig_score' and 'rep_score'.
+        @return: ResultTable with the reproducibility measures.
+        """
+        if run is None and self.run_b_rep_path:
+            run = os.path.basename(self.run_b_rep_path)
+
+        table = ResultTable()
+        for repro_measure in repro_measures or self.repro_measures:
+            if repro_measure not in self.repro_measures:
+                raise ValueError('{} does not determine {}.'.format(type(self).__name__, repro_measure))
+            if repro_measure in ['er', 'dri'] and (self.run_a_orig_score is None or self.run_a_rep_score is None):
+                continue
+            topic_level = per_topic and repro_measure in ['ktu', 'rbo']
+            values = getattr(self, 'ttest' if repro_measure == 'pval' else repro_measure)(
+                **({'per_topic': True} if topic_level else {}))
+            table.add(repro_measure, values, run=run, per_topic=topic_level)
+
+        if scores:
+            table.add('orig_score', {'baseline': self.run_b_orig_score, 'advanced': self.run_a_orig_score}, run=run)
+            table.add('rep_score', {'baseline': self.run_b_rep_score, 'advanced': self.run_a_rep_score}, run=run)
+        return table
 
     def trim(self, t=RUN_LENGTH, run=None):
         """
@@ -79,16 +216,65 @@ class Evaluator(object):
 
         @param run: Reproduced or replicated run that will be evaluated.
         """
+        if not self.measures:
+            return
 
         if self.run_b_orig:
             self.run_b_orig = break_ties(self.run_b_orig)
-            self.run_b_orig_score = evaluate_run(self.measures, self.qrels_orig, self.run_b_orig)
+            self.run_b_orig_score = self._evaluate_run(self.run_b_orig, self.qrels_orig)
 
         if self.run_a_orig:
             self.run_a_orig = break_ties(self.run_a_orig)
-            self.run_a_orig_score = evaluate_run(self.measures, self.qrels_orig, self.run_a_orig)
+            self.run_a_orig_score = self._evaluate_run(self.run_a_orig, self.qrels_orig)
+
+    def sweep(self, cutoffs, p=RBO_P, depth=RBO_DEPTH, print_feedback=False):
+        """
+        Determines the reproducibility measures at several cutoffs in one pass.
+        The rankings are ordered once and the top-k documents at every cutoff are read from the
+        ordered runs, instead of trimming and re-evaluating the runs for every cutoff.
+        The runs of the Evaluator are not modified, score ties are broken on copies of the runs.
+
+        @param cutoffs: List with the cutoff values (number of top-k documents), e.g., [1000, 100, 50, 20, 10, 5].
+        @param p: The parameter p of the RBO (only used by the RpdEvaluator).
+        @param depth: The maximum depth to which the rankings are compared by the RBO (only used by the RpdEvaluator).
+        @param print_feedback: Boolean value indicating if feedback on progress should be printed.
+        @return: Dictionary with the cutoffs as keys and dictionaries with the ER and DRI values
+                 (and KTU, RBO and RMSE values for reproduced runs) as values.
+        """
+        qrels_rep = self._qrels_rep
+        runs = {}
+        for name, run, qrels in [('b_orig', self.run_b_orig, self.qrels_orig), ('a_orig', self.run_a_orig, self.qrels_orig),
+                                 ('b_rep', self.run_b_rep, qrels_rep), ('a_rep', self.run_a_rep, qrels_rep)]:
+            if run:
+                runs[name] = (as_run(run).copy().break_ties(), qrels)
+
+        from tqdm import tqdm
+        results = {}
+        for cutoff in tqdm(cutoffs, disable=not print_feedback):
+            heads = {name: run.head(cutoff) for name, (run, _) in runs.items()}
+            scores = {name: self._evaluate_run(heads[name], qrels) for name, (_, qrels) in runs.items()} \
+                if self.measures else {}
+            results[cutoff] = self._sweep_measures(heads, scores, p=p, depth=depth)
+        return results
+
+    def _sweep_measures(self, heads, scores, p, depth):
+        """
+        Helping function that determines the reproducibility measures of sweep() at a single cutoff.
 
-    def er(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False):
+        @param heads: Dictionary with the truncated runs.
+        @param scores: Dictionary with the scores of the truncated runs.
+        @return: Dictionary with the ER and DRI values.
+        """
+        results = {}
+        if all(name in scores for name in ['b_orig', 'a_orig', 'b_rep', 'a_rep']):
+            results['er'] = ER(orig_score_b=scores['b_orig'], orig_score_a=scores['a_orig'],
+                               rep_score_b=scores['b_rep'], rep_score_a=scores['a_rep'])
+            results['dri'] = DRI(orig_score_b=scores['b_orig'], orig_score_a=scores['a_orig'],
+                                 rep_score_b=scores['b_rep'], rep_score_a=scores['a_rep'])
+        return results
+
+    def er(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False,
+           bootstrap=None, seed=None):
         """
         Determines the Effect Ratio (ER), see also: https://dl.acm.org/doi/10.1145/3397271.3401036
 
@@ -100,32 +286,36 @@ class Evaluator(object):
         @param run_b_path: Path to the baseline run file (prioritized over run_b_score).
         @param run_a_path: Path to the advanced run file s(prioritized over run_a_score).
         @param print_feedback: Boolean value indicating if feedback on progress should be printed.
+        @param bootstrap: Number of bootstrap replicates, cf. repro_eval.measure.overall_effects.ER().
+        @param seed: Seed of the random number generator used for the bootstrap.
         @return: Dictionary containing the ER values for the specified run combination.
         """
         if print_feedback:
             print('Determining Effect Ratio (ER)')
 
         if self.run_b_orig_score and self.run_a_orig_score and run_b_path and run_a_path:
-            qrels = self.qrels_rpl if hasattr(self, 'qrels_rpl') else self.qrels_orig
-            run_b_rep = load_run(run_b_path)
-            run_b_rep_score = evaluate_run(self.measures, qrels, run_b_rep)
-            run_a_rep = load_run(run_a_path)
-            run_a_rep_score = evaluate_run(self.measures, qrels, run_a_rep)
+            qrels = self._qrels_rep
+            run_b_rep_score = self._evaluate_path(run_b_path, qrels)
+            run_a_rep_score = self._evaluate_path(run_a_path, qrels)
             return ER(orig_score_b=self.run_b_orig_score, orig_score_a=self.run_a_orig_score,
-                      rep_score_b=run_b_rep_score, rep_score_a=run_a_rep_score, pbar=print_feedback)
+                      rep_score_b=run_b_rep_score, rep_score_a=run_a_rep_score, pbar=print_feedback,
+                      bootstrap=bootstrap, seed=seed)
 
         if self.run_b_orig_score and self.run_a_orig_score and run_b_score and run_a_score:
             return ER(orig_score_b=self.run_b_orig_score, orig_score_a=self.run_a_orig_score,
-                      rep_score_b=run_b_score, rep_score_a=run_a_score, pbar=print_feedback)
+                      rep_score_b=run_b_score, rep_score_a=run_a_score, pbar=print_feedback,
+                      bootstrap=bootstrap, seed=seed)
 
         if self.run_b_orig_score and self.run_a_orig_score and self.run_b_rep_score and self.run_a_rep_score:
             return ER(orig_score_b=self.run_b_orig_score, orig_score_a=self.run_a_orig_score,
-                      rep_score_b=self.run_b_rep_score, rep_score_a=self.run_a_rep_score, pbar=print_feedback)
+                      rep_score_b=self.run_b_rep_score, rep_score_a=self.run_a_rep_score, pbar=print_feedback,
+                      bootstrap=bootstrap, seed=seed)
         else:
             print(ERR_MSG)
 
 
-    def dri(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False):
+    def dri(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False,
+            bootstrap=None, seed=None):
         """
         Determines the Delta Relative Improvement (DeltaRI), see also: https://dl.acm.org/doi/10.1145/3397271.3401036
 
@@ -137,27 +327,30 @@ class Evaluator(object):
         @param run_b_path: Path to the baseline run file (prioritized over run_b_score).
         @param run_a_path: Path to the advanced run file s(prioritized over run_a_score).
         @param print_feedback: Boolean value indicating if feedback on progress should be printed.
+        @param bootstrap: Number of bootstrap replicates, cf. repro_eval.measure.overall_effects.DRI().
+        @param seed: Seed of the random number generator used for the bootstrap.
         @return: Dictionary containing the DRI values for the specified run combination.
         """
         if print_feedback:
             print('Determining Delta Relative Improvement (DRI)')
 
         if self.run_b_orig_score and self.run_a_orig_score and run_b_path and run_a_path:
-            qrels = self.qrels_rpl if hasattr(self, 'qrels_rpl') else self.qrels_orig
-            run_b_rep = load_run(run_b_path)
-            run_b_rep_score = evaluate_run(self.measures, qrels, run_b_rep)
-            run_a_rep = load_run(run_a_path)
-            run_a_rep_score = evaluate_run(self.measures, qrels, run_a_rep)
+            qrels = self._qrels_rep
+            run_b_rep_score = self._evaluate_path(run_b_path, qrels)
+            run_a_rep_score = self._evaluate_path(run_a_path, qrels)
             return DRI(orig_score_b=self.run_b_orig_score, orig_score_a=self.run_a_orig_score,
-                       rep_score_b=run_b_rep_score, rep_score_a=run_a_rep_score, pbar=print_feedback)
+                       rep_score_b=run_b_rep_score, rep_score_a=run_a_rep_score, pbar=print_feedback,
+                       bootstrap=bootstrap, seed=seed)
 
         if self.run_b_orig_score and self.run_a_orig_score and run_b_score and run_a_score:
             return DRI(orig_score_b=self.run_b_orig_score, orig_score_a=self.run_a_orig_score,
-                       rep_score_b=run_b_score, rep_score_a=run_a_score, pbar=print_feedback)
+                       rep_score_b=run_b_score, rep_score_a=run_a_score, pbar=print_feedback,
+                       bootstrap=bootstrap, seed=seed)
 
         if self.run_b_orig_score and self.run_a_orig_score and self.run_b_rep_score and self.run_a_rep_score:
             return DRI(orig_score_b=self.run_b_orig_score, orig_score_a=self.run_a_orig_score,
-                       rep_score_b=self.run_b_rep_score, rep_score_a=self.run_a_rep_score, pbar=print_feedback)
+                       rep_score_b=self.run_b_rep_score, rep_score_a=self.run_a_rep_score, pbar=print_feedback,
+                       bootstrap=bootstrap, seed=seed)
         else:
             print(ERR_MSG)
 
@@ -202,6 +395,7 @@ class RpdEvaluator(Evaluator):
     The Reproducibility Evaluator is used for quantifying the different levels of reproduction for runs that were
     derived from the same test collection used in the original experiment.
     """
+    repro_measures = ('ktu', 'rbo', 'rmse', 'nrmse', 'er', 'dri', 'pval')
 
     def evaluate(self, run=None, run_path=None):
         """
@@ -212,23 +406,45 @@ class RpdEvaluator(Evaluator):
         @param run: A reproduced run provided as nested dicitionary. If it is not specified, the original and 
                     reproduced runs of the the RpdEvaluator will be used instead.
         @param run_path: File path to a reproduced run (prioritized over 'run' parameter).
-        @return: If run is specified, a dictionary with the corresponding scores is returned.
+        @return: If run is specified, a ScoreMatrix with the corresponding scores is returned.
         """
         if run or run_path:
-            run = load_run(run_path) if run_path else run
-            run = break_ties(run)
-            return evaluate_run(self.measures, self.qrels_orig, run)
+            if run_path:
+                return self._evaluate_path(run_path, self.qrels_orig)
+            return self._evaluate_run(break_ties(run), self.qrels_orig)
+
+        if not self.measures:
+            return
 
         super(RpdEvaluator, self).evaluate()
 
         if self.run_b_rep:
             self.run_b_rep = break_ties(self.run_b_rep)
-            self.run_b_rep_score = evaluate_run(self.measures, self.qrels_orig, self.run_b_rep)
+            self.run_b_rep_score = self._evaluate_run(self.run_b_rep, self.qrels_orig)
         if self.run_a_rep:
             self.run_a_rep = break_ties(self.run_a_rep)
-            self.run_a_rep_score = evaluate_run(self.measures, self.qrels_orig, self.run_a_rep)
+            self.run_a_rep_score = self._evaluate_run(self.run_a_rep, self.qrels_orig)
 
-    def ktu(self, run_b_rep=None, run_a_rep=None, run_b_path=None, run_a_path=None, print_feedback=False, per_topic=False):
+    def _sweep_measures(self, heads, scores, p, depth):
+        """
+        Helping function that determines the reproducibility measures of sweep() at a single cutoff.
+
+        @param heads: Dictionary with the truncated runs.
+        @param scores: Dictionary with the scores of the truncated runs.
+        @return: Dictionary with the KTU, RBO, RMSE, ER and DRI values.
+        """
+        results = super(RpdEvaluator, self)._sweep_measures(heads, scores, p=p, depth=depth)
+        for measure in ['ktu', 'rbo', 'rmse']:
+            results[measure] = {}
+        for side, orig, rep in [('baseline', 'b_orig', 'b_rep'), ('advanced', 'a_orig', 'a_rep')]:
+            if orig in heads and rep in heads:
+                results['ktu'][side] = KTU(heads[orig], heads[rep])
+                results['rbo'][side] = RBO(heads[orig], heads[rep], p=p, depth=depth, pbar=False, per_topic=False)
+            if orig in scores and rep in scores:
+                results['rmse'][side] = RMSE(scores[orig], scores[rep])
+        return results
+
+    def ktu(self, run_b_rep=None, run_a_rep=None, run_b_path=None, run_a_path=None, print_feedback=False, per_topic=False, n_jobs=None):
         """
         Determines Kendall's tau Union (KTU) between the original and reproduced document orderings,
         see also: https://dl.acm.org/doi/10.1145/3397271.3401036
@@ -243,48 +459,49 @@ class RpdEvaluator(Evaluator):
                            if not provided the reproduced advanced run of the RpdEvaluator object will be used instead.
         @param per_topic: If per_topic=True the method returns a dictionary with KTU scores for each topic.
         @param print_feedback: Boolean value indicating if feedback on progress should be printed.
+        @param n_jobs: Number of worker processes the topics are distributed to.
         @return: Dictionary with KTU values that compare the document orderings of the original and reproduced runs.
         """
         if self.run_b_orig and run_b_path:
             if self.run_a_orig and run_a_path:
                 if print_feedback:
                     print("Determining Kendall's tau Union (KTU) for baseline and advanced run.")
-                run_b_rep = load_run(run_b_path)
-                run_a_rep = load_run(run_a_path)
-                return {'baseline': KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic),
-                        'advanced': KTU(self.run_a_orig, run_a_rep, pbar=print_feedback, per_topic=per_topic)}
+                run_b_rep = load_run(run_b_path, cache_dir=self.cache_dir)
+                run_a_rep = load_run(run_a_path, cache_dir=self.cache_dir)
+                return {'baseline': KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs),
+                        'advanced': KTU(self.run_a_orig, run_a_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs)}
             else:
                 if print_feedback:
                     print("Determining Kendall's tau Union (KTU) for baseline run.")
-                run_b_rep = load_run(run_b_path)
-                return {'baseline': KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic)}
+                run_b_rep = load_run(run_b_path, cache_dir=self.cache_dir)
+                return {'baseline': KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs)}
 
         if self.run_b_orig and run_b_rep:
             if self.run_a_orig and run_a_rep:
                 if print_feedback:
                     print("Determining Kendall's tau Union (KTU) for baseline and advanced run.")
-                return {'baseline': KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic),
-                        'advanced': KTU(self.run_a_orig, run_a_rep, pbar=print_feedback, per_topic=per_topic)}
+                return {'baseline': KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs),
+                        'advanced': KTU(self.run_a_orig, run_a_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs)}
             else:
                 if print_feedback:
                     print("Determining Kendall's tau Union (KTU) for baseline run.")
-                return {'baseline':  KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic)}
+                return {'baseline':  KTU(self.run_b_orig, run_b_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs)}
 
         if self.run_b_orig and self.run_b_rep:
             if self.run_a_orig and self.run_a_rep:
                 if print_feedback:
                     print("Determining Kendall's tau Union (KTU) for baseline and advanced run.")
-                return {'baseline': KTU(self.run_b_orig, self.run_b_rep, pbar=print_feedback, per_topic=per_topic),
-                        'advanced': KTU(self.run_a_orig, self.run_a_rep, pbar=print_feedback, per_topic=per_topic)}
+                return {'baseline': KTU(self.run_b_orig, self.run_b_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs),
+                        'advanced': KTU(self.run_a_orig, self.run_a_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs)}
             else:
                 if print_feedback:
                     print("Determining Kendall's tau Union (KTU) for baseline run.")
-                return {'baseline':  KTU(self.run_b_orig, self.run_b_rep, pbar=print_feedback, per_topic=per_topic)}
+                return {'baseline':  KTU(self.run_b_orig, self.run_b_rep, pbar=print_feedback, per_topic=per_topic, n_jobs=n_jobs)}
         else:
             print(ERR_MSG)
 
 
-    def rbo(self, run_b_rep=None, run_a_rep=None, run_b_path=None, run_a_path=None, print_feedback=False, p=RBO_P, depth=RBO_DEPTH, per_topic=False):
+    def rbo(self, run_b_rep=None, run_a_rep=None, run_b_path=None, run_a_path=None, print_feedback=False, p=RBO_P, depth=RBO_DEPTH, per_topic=False, n_jobs=None):
         """
         Determines the Rank-Biased Overlap (RBO) between the original and reproduced document orderings,
         see also: https://dl.acm.org/doi/10.1145/3397271.3401036
@@ -302,45 +519,70 @@ class RpdEvaluator(Evaluator):
         @param depth: The maximum depth to which the rankings are compared.
         @param per_topic: If per_topic=True the method returns a dictionary with RBO scores for each topic.
         @param print_feedback: Boolean value indicating if feedback on progress should be printed.
+        @param n_jobs: Number of worker processes the topics are distributed to.
         @return: Dictionary with RBO values if (per_topic=True), otherwise a single aggregated score is returned.
         """
         if self.run_b_orig and run_b_path:
             if self.run_a_orig and run_a_path:
                 if print_feedback:
                     print("Determining Rank-biased Overlap (RBO) for baseline and advanced run.")
-                run_b_rep = load_run(run_b_path)
-                run_a_rep = load_run(run_a_path)
-                return {'baseline': RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic),
-                        'advanced': RBO(self.run_a_orig, run_a_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic)}
+                run_b_rep = load_run(run_b_path, cache_dir=self.cache_dir)
+                run_a_rep = load_run(run_a_path, cache_dir=self.cache_dir)
+                return {'baseline': RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs),
+                        'advanced': RBO(self.run_a_orig, run_a_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs)}
             else:
                 if print_feedback:
                     print("Determining Rank-biased Overlap (RBO) for baseline run.")
-                run_b_rep = load_run(run_b_path)
-                return {'baseline': RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic)}
+                run_b_rep = load_run(run_b_path, cache_dir=self.cache_dir)
+                return {'baseline': RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs)}
 
         if self.run_b_orig and run_b_rep:
             if self.run_a_orig and run_a_rep:
                 if print_feedback:
                     print("Determining Rank-biased Overlap (RBO) for baseline and advanced run.")
-                return {'baseline': RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic),
-                        'advanced': RBO(self.run_a_orig, run_a_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic)}
+                return {'baseline': RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs),
+                        'advanced': RBO(self.run_a_orig, run_a_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs)}
             else:
                 if print_feedback:
                     print("Determining Rank-biased Overlap (RBO) for baseline run.")
-                return {'baseline':  RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic)}
+                return {'baseline':  RBO(self.run_b_orig, run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs)}
         if self.run_b_orig and self.run_b_rep:
             if self.run_a_orig and self.run_a_rep:
                 if print_feedback:
                     print("Determining Rank-biased Overlap (RBO) for baseline and advanced run.")
-                return {'baseline': RBO(self.run_b_orig, self.run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic),
-                        'advanced': RBO(self.run_a_orig, self.run_a_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic)}
+                return {'baseline': RBO(self.run_b_orig, self.run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs),
+                        'advanced': RBO(self.run_a_orig, self.run_a_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs)}
             else:
                 if print_feedback:
                     print("Determining Rank-biased Overlap (RBO) for baseline run.")
-                return {'baseline':  RBO(self.run_b_orig, self.run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic)}
+                return {'baseline':  RBO(self.run_b_orig, self.run_b_rep, pbar=print_feedback, p=p, depth=depth, per_topic=per_topic, n_jobs=n_jobs)}
         else:
             print(ERR_MSG)
 
+    def _rmse(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False,
+              normalized=False):
+        """
+        Helping function that determines the (normalized) RMSE of the baseline and advanced run in one call.
+        """
+        if self.run_b_orig and run_b_path:
+            run_b_score = self._evaluate_path(run_b_path, self.qrels_orig)
+            run_a_score = self._evaluate_path(run_a_path, self.qrels_orig) if self.run_a_orig and run_a_path else None
+        elif not (self.run_b_orig_score and run_b_score):
+            run_b_score, run_a_score = self.run_b_rep_score, self.run_a_rep_score
+
+        if not (self.run_b_orig_score and run_b_score):
+            print(ERR_MSG)
+            return
+
+        sides = [('baseline', self.run_b_orig_score, run_b_score)]
+        if self.run_a_orig_score and run_a_score:
+            sides.append(('advanced', self.run_a_orig_score, run_a_score))
+        if print_feedback:
+            print('Determining {}Root Mean Square Error (RMSE) for {} run.'.format(
+                'normalized ' if normalized else '', ' and '.join(side for side, _, _ in sides)))
+        rmse = rmse_batch([orig for _, orig, _ in sides], [rep for _, _, rep in sides], normalized=normalized)
+        return {side: values for (side, _, _), values in zip(sides, rmse)}
+
     def rmse(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False):
         """
         Determines the Root Mean Square Error (RMSE), see also: https://dl.acm.org/doi/10.1145/3397271.3401036
@@ -357,45 +599,7 @@ class RpdEvaluator(Evaluator):
         @return: Dictionary with RMSE values that measure the closeness
                  between the topics scores of the original and reproduced runs.
         """
-        if self.run_b_orig and run_b_path:
-            if self.run_a_orig and run_a_path:
-                if print_feedback:
-                    print("Determining Root Mean Square Error (RMSE) for baseline and advanced run.")
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_orig, run_b_rep)
-                run_a_rep = load_run(run_a_path)
-                run_a_rep_score = evaluate_run(self.measures, self.qrels_orig, run_a_rep)
-                return {'baseline': RMSE(self.run_b_orig_score, run_b_rep_score, pbar=print_feedback),
-                        'advanced': RMSE(self.run_a_orig_score, run_a_rep_score, pbar=print_feedback)}
-            else:
-                if print_feedback:
-                    print("Determining Root Mean Square Error (RMSE) for baseline run.")
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_orig, run_b_rep)
-                return {'baseline': RMSE(self.run_b_orig_score, run_b_rep_score, pbar=print_feedback)}
-
-        if self.run_b_orig_score and run_b_score:
-            if self.run_a_orig_score and run_a_score:
-                if print_feedback:
-                    print("Determining Root Mean Square Error (RMSE) for baseline and advanced run.")
-                return {'baseline': RMSE(self.run_b_orig_score, run_b_score, pbar=print_feedback),
-                        'advanced': RMSE(self.run_a_orig_score, run_a_score, pbar=print_feedback)}
-            else:
-                if print_feedback:
-                    print("Determining Root Mean Square Error (RMSE) for baseline run.")
-                return {'baseline': RMSE(self.run_b_orig_score, run_b_score, pbar=print_feedback)}
-        if self.run_b_orig_score and self.run_b_rep_score:
-            if self.run_a_orig_score and self.run_a_rep_score:
-                if print_feedback:
-                    print("Determining Root Mean Square Error (RMSE) for baseline and advanced run.")
-                return {'baseline': RMSE(self.run_b_orig_score, self.run_b_rep_score, pbar=print_feedback),
-                        'advanced': RMSE(self.run_a_orig_score, self.run_a_rep_score, pbar=print_feedback)}
-            else:
-                if print_feedback:
-                    print("Determining Root Mean Square Error (RMSE) for baseline run.")
-                return {'baseline': RMSE(self.run_b_orig_score, self.run_b_rep_score, pbar=print_feedback)}
-        else:
-            print(ERR_MSG)
+        return self._rmse(run_b_score, run_a_score, run_b_path, run_a_path, print_feedback, normalized=False)
 
     def nrmse(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False):
         """
@@ -413,45 +617,7 @@ class RpdEvaluator(Evaluator):
         @return: Dictionary with nRMSE values that measure the closeness
                  between the topics scores of the original and reproduced runs.
         """
-        if self.run_b_orig and run_b_path:
-            if self.run_a_orig and run_a_path:
-                if print_feedback:
-                    print("Determining normalized Root Mean Square Error (RMSE) for baseline and advanced run.")
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_orig, run_b_rep)
-                run_a_rep = load_run(run_a_path)
-                run_a_rep_score = evaluate_run(self.measures, self.qrels_orig, run_a_rep)
-                return {'baseline': nRMSE(self.run_b_orig_score, run_b_rep_score, pbar=print_feedback),
-                        'advanced': nRMSE(self.run_a_orig_score, run_a_rep_score, pbar=print_feedback)}
-            else:
-                if print_feedback:
-                    print("Determining normalized Root Mean Square Error (RMSE) for baseline run.")
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_orig, run_b_rep)
-                return {'baseline': nRMSE(self.run_b_orig_score, run_b_rep_score, pbar=print_feedback)}
-
-        if self.run_b_orig_score and run_b_score:
-            if self.run_a_orig_score and run_a_score:
-                if print_feedback:
-                    print("Determining normalized Root Mean Square Error (RMSE) for baseline and advanced run.")
-                return {'baseline': nRMSE(self.run_b_orig_score, run_b_score, pbar=print_feedback),
-                        'advanced': nRMSE(self.run_a_orig_score, run_a_score, pbar=print_feedback)}
-            else:
-                if print_feedback:
-                    print("Determining normalized Root Mean Square Error (RMSE) for baseline run.")
-                return {'baseline': nRMSE(self.run_b_orig_score, run_b_score, pbar=print_feedback)}
-        if self.run_b_orig_score and self.run_b_rep_score:
-            if self.run_a_orig_score and self.run_a_rep_score:
-                if print_feedback:
-                    print("Determining Root Mean Square Error (RMSE) for baseline and advanced run.")
-                return {'baseline': nRMSE(self.run_b_orig_score, self.run_b_rep_score, pbar=print_feedback),
-                        'advanced': nRMSE(self.run_a_orig_score, self.run_a_rep_score, pbar=print_feedback)}
-            else:
-                if print_feedback:
-                    print("Determining normalized Root Mean Square Error (RMSE) for baseline run.")
-                return {'baseline': nRMSE(self.run_b_orig_score, self.run_b_rep_score, pbar=print_feedback)}
-        else:
-            print(ERR_MSG)
+        return self._rmse(run_b_score, run_a_score, run_b_path, run_a_path, print_feedback, normalized=True)
 
     def ttest(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False):
         """
@@ -471,29 +637,71 @@ class RpdEvaluator(Evaluator):
         """
         if run_b_path:
             if run_a_path:
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_orig, run_b_rep)
-                run_a_rep = load_run(run_a_path)
-                run_a_rep_score = evaluate_run(self.measures, self.qrels_orig, run_a_rep)
+                run_b_rep_score = self._evaluate_path(run_b_path, self.qrels_orig)
+                run_a_rep_score = self._evaluate_path(run_a_path, self.qrels_orig)
                 return self._ttest(run_b_score=run_b_rep_score, run_a_score=run_a_rep_score, print_feedback=print_feedback)
             else:
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_orig, run_b_rep)
+                run_b_rep_score = self._evaluate_path(run_b_path, self.qrels_orig)
                 return self._ttest(run_b_score=run_b_rep_score, run_a_score=None, print_feedback=print_feedback)
 
         return self._ttest(run_b_score=run_b_score, run_a_score=run_a_score, print_feedback=print_feedback)
 
+    def permutation_test(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None,
+                         n_resamples=PERMUTATION_RESAMPLES, seed=None, n_jobs=None, print_feedback=False):
+        """
+        Conducts a paired two-sided randomization (permutation) test for reproduced runs that were derived
+        from the same test collection as in the original experiment.
+
+        @param run_b_score: Scores of the baseline run,
+                            if not provided the scores of the RpdEvaluator object will be used instead.
+        @param run_a_score: Scores of the advanced run,
+                            if not provided the scores of the RpdEvaluator object will be used instead.
+        @param run_b_path: Path to another reproduced baseline run,
+                           if not provided the reproduced baseline run of the RpdEvaluator object will be used instead.
+        @param run_a_path: Path to another reproduced advanced run,
+                           if not provided the reproduced advanced run of the RpdEvaluator object will be used instead.
+        @param n_resamples: Number of random sign flips.
+        @param seed: Seed of the random number generator.
+        @param n_jobs: Number of worker processes the resamples are distributed to.
+        @param print_feedback: Boolean value indicating if feedback on progress should be printed.
+        @return: Dictionary with p-values that compare the score distributions of the baseline and advanced run.
+        """
+        if run_b_path:
+            run_b_score = self._evaluate_path(run_b_path, self.qrels_orig)
+            run_a_score = self._evaluate_path(run_a_path, self.qrels_orig) if run_a_path else None
+        elif not run_b_score:
+            run_b_score, run_a_score = self.run_b_rep_score, self.run_a_rep_score
+
+        if not (self.run_b_orig_score and run_b_score):
+            print(ERR_MSG)
+            return
+
+        if print_feedback:
+            print('Determining p-values of permutation test for baseline{} run.'.format(
+                ' and advanced' if run_a_score else ''))
+        pvals = {'baseline': permutation_test(self.run_b_orig_score, run_b_score, n_resamples=n_resamples,
+                                              seed=seed, n_jobs=n_jobs)}
+        if self.run_a_orig_score and run_a_score:
+            pvals['advanced'] = permutation_test(self.run_a_orig_score, run_a_score, n_resamples=n_resamples,
+                                                 seed=seed, n_jobs=n_jobs)
+        return pvals
+
 
 class RplEvaluator(Evaluator):
     """
     The Replicability Evaluator is used for quantifying the different levels of replication for runs that were
     derived from a test collection not used in the original experiment.
     """
+    repro_measures = ('er', 'dri', 'pval')
+    qrels_rpl = _LazyLoad('qrels_rpl_path', load_qrels)
+
     def __init__(self, **kwargs):
         super(RplEvaluator, self).__init__(**kwargs)
         self.qrels_rpl_path = kwargs.get('qrels_rpl_path', None)
-        if self.qrels_rpl_path:
-            self.qrels_rpl = load_qrels(self.qrels_rpl_path)
+
+    @property
+    def _qrels_rep(self):
+        return self.qrels_rpl if self.qrels_rpl_path else self.qrels_orig
 
     def evaluate(self, run=None, run_path=None, rpl=True):
         """
@@ -505,24 +713,25 @@ class RplEvaluator(Evaluator):
         @param run_path: File path to a replicated run (prioritized over 'run' parameter).
         @param rpl: If rpl=True, the qrels file of the replicated run (based on another test collection) is used for the evaluation.
                     Otherwise, the qrels file of the original test collection is used.
-        @return: If run is specified, a dictionary with the corresponding scores is returned.
+        @return: If run is specified, a ScoreMatrix with the corresponding scores is returned.
         """
         if run or run_path:
-            run = load_run(run_path) if run_path else run # run_path has priority in case both are provided
-            run = break_ties(run)
-            if rpl:
-                return evaluate_run(self.measures, self.qrels_rpl, run)
-            else:
-                return evaluate_run(self.measures, self.qrels_orig, run)
+            qrels = self.qrels_rpl if rpl else self.qrels_orig
+            if run_path:  # run_path has priority in case both are provided
+                return self._evaluate_path(run_path, qrels)
+            return self._evaluate_run(break_ties(run), qrels)
+
+        if not self.measures:
+            return
 
         super(RplEvaluator, self).evaluate()
 
         if self.run_b_rep:
             self.run_b_rep = break_ties(self.run_b_rep)
-            self.run_b_rep_score = evaluate_run(self.measures, self.qrels_rpl, self.run_b_rep)
+            self.run_b_rep_score = self._evaluate_run(self.run_b_rep, self.qrels_rpl)
         if self.run_a_rep:
             self.run_a_rep = break_ties(self.run_a_rep)
-            self.run_a_rep_score = evaluate_run(self.measures, self.qrels_rpl, self.run_a_rep)
+            self.run_a_rep_score = self._evaluate_run(self.run_a_rep, self.qrels_rpl)
 
     def ttest(self, run_b_score=None, run_a_score=None, run_b_path=None, run_a_path=None, print_feedback=False):
         """
@@ -542,14 +751,159 @@ class RplEvaluator(Evaluator):
         """
         if run_b_path:
             if run_a_path:
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_rpl, run_b_rep)
-                run_a_rep = load_run(run_a_path)
-                run_a_rep_score = evaluate_run(self.measures, self.qrels_rpl, run_a_rep)
+                run_b_rep_score = self._evaluate_path(run_b_path, self.qrels_rpl)
+                run_a_rep_score = self._evaluate_path(run_a_path, self.qrels_rpl)
                 return self._ttest(rpd=False, run_b_score=run_b_rep_score, run_a_score=run_a_rep_score, print_feedback=print_feedback)
             else:
-                run_b_rep = load_run(run_b_path)
-                run_b_rep_score = evaluate_run(self.measures, self.qrels_rpl, run_b_rep)
+                run_b_rep_score = self._evaluate_path(run_b_path, self.qrels_rpl)
                 return self._ttest(rpd=False, run_b_score=run_b_rep_score, run_a_score=None, print_feedback=print_feedback)
 
         return self._ttest(rpd=False, run_b_score=run_b_score, run_a_score=run_a_score, print_feedback=print_feedback)
+
+
+class BatchRpdEvaluator(RpdEvaluator):
+    """
+    The Batch Reproducibility Evaluator compares one original baseline (and advanced) run to many reproduced runs.
+    The original runs are loaded and evaluated once, and the reproduced runs are processed
+    one after another (optionally in worker processes), so only a bounded number of runs is held in memory.
+    The topic scores of the reproduced runs are collected in batches whose RMSE, nRMSE, t-tests, ER and DRI
+    are determined at once.
+    """
+
+    def evaluate_batch(self, runs, n_jobs=None, p=RBO_P, depth=RBO_DEPTH, print_feedback=False):
+        """
+        Determines KTU, RBO, RMSE, nRMSE and the p-values of the t-test for every reproduced run and
+        additionally ER and DRI for reproduced pairs of baseline and advanced runs.
+
+        @param runs: List with paths to reproduced baseline runs or (baseline path, advanced path) tuples.
+        @param n_jobs: Number of worker processes, cf. repro_eval.parallel.effective_n_jobs().
+        @param p: The parameter p of the RBO.
+        @param depth: The maximum depth to which the rankings are compared by the RBO.
+        @param print_feedback: Boolean value indicating if feedback on progress should be printed.
+        @return: ResultTable with one row per value, cf. repro_eval.result.ResultTable.
+                 The run is identified by the filename of the (baseline) run and the measure is None for KTU and RBO.
+                 Both the side and the measure are None for the overall ER and DRI values.
+        """
+        from tqdm import tqdm
+        table = ResultTable()
+        results = self.iter_batch(runs, n_jobs=n_jobs, p=p, depth=depth)
+        for result in tqdm(results, total=len(runs), disable=not print_feedback):
+            table.extend(self.result_table(result))
+        return table
+
+    @staticmethod
+    def result_table(result):
+        """
+        Use this method to convert the reproducibility measures of a single run (cf. iter_batch()) into a ResultTable.
+
+        @param result: Dictionary with the reproducibility measures of a run.
+        @return: ResultTable with the reproducibility measures.
+        """
+        table = ResultTable()
+        for repro_measure, values in result.items():
+            if repro_measure not in ['run', 'path']:
+                table.add(repro_measure, values, run=result['run'])
+        return table
+
+    def iter_batch(self, runs, n_jobs=None, p=RBO_P, depth=RBO_DEPTH, ordered=True, batch_size=BATCH_SIZE):
+        """
+        Use this method to get the reproducibility measures of the reproduced runs one after another,
+        e.g., to write them to a file while the remaining runs are still evaluated.
+
+        @param runs: Iterable with paths to reproduced baseline runs or (baseline path, advanced path) tuples.
+        @param n_jobs: Number of worker processes, cf. repro_eval.parallel.effective_n_jobs().
+        @param p: The parameter p of the RBO.
+        @param depth: The maximum depth to which the rankings are compared by the RBO.
+        @param ordered: If False, the results are yielded as soon as they are completed
+                        instead of in the order of the runs.
+        @param batch_size: Number of evaluated runs whose RMSE, nRMSE, t-tests, ER and DRI are determined at once.
+                           The results of a batch are yielded when all of its runs are evaluated.
+        @return: Generator with a dictionary for every run that contains the 'run' (filename of the baseline run),
+                 the 'path' of the baseline run and the values of the reproducibility measures,
+                 e.g., {'run': ..., 'path': ..., 'ktu': {'baseline': ..., 'advanced': ...}, ..., 'er': {...}}.
+        """
+        if self.run_b_orig_score is None:
+            self.trim()
+            self.evaluate()
+
+        results = parallel.imap(_score_batch_item, ((item, p, depth) for item in runs),
+                                n_jobs=n_jobs, state=self, ordered=ordered)
+        batch = list(islice(results, batch_size))
+        while batch:
+            yield from self._measure_batch(batch)
+            batch = list(islice(results, batch_size))
+
+    def _evaluate_batch_item(self, item, p, depth):
+        """
+        Helping function that determines the reproducibility measures of a single reproduced run or pair.
+
+        @return: Dictionary with the reproducibility measures, cf. iter_batch().
+        """
+        return self._measure_batch([self._score_batch_item(item, p, depth)])[0]
+
+    def _score_batch_item(self, item, p, depth):
+        """
+        Helping function that evaluates a single reproduced run or pair and determines its KTU and RBO.
+
+        @return: Dictionary with the KTU and RBO values and the 'scores' of the baseline and advanced run,
+                 cf. _measure_batch().
+        """
+        run_b_path, run_a_path = (item, None) if isinstance(item, str) else item
+        run_b_rep = self._load_rep(run_b_path)
+        run_a_rep = self._load_rep(run_a_path) if run_a_path else None
+        run_b_score = self._evaluate_run(run_b_rep, self.qrels_orig) if self.measures else None
+        run_a_score = self._evaluate_run(run_a_rep, self.qrels_orig) if self.measures and run_a_path else None
+
+        return {'run': os.path.basename(run_b_path), 'path': run_b_path,
+                'ktu': self.ktu(run_b_rep=run_b_rep, run_a_rep=run_a_rep),
+                'rbo': self.rbo(run_b_rep=run_b_rep, run_a_rep=run_a_rep, p=p, depth=depth),
+                'scores': (run_b_score, run_a_score)}
+
+    def _measure_batch(self, results):
+        """
+        Helping function that determines RMSE, nRMSE and the p-values of the t-test and, for pairs of runs, ER and DRI
+        of a batch of evaluated runs (cf. _score_batch_item()). The topic scores of all runs are stacked,
+        so every measure is determined with a single call for the whole batch.
+
+        @param results: List with the dictionaries of the evaluated runs, the 'scores' are replaced by the measures.
+        @return: List with the dictionaries of the reproducibility measures, cf. iter_batch().
+        """
+        scores = [result.pop('scores') for result in results]
+        if not self.measures:
+            return results
+
+        for side, orig_score, index in [('baseline', self.run_b_orig_score, 0),
+                                        ('advanced', self.run_a_orig_score, 1)]:
+            runs = [i for i, score in enumerate(scores) if orig_score is not None and score[index] is not None]
+            if not runs:
+                continue
+            rep_scores = [scores[i][index] for i in runs]
+            for repro_measure, values in [('rmse', rmse_batch(orig_score, rep_scores)),
+                                          ('nrmse', rmse_batch(orig_score, rep_scores, normalized=True)),
+                                          ('pval', ttest_batch(orig_score, rep_scores))]:
+                for i, value in zip(runs, values):
+                    results[i].setdefault(repro_measure, {})[side] = value
+
+        pairs = [i for i, (_, score_a) in enumerate(scores) if self.run_a_orig_score is not None and score_a is not None]
+        if pairs:
+            rep_scores_a = [scores[i][1] for i in pairs]
+            rep_scores_b = [scores[i][0] for i in pairs]
+            for repro_measure, batch in [('er', er_batch), ('dri', dri_batch)]:
+                values, measures = batch(self.run_a_orig_score, self.run_b_orig_score, rep_scores_a, rep_scores_b)
+                for i, row in zip(pairs, values.tolist()):
+                    results[i][repro_measure] = dict(zip(measures, row))
+        return results
+
+    def _load_rep(self, path):
+        run = break_ties(load_run(path, cache_dir=self.cache_dir))
+        trim_run(run, thresh=RUN_LENGTH)
+        return run
+
+
+def _evaluate_batch_item(args):
+    return parallel.get_state()._evaluate_batch_item(*args)
+
+
+def _score_batch_item(args):
+    return parallel.get_state()._score_batch_item(*args)
+
@@ -1,6 +1,9 @@
 RUN_LENGTH = 1000  # default threshold for trimming the runs
 RBO_DEPTH = 1000 # default parameter for the Rank-Biased Overlap (RBO)
 RBO_P = 0.95 # default parameter for the Rank-Biased Overlap (RBO)
+PERMUTATION_RESAMPLES = 10000  # default number of resamples of the permutation test
+BATCH_SIZE = 32  # default number of reproduced runs whose effectiveness-based measures are determined at once
+SCORE_CACHE_SIZE = 16  # default number of evaluated runs that are kept in memory by an Evaluator
 ERR_MSG = 'Please provide adequate run combinations and have them evaluated first.'  # error message
 
 # evaluation measures of trec_eval that will be excluded from the reproduction and replication measures
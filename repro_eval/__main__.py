@@ -7,19 +7,92 @@ python -m repro_eval -t rpd -q qrels_orig -r orig_b orig_a rpd_b rpd_a
 
 python -m repro_eval -t rpd -m rmse -q qrels_orig -r orig_b rpd_b
 
+python -m repro_eval -t rpd -m rmse -e P_10 ndcg map -q qrels_orig -r orig_b rpd_b
+
 python -m repro_eval -t rpl -q qrels_orig qrels_rpl -r orig_b rpl_b
 
 python -m repro_eval -t rpl -q qrels_orig qrels_rpl -r orig_b orig_a rpl_b rpl_a
 
+python -m repro_eval batch -q qrels_orig -r orig_b orig_a -p 'runs/*_b.txt' --reproduced-a 'runs/*_a.txt' --workers 4
+
+python -m repro_eval serve -q qrels_orig -r orig_b orig_a --port 8765 --workers 4
+
 after having installed the Python package.
 For other more specific examples also have a look at the README file.
 Depending on the provided parameters and input run files,
-evaluation measures will be printed.
+evaluation measures will be printed. The batch command compares the original runs to
+all reproduced runs in the given directories or glob patterns and writes one JSON line per reproduced run.
+The serve command keeps the evaluated original runs in memory and answers queries for reproduced runs,
+cf. repro_eval.server.
 """
 
 import argparse
-from repro_eval.Evaluator import RpdEvaluator, RplEvaluator
-from repro_eval.util import print_simple_line, print_base_adv
+import glob
+import json
+import os
+import sys
+
+
+def _expand(patterns):
+    """
+    Helping function that expands directories and glob patterns into a sorted list of file paths.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in os.listdir(pattern) if not name.startswith('.')]
+            matches = [path for path in matches if os.path.isfile(path)]
+        else:
+            matches = glob.glob(pattern)
+        for path in sorted(matches):
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def batch(args):
+    """
+    Evaluates the reproduced runs of the batch command and writes one JSON line per run as soon as it is completed.
+    With the formats jsonl, csv, and parquet, the rows of the tidy result table are written instead.
+    """
+    from repro_eval.Evaluator import BatchRpdEvaluator
+    from repro_eval.result import JsonlWriter, CsvWriter, open_writer, json_safe
+
+    runs = _expand(args.reproduced)
+    if args.reproduced_a:
+        runs_a = _expand(args.reproduced_a)
+        if len(runs_a) != len(runs):
+            sys.exit('Found {} reproduced baseline runs but {} reproduced advanced runs.'.format(len(runs), len(runs_a)))
+        runs = list(zip(runs, runs_a))
+
+    batch_eval = BatchRpdEvaluator(qrels_orig_path=args.qrels,
+                                   run_b_orig_path=args.runs[0],
+                                   run_a_orig_path=args.runs[1] if len(args.runs) > 1 else None,
+                                   measures=args.eval_measures,
+                                   cache_dir=args.cache_dir)
+
+    results = batch_eval.iter_batch(runs, n_jobs=args.workers, ordered=args.ordered)
+    if args.format != 'json':
+        if args.output:
+            writer = open_writer(args.output, format=args.format)
+        elif args.format in ['jsonl', 'csv']:
+            writer = JsonlWriter(sys.stdout) if args.format == 'jsonl' else CsvWriter(sys.stdout)
+        else:
+            sys.exit('Please provide the path to the Parquet file with --output.')
+        for result in results:
+            writer.write(batch_eval.result_table(result))
+        if args.output:
+            writer.close()
+        return
+
+    f_out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in results:
+            f_out.write(json.dumps(json_safe(result)) + '\n')
+            f_out.flush()
+    finally:
+        if args.output:
+            f_out.close()
 
 
 def main():
@@ -29,27 +102,84 @@ def main():
     parser.add_argument('-m', '--measure', nargs='+')
     parser.add_argument('-q', '--qrels', nargs='+')
     parser.add_argument('-r', '--runs', nargs='+')
+    parser.add_argument('-e', '--eval-measures', nargs='+')
+    parser.add_argument('--cache-dir')
+
+    subparsers = parser.add_subparsers(dest='command')
+    batch_parser = subparsers.add_parser('batch', help='compare the original runs to many reproduced runs')
+    batch_parser.add_argument('-q', '--qrels', required=True)
+    batch_parser.add_argument('-r', '--runs', nargs='+', required=True, help='original baseline (and advanced) run')
+    batch_parser.add_argument('-p', '--reproduced', nargs='+', required=True,
+                              help='directories or glob patterns of the reproduced (baseline) runs')
+    batch_parser.add_argument('--reproduced-a', nargs='+',
+                              help='directories or glob patterns of the reproduced advanced runs, '
+                                   'paired with the baseline runs in sorted order')
+    batch_parser.add_argument('-e', '--eval-measures', nargs='+')
+    batch_parser.add_argument('-w', '--workers', type=int, help='number of worker processes')
+    batch_parser.add_argument('-o', '--output', help='path to the output file (default: stdout)')
+    batch_parser.add_argument('-f', '--format', choices=['json', 'jsonl', 'csv', 'parquet'], default='json',
+                              help='json writes one object per run, jsonl, csv, and parquet one row per value')
+    batch_parser.add_argument('--ordered', action='store_true',
+                              help='write the results in the order of the runs instead of the order of completion')
+    batch_parser.add_argument('--cache-dir')
+
+    serve_parser = subparsers.add_parser('serve', help='answer reproducibility queries from a local server')
+    serve_parser.add_argument('-q', '--qrels', required=True)
+    serve_parser.add_argument('-r', '--runs', nargs='+', required=True, help='original baseline (and advanced) run')
+    serve_parser.add_argument('-e', '--eval-measures', nargs='+')
+    serve_parser.add_argument('-w', '--workers', type=int, help='number of worker processes')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--socket', help='path to a UNIX socket that is used instead of the port')
+    serve_parser.add_argument('--verbose', action='store_true', help='log the requests')
+    serve_parser.add_argument('--cache-dir')
 
     args = parser.parse_args()
 
+    if args.command == 'batch':
+        batch(args)
+        return
+
+    if args.command == 'serve':
+        from repro_eval.server import EvaluationService, serve
+        service = EvaluationService(workers=args.workers,
+                                    qrels_orig_path=args.qrels,
+                                    run_b_orig_path=args.runs[0],
+                                    run_a_orig_path=args.runs[1] if len(args.runs) > 1 else None,
+                                    measures=args.eval_measures,
+                                    cache_dir=args.cache_dir)
+        serve(service, host=args.host, port=args.port, socket_path=args.socket, verbose=args.verbose)
+        return
+
+    # the evaluators are imported after parsing the arguments, so --help does not wait for ir_measures and scipy
+    from repro_eval.Evaluator import RpdEvaluator, RplEvaluator
+    from repro_eval.util import print_simple_line, print_base_adv
+
+    measure_list = args.measure if args.measure is not None else []
+    eval_measures = args.eval_measures
+    if measure_list and set(measure_list) <= {'ktu', 'rbo'}:
+        eval_measures = []  # the document orderings can be compared without evaluating the runs
+
     if args.type in ['rpd', 'reproducibility']:
         if len(args.runs) == 4:
             rpd_eval = RpdEvaluator(qrels_orig_path=args.qrels[0],
                                     run_b_orig_path=args.runs[0],
                                     run_a_orig_path=args.runs[1],
                                     run_b_rep_path=args.runs[2],
-                                    run_a_rep_path=args.runs[3])
+                                    run_a_rep_path=args.runs[3],
+                                    measures=eval_measures,
+                                    cache_dir=args.cache_dir)
 
         if len(args.runs) == 2:
             rpd_eval = RpdEvaluator(qrels_orig_path=args.qrels[0],
                                     run_b_orig_path=args.runs[0],
-                                    run_b_rep_path=args.runs[1])
+                                    run_b_rep_path=args.runs[1],
+                                    measures=eval_measures,
+                                    cache_dir=args.cache_dir)
 
         rpd_eval.trim()
         rpd_eval.evaluate()
 
-        measure_list = args.measure if args.measure is not None else []
-
         # KTU
         if 'ktu' in measure_list or args.measure is None:
             ktu = rpd_eval.ktu()
@@ -111,7 +241,9 @@ def main():
                                     run_a_orig_path=args.runs[1],
                                     run_b_rep_path=args.runs[2],
                                     run_a_rep_path=args.runs[3],
-                                    qrels_rpl_path=args.qrels[1])
+                                    qrels_rpl_path=args.qrels[1],
+                                    measures=eval_measures,
+                                    cache_dir=args.cache_dir)
 
         if len(args.runs) == 2:
             rpl_eval = RplEvaluator(qrels_orig_path=args.qrels[0],
@@ -119,13 +251,13 @@ def main():
                                     run_a_orig_path=None,
                                     run_b_rep_path=args.runs[1],
                                     run_a_rep_path=None,
-                                    qrels_rpl_path=args.qrels[1])
+                                    qrels_rpl_path=args.qrels[1],
+                                    measures=eval_measures,
+                                    cache_dir=args.cache_dir)
 
         rpl_eval.trim()
         rpl_eval.evaluate()
 
-        measure_list = args.measure if args.measure is not None else []
-
         # ER
         if 'er' in measure_list or args.measure is None and len(args.runs) == 4:
             print("Effect Ratio (ER)")
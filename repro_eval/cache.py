@@ -0,0 +1,172 @@
+import os
+import hashlib
+import tempfile
+from collections import OrderedDict
+import numpy as np
+from repro_eval.run import Run
+
+CACHE_VERSION = '1'  # bump this value whenever the binary layout changes
+_COLUMNS = ['topics', 'docnos', 'docs', 'scores', 'offsets']
+_content_hashes = {}  # content hashes of the files read by this process, keyed by path, size and modification time
+
+
+def _file_digest(path, chunk_size=1 << 20):
+    """
+    Helping function that determines the content hash of a file.
+
+    @param path: Path to the file.
+    @param chunk_size: Number of bytes that are read at once.
+    @return: Hex digest of the file content.
+    """
+    digest = hashlib.blake2b(CACHE_VERSION.encode())
+    with open(path, 'rb') as f_in:
+        for chunk in iter(lambda: f_in.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_content_hash(path):
+    """
+    Use this function to get the content hash of a file. The hash is remembered for the path, size
+    and modification time of the file, so an unchanged file is only read once per process.
+
+    @param path: Path to the file.
+    @return: Hex digest of the file content.
+    """
+    stat = os.stat(path)
+    stat_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    content_hash = _content_hashes.get(stat_key)
+    if content_hash is None:
+        content_hash = _content_hashes[stat_key] = _file_digest(path)
+    return content_hash
+
+
+def fingerprint(data):
+    """
+    Use this function to get a content hash of a run or qrels that are held in memory.
+
+    @param data: Run object or nested dictionary (run or qrels).
+    @return: Hex digest of the content.
+    """
+    digest = hashlib.blake2b(CACHE_VERSION.encode())
+    if isinstance(data, Run):
+        for column in _COLUMNS:
+            digest.update(np.ascontiguousarray(getattr(data, column)).view(np.uint8))
+    else:
+        for topic, ranking in data.items():
+            digest.update(repr((topic, list(ranking.items()))).encode())
+    return digest.hexdigest()
+
+
+class ScoreCache(object):
+    """
+    In-memory cache with least-recently-used (LRU) eviction for the scores of evaluated runs.
+
+    @param maxsize: Maximum number of entries. If it is 0, nothing is cached.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        @param key: Key of the entry.
+        @return: The cached value or None if there is no entry for the key.
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Adds an entry and evicts the least recently used entries if the cache is full.
+
+        @param key: Key of the entry.
+        @param value: The value to be cached.
+        """
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class RunCache(object):
+    """
+    Opt-in on-disk cache for parsed run and qrels files.
+
+    The first time a file is loaded, its columnar representation (cf. repro_eval.run.Run) is written
+    to the cache directory as a set of NumPy arrays. Later calls load these arrays as memory maps
+    instead of parsing the text file again. Entries are keyed by the content hash of the file.
+    To avoid rehashing unchanged files, the content hash is remembered for the path, size
+    and modification time of the file.
+
+    @param cache_dir: Path to the cache directory. It is created if it does not exist.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def content_hash(self, path):
+        """
+        Use this method to get the content hash of a file.
+        The hash is only recomputed if the path, size or modification time of the file changed.
+
+        @param path: Path to the file.
+        @return: Hex digest of the file content.
+        """
+        stat = os.stat(path)
+        stat_key = ':'.join([os.path.abspath(path), str(stat.st_size), str(stat.st_mtime_ns)])
+        ref_path = os.path.join(self.cache_dir,
+                                hashlib.blake2b(stat_key.encode()).hexdigest() + '.ref')
+        if os.path.exists(ref_path):
+            with open(ref_path, 'r') as f_in:
+                return f_in.read().strip()
+        content_hash = file_content_hash(path)
+        self._atomic_write(ref_path, content_hash.encode())
+        return content_hash
+
+    def _entry_path(self, path, kind):
+        return os.path.join(self.cache_dir, '.'.join([self.content_hash(path), kind]))
+
+    def _atomic_write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f_out:
+            f_out.write(data)
+        os.replace(tmp_path, path)
+
+    def load(self, path, kind, parse):
+        """
+        Use this method to load the columnar representation of a file from the cache.
+        If the file is not cached yet, it is parsed with the provided function and written to the cache.
+
+        @param path: Path to the run or qrels file.
+        @param kind: Kind of the cached file, e.g., 'run' or 'qrels'.
+        @param parse: Function that parses the file into a Run object.
+        @return: Run object (backed by memory maps if loaded from the cache).
+        """
+        entry_path = self._entry_path(path, kind)
+        if os.path.isdir(entry_path):
+            return Run(*[np.load(os.path.join(entry_path, column + '.npy'), mmap_mode='r')
+                         for column in _COLUMNS])
+        run = parse(path)
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir)
+        for column in _COLUMNS:
+            np.save(os.path.join(tmp_path, column + '.npy'), getattr(run, column))
+        try:
+            os.rename(tmp_path, entry_path)
+        except OSError:  # another process cached the same file in the meantime
+            for column in _COLUMNS:
+                os.remove(os.path.join(tmp_path, column + '.npy'))
+            os.rmdir(tmp_path)
+        return run
@@ -1,14 +1,17 @@
 from repro_eval import RUN_LENGTH
-from scipy.stats.stats import kendalltau
-from tqdm import tqdm
-from repro_eval.util import break_ties
+from repro_eval.run import as_run
+from repro_eval import parallel
 import numpy as np
 
+KTU_CHUNK_SIZE = 1 << 20  # number of documents that are processed at once by the KTU kernel
+RBO_CHUNK_SIZE = 1 << 22  # number of topics x depth cells that are processed at once by the RBO kernel
+
 
 def _rbo(run, ideal, p, depth):
     # Implementation reproduced from Clarke et al.
     # paper: https://dl.acm.org/doi/10.1145/3451161
     # code: https://github.com/claclark/Compatibility
+    # This is the reference for the batched kernel _rbo_batch() that is used by RBO().
     run_set = set()
     ideal_set = set()
     score = 0.0
@@ -25,7 +28,103 @@ def _rbo(run, ideal, p, depth):
     return score/normalizer
 
 
-def _KTU(orig_run, rep_run, trim_thresh=RUN_LENGTH, pbar=False):
+def _shared_codes(orig_run, rep_run):
+    """
+    Helping function that maps the document vocabularies of two runs to a shared, sorted vocabulary.
+    Since the vocabulary is sorted, the codes preserve the alphabetical order of the document identifiers.
+
+    @param orig_run: The original run.
+    @param rep_run: The reproduced/replicated run.
+    @return: Tuple with arrays mapping the vocabulary indices of both runs to the shared codes.
+             The codes are stored as 32-bit integers if possible, so the rankings stay compact
+             when they are sent to worker processes.
+    """
+    vocab = np.union1d(orig_run.docnos, rep_run.docnos)
+    dtype = np.int32 if len(vocab) < np.iinfo(np.int32).max else np.int64
+    return (np.searchsorted(vocab, orig_run.docnos).astype(dtype),
+            np.searchsorted(vocab, rep_run.docnos).astype(dtype))
+
+
+def _topic_chunks(sizes, chunk_size):
+    """
+    Helping function that splits consecutive topics into chunks with roughly chunk_size documents.
+
+    @param sizes: Array with the number of documents of every topic.
+    @param chunk_size: Maximum number of documents per chunk (a single larger topic forms its own chunk).
+    @return: Generator with slices over the topics.
+    """
+    start = 0
+    total = 0
+    for i, size in enumerate(sizes.tolist()):
+        if total and total + size > chunk_size:
+            yield slice(start, i)
+            start, total = i, 0
+        total += size
+    if start < len(sizes):
+        yield slice(start, len(sizes))
+
+
+def _count_discordant(y, offsets):
+    """
+    Helping function that counts the discordant pairs (i < j with y[i] > y[j]) of every topic with a
+    bottom-up merge sort (Knight's algorithm). All topics are processed at once: at every level of the
+    merge sort, the elements of the right halves of all blocks are looked up in the sorted left halves.
+
+    @param y: Array with the values of all topics, each topic ordered by the other variable.
+    @param offsets: Array delimiting the topics.
+    @return: Array with the number of discordant pairs per topic.
+    """
+    sizes = np.diff(offsets)
+    n_topics = len(sizes)
+    dis = np.zeros(n_topics, dtype=np.int64)
+    max_size = int(sizes.max()) if n_topics else 0
+    rows = np.repeat(np.arange(n_topics), sizes)
+    pos = np.arange(len(y)) - np.repeat(offsets[:-1], sizes)
+    # replace the values by their ranks within the topic to keep the merge keys small
+    rank = np.empty_like(pos)
+    rank[np.lexsort((y, rows))] = pos
+
+    width = 1
+    while width < max_size:
+        block = (rows * max_size + pos // (2 * width)) * max_size
+        right = (pos // width) % 2 == 1
+        left_keys = np.sort(block[~right] + rank[~right])
+        right_block = block[right]
+        greater = (np.searchsorted(left_keys, right_block + max_size)
+                   - np.searchsorted(left_keys, right_block + rank[right], side='right'))
+        dis += np.bincount(rows[right], weights=greater, minlength=n_topics).astype(np.int64)
+        width *= 2
+    return dis
+
+
+def _ktu(orig_codes, rep_codes, offsets):
+    """
+    Helping function that determines Kendall's tau (tau-b, like scipy.stats.kendalltau) between the original
+    and reproduced rankings of several topics at once. Since the documents of a ranking are unique,
+    there are no ties and tau is determined by the number of discordant pairs.
+
+    @param orig_codes: Shared document codes of the original rankings.
+    @param rep_codes: Shared document codes of the reproduced/replicated rankings.
+    @param offsets: Array delimiting the topics (both rankings of a topic must have the same length).
+    @return: Array with KTU values rounded to 14 decimals.
+    """
+    sizes = np.diff(offsets)
+    rows = np.repeat(np.arange(len(sizes)), sizes)
+    order = np.lexsort((orig_codes, rows))
+    dis = _count_discordant(rep_codes[order], offsets)
+    tot = sizes * (sizes - 1) // 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = (tot - 2 * dis) / np.sqrt(tot) / np.sqrt(tot)
+    tau = np.minimum(1., np.maximum(-1., tau))
+    tau[sizes < 2] = np.nan
+    return np.round(tau, 14)
+
+
+def _ktu_chunk(args):
+    return _ktu(*args)
+
+
+def _KTU(orig_run, rep_run, trim_thresh=RUN_LENGTH, pbar=False, chunk_size=KTU_CHUNK_SIZE, n_jobs=None):
     """
     Helping function returning a generator to determine Kendall's tau Union (KTU) for all topics.
 
@@ -33,43 +132,101 @@ def _KTU(orig_run, rep_run, trim_thresh=RUN_LENGTH, pbar=False):
     @param rep_run: The reproduced/replicated run.
     @param trim_thresh: Threshold values for the number of documents to be compared.
     @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Generator with KTU values.
+    @param chunk_size: Number of documents that are processed at once.
+    @param n_jobs: Number of worker processes the chunks of topics are distributed to.
+    @return: Generator with KTU values in the order of the topics.
     """
+    topics = list(rep_run)
+    orig_map, rep_map = _shared_codes(orig_run, rep_run)
+    orig_docs, orig_offsets = orig_run.rankings(topics, depth=trim_thresh)
+    rep_docs, rep_offsets = rep_run.rankings(topics, depth=trim_thresh)
+    sizes = np.diff(rep_offsets)
+    mismatch = np.flatnonzero(np.diff(orig_offsets) != sizes)
+    if mismatch.size:
+        raise ValueError('The rankings of topic {} differ in length.'.format(topics[mismatch[0]]))
+    orig_codes = orig_map[orig_docs]
+    rep_codes = rep_map[rep_docs]
 
-    generator = tqdm(rep_run.items()) if pbar else rep_run.items()
+    n_jobs = parallel.effective_n_jobs(n_jobs)
+    if n_jobs > 1:  # make sure that every worker gets a share of the topics
+        chunk_size = min(chunk_size, max(1, -(-len(rep_codes) // n_jobs)))
+    chunks = list(_topic_chunks(sizes, chunk_size))
+    tasks = ((orig_codes[rep_offsets[chunk.start]:rep_offsets[chunk.stop]],
+              rep_codes[rep_offsets[chunk.start]:rep_offsets[chunk.stop]],
+              rep_offsets[chunk.start:chunk.stop + 1] - rep_offsets[chunk.start]) for chunk in chunks)
+    results = parallel.imap(_ktu_chunk, tasks, n_jobs=n_jobs)
+    generator = results
+    if pbar:
+        from tqdm import tqdm
+        generator = tqdm(results, total=len(chunks))
 
-    for topic, _ in generator:
-        orig_docs = list(orig_run.get(topic).keys())[:trim_thresh]
-        rep_docs = list(rep_run.get(topic).keys())[:trim_thresh]
-        union = list(sorted(set(orig_docs + rep_docs)))
-        orig_idx = [union.index(doc) for doc in orig_docs]
-        rep_idx = [union.index(doc) for doc in rep_docs]
-        yield topic, float(round(kendalltau(orig_idx, rep_idx).correlation, 14))
+    for chunk, ktu in zip(chunks, generator):
+        yield from zip(topics[chunk], ktu.tolist())
 
 
-def KTU(orig_run, rep_run, trim_thresh=RUN_LENGTH, pbar=False, per_topic=False):
+def KTU(orig_run, rep_run, trim_thresh=RUN_LENGTH, pbar=False, per_topic=False, n_jobs=None):
     """
     Determines the Kendall's tau Union (KTU) between the original and reproduced document orderings,
     see also: https://dl.acm.org/doi/10.1145/3397271.3401036
 
-    @param orig_run: The original run.
-    @param rep_run: The reproduced/replicated run.
+    @param orig_run: The original run (Run object or nested dictionary).
+    @param rep_run: The reproduced/replicated run (Run object or nested dictionary).
     @param trim_thresh: Threshold values for the number of documents to be compared.
     @param pbar: Boolean value indicating if progress bar should be printed.
+    @param n_jobs: Number of worker processes, cf. repro_eval.parallel.effective_n_jobs().
     @return: Dictionary with KTU values that compare the document orderings of the original and reproduced runs.
     """
 
     # Safety check for runs that are not added via pytrec_eval
-    orig_run = break_ties(orig_run)
-    rep_run = break_ties(rep_run)
-    ktu_per_topic = dict(_KTU(orig_run, rep_run, trim_thresh=trim_thresh, pbar=pbar))
+    orig_run = as_run(orig_run).break_ties()
+    rep_run = as_run(rep_run).break_ties()
+    ktu_per_topic = dict(_KTU(orig_run, rep_run, trim_thresh=trim_thresh, pbar=pbar, n_jobs=n_jobs))
     if per_topic:
         return ktu_per_topic  
     else:
         return float(np.mean(list(ktu_per_topic.values())))
 
 
-def _RBO(orig_run, rep_run, p, depth, pbar=False):
+def _rbo_batch(run_codes, run_offsets, ideal_codes, ideal_offsets, p, depth):
+    """
+    Helping function that determines the RBO (cf. _rbo()) for several topics at once on integer-encoded rankings.
+
+    Instead of intersecting the sets of seen documents at every rank, the overlap is counted incrementally:
+    a document that is contained in both rankings adds one to the overlap from the rank at which it has been
+    seen in both of them. The scores are accumulated in the same order as in the reference implementation.
+
+    @param run_codes: Shared document codes of the rankings to be compared.
+    @param run_offsets: Array delimiting the topics of run_codes.
+    @param ideal_codes: Shared document codes of the ideal (original) rankings.
+    @param ideal_offsets: Array delimiting the topics of ideal_codes.
+    @param p: Parameter for top-heaviness of the RBO.
+    @param depth: Depth of the comparison.
+    @return: Array with RBO values.
+    """
+    n_topics = len(run_offsets) - 1
+    run_sizes, ideal_sizes = np.diff(run_offsets), np.diff(ideal_offsets)
+    run_rows = np.repeat(np.arange(n_topics), run_sizes)
+    ideal_rows = np.repeat(np.arange(n_topics), ideal_sizes)
+    run_ranks = np.arange(len(run_codes)) - np.repeat(run_offsets[:-1], run_sizes)
+    ideal_ranks = np.arange(len(ideal_codes)) - np.repeat(ideal_offsets[:-1], ideal_sizes)
+
+    n_codes = int(max(run_codes.max(initial=0), ideal_codes.max(initial=0))) + 1
+    _, run_idx, ideal_idx = np.intersect1d(run_rows * n_codes + run_codes, ideal_rows * n_codes + ideal_codes,
+                                           assume_unique=True, return_indices=True)
+    seen = np.maximum(run_ranks[run_idx], ideal_ranks[ideal_idx])
+    overlap = np.bincount(run_rows[run_idx] * depth + seen, minlength=n_topics * depth)
+    overlap = np.cumsum(overlap.reshape(n_topics, depth), axis=1)
+
+    weights = np.cumprod(np.r_[1.0, np.full(depth - 1, p)])
+    score = np.cumsum(weights * overlap / np.arange(1, depth + 1), axis=1)[:, -1]
+    return score / np.cumsum(weights)[-1]
+
+
+def _rbo_chunk(args):
+    return _rbo_batch(*args)
+
+
+def _RBO(orig_run, rep_run, p, depth, pbar=False, chunk_size=RBO_CHUNK_SIZE, n_jobs=None):
     """
     Helping function returning a generator to determine the Rank-Biased Overlap (RBO) for all topics.
 
@@ -78,38 +235,57 @@ def _RBO(orig_run, rep_run, p, depth, pbar=False):
     @param phi: Parameter for top-heaviness of the RBO.
     @param trim_thresh: Threshold values for the number of documents to be compared.
     @param pbar: Boolean value indicating if progress bar should be printed.
-    
-    @return: Generator with RBO values.
+    @param chunk_size: Number of topics x depth cells that are processed at once.
+    @param n_jobs: Number of worker processes the chunks of topics are distributed to.
+    @return: Generator with RBO values in the order of the topics.
     """
+    topics = list(rep_run)
+    orig_map, rep_map = _shared_codes(orig_run, rep_run)
+    orig_docs, orig_offsets = orig_run.rankings(topics, depth=depth)
+    rep_docs, rep_offsets = rep_run.rankings(topics, depth=depth)
+    orig_codes = orig_map[orig_docs]
+    rep_codes = rep_map[rep_docs]
+
+    n_jobs = parallel.effective_n_jobs(n_jobs)
+    step = max(1, chunk_size // max(depth, 1))
+    if n_jobs > 1:  # make sure that every worker gets a share of the topics
+        step = min(step, max(1, -(-len(topics) // n_jobs)))
+    chunks = [slice(start, min(start + step, len(topics))) for start in range(0, len(topics), step)]
+    tasks = ((rep_codes[rep_offsets[chunk.start]:rep_offsets[chunk.stop]],
+              rep_offsets[chunk.start:chunk.stop + 1] - rep_offsets[chunk.start],
+              orig_codes[orig_offsets[chunk.start]:orig_offsets[chunk.stop]],
+              orig_offsets[chunk.start:chunk.stop + 1] - orig_offsets[chunk.start],
+              p, depth) for chunk in chunks)
+    results = parallel.imap(_rbo_chunk, tasks, n_jobs=n_jobs)
+    generator = results
+    if pbar:
+        from tqdm import tqdm
+        generator = tqdm(results, total=len(chunks))
 
-    generator = tqdm(rep_run.items()) if pbar else rep_run.items()
+    for chunk, rbo in zip(chunks, generator):
+        yield from zip(topics[chunk], rbo.tolist())
 
-    for topic, _ in generator:
-        yield topic, _rbo(list(rep_run.get(topic).keys()),
-                    list(orig_run.get(topic).keys()),
-                    p=p,
-                    depth=depth)
-        
 
-def RBO(orig_run, rep_run, p, depth, pbar, per_topic):
+def RBO(orig_run, rep_run, p, depth, pbar, per_topic, n_jobs=None):
     """
     Determines the Rank-Biased Overlap (RBO) between the original and reproduced document orderings,
     see also: https://dl.acm.org/doi/10.1145/3397271.3401036
 
-    @param orig_run: The original run.
-    @param rep_run: The reproduced/replicated run.
+    @param orig_run: The original run (Run object or nested dictionary).
+    @param rep_run: The reproduced/replicated run (Run object or nested dictionary).
     @param phi: Parameter for top-heaviness of the RBO.
     @param trim_thresh: Threshold values for the number of documents to be compared.
     @param pbar: Boolean value indicating if progress bar should be printed.
     @param misinfo: Use the RBO implementation that is also used in the TREC Health Misinformation Track.
                     See also: https://github.com/claclark/Compatibility
+    @param n_jobs: Number of worker processes, cf. repro_eval.parallel.effective_n_jobs().
     @return: Dictionary with RBO values that compare the document orderings of the original and reproduced runs.
     """
 
     # Safety check for runs that are not added via pytrec_eval
-    orig_run = break_ties(orig_run)
-    rep_run = break_ties(rep_run)
-    rbo_per_topic = dict(_RBO(orig_run, rep_run, p=p, depth=depth, pbar=pbar))
+    orig_run = as_run(orig_run).break_ties()
+    rep_run = as_run(rep_run).break_ties()
+    rbo_per_topic = dict(_RBO(orig_run, rep_run, p=p, depth=depth, pbar=pbar, n_jobs=n_jobs))
     if per_topic:
         return rbo_per_topic  
     else:
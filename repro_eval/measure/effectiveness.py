@@ -1,66 +1,95 @@
+from collections import defaultdict
 import numpy as np
-from math import sqrt
-from copy import deepcopy
-from tqdm import tqdm
 from repro_eval import exclude
+from repro_eval.scores import as_score_matrix, paired_scores
 
 
-def _RMSE(orig_score, rep_core, pbar=False):
+def _aligned_scores(orig_score, rep_score, measures=None):
     """
-    Helping function returning a generator to determine the Root Mean Square Error (RMSE) for all topics.
+    Helping function that aligns the reproduced/replicated scores to the topics and measures of the original scores.
+    Topics that are missing in the reproduced/replicated scores are scored with 0 (like trec_eval -c), while
+    topics that are not part of the original scores are ignored, cf. repro_eval.scores.paired_scores().
 
-    @param orig_score: The original scores.
-    @param rep_core: The reproduced/replicated scores.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Generator with RMSE values.
+    @param orig_score: The original scores (ScoreMatrix).
+    @param rep_score: The reproduced/replicated scores (ScoreMatrix).
+    @param measures: List with the measures. If not specified, the valid measures of the original scores are used.
+    @return: Tuple with the list of measures and the two score matrices (topics x measures).
     """
-    orig_cp = deepcopy(orig_score)
-    rep_cp = deepcopy(rep_core)
-    measures_all = list(list(orig_cp.values())[0].keys())
-    topics = orig_cp.keys()
-    measures_valid = [m for m in measures_all if m not in exclude]
+    if measures is None:
+        measures = [m for m in orig_score.measures if m not in exclude]
+    return measures, orig_score.reindex(measures=measures), paired_scores(orig_score, rep_score, measures)
+
 
-    measures = tqdm(measures_valid) if pbar else measures_valid
+def _rmse(orig_values, rep_values):
+    """
+    Helping function that determines the RMSE for all measures (columns) at once.
+    Stacks of score matrices are broadcasted, i.e., the topics are always the second to last axis.
 
-    for measure in measures:
-        orig_measure = np.array([orig_cp.get(topic).get(measure) for topic in topics])
-        rpl_measure = np.array([rep_cp.get(topic).get(measure) for topic in topics])
-        diff = orig_measure - rpl_measure
-        yield measure, sqrt(sum(np.square(diff))/len(diff))
+    @param orig_values: Array with the original topic scores (... x topics x measures).
+    @param rep_values: Array with the reproduced/replicated topic scores (... x topics x measures).
+    @return: Array with RMSE values (... x measures).
+    """
+    diff = orig_values - rep_values
+    return np.sqrt(np.square(diff).sum(axis=-2) / diff.shape[-2])
 
 
-def RMSE(orig_score, rep_score, pbar=False):
+def _max_rmse(orig_values):
     """
-    Determines the Root Mean Square Error (RMSE) between the original and reproduced topic scores
-    according to the paper: https://dl.acm.org/doi/10.1145/3397271.3401036
+    Helping function that determines the maximum RMSE (the normalization of the nRMSE) for all measures at once.
 
-    @param orig_score: The original scores.
-    @param rep_core: The reproduced/replicated scores.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Dictionary with RMSE values that measure the closeness between the original and reproduced topic scores.
+    @param orig_values: Array with the original topic scores (... x topics x measures).
+    @return: Array with maximum RMSE values (... x measures).
     """
-    return dict(_RMSE(orig_score, rep_score, pbar=pbar))
+    return _rmse(np.maximum(orig_values, 1 - orig_values), 0)
 
 
-def _maxRMSE(orig_score, pbar=False):
+def rmse_batch(orig_scores, rep_scores, normalized=False):
     """
-    Helping function returning a generator to determine the maximum Root Mean Square Error (RMSE) for all topics.
+    Use this function to determine the (normalized) RMSE of many pairs of original and reproduced/replicated scores.
+    The scores of pairs whose original scores have the same topics and measures are stacked,
+    so their RMSE values are determined with a single broadcasted computation.
 
-    @param orig_score: The original scores.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Generator with RMSE values.
+    @param orig_scores: The original scores, either a single one that is compared to all reproduced/replicated
+                        scores or a list with the original scores of each pair (ScoreMatrix or nested dictionaries).
+    @param rep_scores: List with the reproduced/replicated scores (ScoreMatrix or nested dictionaries).
+    @param normalized: If True, the nRMSE is determined.
+    @return: List with a dictionary of RMSE values for each pair.
     """
-    orig_cp = deepcopy(orig_score)
-    measures_all = list(list(orig_cp.values())[0].keys())
-    topics = orig_cp.keys()
-    measures_valid = [m for m in measures_all if m not in exclude]
-    measures = tqdm(measures_valid) if pbar else measures_valid
+    if isinstance(orig_scores, (list, tuple)):
+        orig_scores = [as_score_matrix(orig_score) for orig_score in orig_scores]
+    else:
+        orig_scores = [as_score_matrix(orig_scores)] * len(rep_scores)
+    rep_scores = [as_score_matrix(rep_score) for rep_score in rep_scores]
 
-    for measure in measures:
-        orig_measure = np.array([orig_cp.get(topic).get(measure) for topic in topics])
-        _max = np.vectorize(lambda x: max(x, 1 - x))
-        maxdiff = _max(orig_measure)
-        yield measure, sqrt(sum(np.square(maxdiff))/len(maxdiff))
+    groups = defaultdict(list)
+    for i, orig_score in enumerate(orig_scores):
+        groups[(tuple(orig_score.topics), tuple(orig_score.measures))].append(i)
+
+    results = [None] * len(rep_scores)
+    for pairs in groups.values():
+        aligned = [_aligned_scores(orig_scores[i], rep_scores[i]) for i in pairs]
+        measures = aligned[0][0]
+        orig_values = np.stack([orig_values for _, orig_values, _ in aligned])
+        rep_values = np.stack([rep_values for _, _, rep_values in aligned])
+        rmse = _rmse(orig_values, rep_values)
+        if normalized:
+            rmse = rmse / _max_rmse(orig_values)
+        for i, row in zip(pairs, rmse.tolist()):
+            results[i] = dict(zip(measures, row))
+    return results
+
+
+def RMSE(orig_score, rep_score, pbar=False):
+    """
+    Determines the Root Mean Square Error (RMSE) between the original and reproduced topic scores
+    according to the paper: https://dl.acm.org/doi/10.1145/3397271.3401036
+
+    @param orig_score: The original scores.
+    @param rep_core: The reproduced/replicated scores.
+    @param pbar: Kept for backwards compatibility, all measures are determined at once.
+    @return: Dictionary with RMSE values that measure the closeness between the original and reproduced topic scores.
+    """
+    return rmse_batch(orig_score, [rep_score])[0]
 
 
 def nRMSE(orig_score, rep_score, pbar=False):
@@ -69,9 +98,7 @@ def nRMSE(orig_score, rep_score, pbar=False):
 
     @param orig_score: The original scores.
     @param rep_core: The reproduced/replicated scores.
-    @param pbar: Boolean value indicating if progress bar should be printed.
+    @param pbar: Kept for backwards compatibility, all measures are determined at once.
     @return: Dictionary with RMSE values that measure the closeness between the original and reproduced topic scores.
     """
-    rmse = dict(_RMSE(orig_score, rep_score, pbar=pbar))
-    maxrmse = dict(_maxRMSE(orig_score, pbar=pbar))
-    return {measure: score / maxrmse.get(measure) for measure, score in rmse.items()}
+    return rmse_batch(orig_score, [rep_score], normalized=True)[0]
@@ -1,7 +1,93 @@
+import warnings
+from collections import defaultdict
 import numpy as np
-from copy import deepcopy
-from tqdm import tqdm
 from repro_eval import exclude
+from repro_eval.scores import as_score_matrix
+
+
+def _valid_measures(scores):
+    return [m for m in scores.measures if m not in exclude]
+
+
+def _mean_improvements(scores_a, scores_b, measures):
+    """
+    Helping function that determines the mean improvements for all measures at once.
+
+    @param scores_a: ScoreMatrix of the advanced run.
+    @param scores_b: ScoreMatrix of the baseline run.
+    @param measures: List with the measures (columns) to be considered.
+    @return: Array with mean improvements.
+    """
+    delta = scores_a.reindex(measures=measures) - scores_b.reindex(scores_a.topics, measures)
+    return delta.mean(axis=0)
+
+
+def _rel_improvements(scores_a, scores_b, measures):
+    """
+    Helping function that determines the relative improvements for all measures at once.
+
+    @param scores_a: ScoreMatrix of the advanced run.
+    @param scores_b: ScoreMatrix of the baseline run.
+    @param measures: List with the measures (columns) to be considered.
+    @return: Array with relative improvements.
+    """
+    mean_a = scores_a.reindex(measures=measures).mean(axis=0)
+    mean_b = scores_b.reindex(measures=measures).mean(axis=0)
+    return (mean_a - mean_b) / mean_b
+
+
+def _resample_weights(n_topics, n_resamples, rng):
+    """
+    Helping function that draws the bootstrap samples of the topics as one integer matrix
+    and turns it into weights, so the means of all replicates are given by a matrix product.
+
+    @param n_topics: Number of topics.
+    @param n_resamples: Number of bootstrap replicates.
+    @param rng: NumPy random number generator.
+    @return: 2-D array (replicates x topics) with the weight of every topic in every replicate.
+    """
+    index = rng.integers(0, n_topics, size=(n_resamples, n_topics))
+    index += np.arange(n_resamples)[:, None] * n_topics
+    counts = np.bincount(index.ravel(), minlength=n_resamples * n_topics).reshape(n_resamples, n_topics)
+    return counts / n_topics
+
+
+def _bootstrap_weights(orig_topics, rep_topics, n_resamples, seed=None):
+    """
+    Helping function that returns the bootstrap weights of the original and reproduced/replicated topics.
+    If both experiments have the same topics, the same samples are used for both of them (paired bootstrap).
+
+    @param orig_topics: List with the topics of the original runs.
+    @param rep_topics: List with the topics of the reproduced/replicated runs.
+    @param n_resamples: Number of bootstrap replicates.
+    @param seed: Seed of the random number generator.
+    @return: Tuple with the weights of the original and reproduced/replicated topics.
+    """
+    rng = np.random.default_rng(seed)
+    orig_weights = _resample_weights(len(orig_topics), n_resamples, rng)
+    if list(orig_topics) == list(rep_topics):
+        return orig_weights, orig_weights
+    return orig_weights, _resample_weights(len(rep_topics), n_resamples, rng)
+
+
+def _intervals(estimates, replicates, measures, confidence):
+    """
+    Helping function that determines the percentile intervals of the bootstrap replicates.
+
+    @param estimates: Array with the point estimates.
+    @param replicates: 2-D array with the bootstrap replicates (replicates x measures).
+    @param measures: List with the measure names.
+    @param confidence: Confidence level of the intervals.
+    @return: Dictionary with the estimate and the lower and upper bound for each measure.
+    """
+    alpha = (1 - confidence) / 2 * 100
+    replicates[~np.isfinite(replicates)] = np.nan
+    with warnings.catch_warnings():  # measures without finite replicates get nan bounds
+        warnings.simplefilter('ignore', RuntimeWarning)
+        lower, upper = np.nanpercentile(replicates, [alpha, 100 - alpha], axis=0) \
+            if len(replicates) else np.full((2, len(measures)), np.nan)
+    return {measure: {'estimate': estimate, 'lower': low, 'upper': up}
+            for measure, estimate, low, up in zip(measures, estimates.tolist(), lower.tolist(), upper.tolist())}
 
 
 def diff(topic_score_a, topic_score_b):
@@ -27,28 +113,8 @@ def topic_diff(run_a, run_b):
     @param run_b: The baseline run.
     @return: Generator with absolute differences between the topics scores for each measure.
     """
-    run_a_cp = deepcopy(run_a)
-    run_b_cp = deepcopy(run_b)
-
-    for topic, measures in run_a_cp.items():
-        yield topic, dict(diff(measures, run_b_cp.get(topic)))
-
-
-def _mean_improvement(run_a, run_b):
-    """
-    Helping function returning a generator for determining the mean improvements.
-
-    @param run_a: The advanced run.
-    @param run_b: The baseline run.
-    @return: Generator with mean improvements.
-    """
-    measures_all = list(list(run_a.values())[0].keys())
-    measures_valid = [m for m in measures_all if m not in exclude]
-    topics = run_a.keys()
-    delta = dict(topic_diff(run_a, run_b))
-
-    for measure in measures_valid:
-        yield measure, np.array([delta.get(topic).get(measure) for topic in topics]).mean()
+    for topic, measures in run_a.items():
+        yield topic, dict(diff(measures, run_b.get(topic)))
 
 
 def mean_improvement(run_a, run_b):
@@ -59,30 +125,12 @@ def mean_improvement(run_a, run_b):
     @param run_b: The baseline run.
     @return: Dictionary with mean improvements for each measure.
     """
-    return dict(_mean_improvement(run_a, run_b))
-
-
-def _er(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=False):
-    """
-    Helping function returning a generator for determining the Effect Ratio (ER).
-
-    @param orig_score_a: Scores of the original advanced run.
-    @param orig_score_b: Scores of the original baseline run.
-    @param rep_score_a: Scores of the reproduced/replicated advanced run.
-    @param rep_score_b: Scores of the reproduced/replicated baseline run.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Generator with ER scores.
-    """
-    mi_orig = mean_improvement(orig_score_a, orig_score_b)
-    mi_rep = mean_improvement(rep_score_a, rep_score_b)
+    run_a, run_b = as_score_matrix(run_a), as_score_matrix(run_b)
+    measures = _valid_measures(run_a)
+    return dict(zip(measures, _mean_improvements(run_a, run_b, measures).tolist()))
 
-    generator = tqdm(mi_rep.items()) if pbar else mi_rep.items()
 
-    for measure, value in generator:
-        yield measure, float(value / mi_orig.get(measure))
-
-
-def ER(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=False):
+def ER(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=False, bootstrap=None, confidence=0.95, seed=None):
     """
     Determines the Effect Ratio (ER), see also: https://dl.acm.org/doi/10.1145/3397271.3401036
 
@@ -93,25 +141,30 @@ def ER(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=False):
     @param orig_score_b: Scores of the original baseline run.
     @param rep_score_a: Scores of the reproduced/replicated advanced run.
     @param rep_score_b: Scores of the reproduced/replicated baseline run.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Dictionary containing the ER values for the specified run combination.
-    """
-    return dict(_er(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=pbar))
-
-
-def _mean_score(scores):
+    @param pbar: Kept for backwards compatibility, all measures are determined at once.
+    @param bootstrap: Number of bootstrap replicates. If it is specified, percentile intervals of the ER
+                      are determined by resampling the topics.
+    @param confidence: Confidence level of the bootstrap intervals.
+    @param seed: Seed of the random number generator used for the bootstrap.
+    @return: Dictionary containing the ER values for the specified run combination. If bootstrap is specified,
+             the values are dictionaries with the 'estimate' and the 'lower' and 'upper' bound of the interval.
     """
-    Helping function to determine the mean scores across the topics for each measure.
-
-    @param scores: Run scores.
-    @return: Generator with mean scores.
-    """
-    measures_all = list(list(scores.values())[0].keys())
-    measures_valid = [m for m in measures_all if m not in exclude]
-    topics = scores.keys()
-
-    for measure in measures_valid:
-        yield measure, np.array([scores.get(topic).get(measure) for topic in topics]).mean()
+    orig_score_a, orig_score_b = as_score_matrix(orig_score_a), as_score_matrix(orig_score_b)
+    rep_score_a, rep_score_b = as_score_matrix(rep_score_a), as_score_matrix(rep_score_b)
+    measures = _valid_measures(rep_score_a)
+    if bootstrap is not None:
+        delta_orig = orig_score_a.reindex(measures=measures) - orig_score_b.reindex(orig_score_a.topics, measures)
+        delta_rep = rep_score_a.reindex(measures=measures) - rep_score_b.reindex(rep_score_a.topics, measures)
+        weights_orig, weights_rep = _bootstrap_weights(orig_score_a.topics, rep_score_a.topics, bootstrap, seed)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimates = delta_rep.mean(axis=0) / delta_orig.mean(axis=0)
+            replicates = (weights_rep @ delta_rep) / (weights_orig @ delta_orig)
+        return _intervals(estimates, replicates, measures, confidence)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        er = (_mean_improvements(rep_score_a, rep_score_b, measures)
+              / _mean_improvements(orig_score_a, orig_score_b, measures))
+    return dict(zip(measures, er.tolist()))
 
 
 def mean_score(scores):
@@ -121,22 +174,9 @@ def mean_score(scores):
     @param scores: Run scores.
     @return: Dictionary containing the mean scores for each measure.
     """
-    return dict(_mean_score(scores))
-
-
-def _rel_improve(scores_a, scores_b):
-    """
-    Helping function returning a generator for determining the relative improvements.
-
-    @param scores_a: Scores of the advanced run.
-    @param scores_b: Scores of the baseline run.
-    @return: Generator with relative improvements.
-    """
-    mean_scores_a = mean_score(scores_a)
-    mean_scores_b = mean_score(scores_b)
-
-    for measure, mean in mean_scores_a.items():
-        yield measure, (mean - mean_scores_b.get(measure)) / mean_scores_b.get(measure)
+    scores = as_score_matrix(scores)
+    measures = _valid_measures(scores)
+    return dict(zip(measures, scores.reindex(measures=measures).mean(axis=0).tolist()))
 
 
 def rel_improve(scores_a, scores_b):
@@ -147,41 +187,118 @@ def rel_improve(scores_a, scores_b):
     @param scores_b: Scores of the baseline run.
     @return: Dictionary with relative improvements for each measure.
     """
-    return dict(_rel_improve(scores_a, scores_b))
+    scores_a, scores_b = as_score_matrix(scores_a), as_score_matrix(scores_b)
+    measures = _valid_measures(scores_a)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return dict(zip(measures, _rel_improvements(scores_a, scores_b, measures).tolist()))
 
 
-def _DRI(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=False):
+def DRI(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=False, bootstrap=None, confidence=0.95, seed=None):
     """
-    Helping function returning a generator for determining the Delta Relative Improvement (DeltaRI).
+    Determines the Delta Relative Improvement (DeltaRI), see also: https://dl.acm.org/doi/10.1145/3397271.3401036
+
+    The DeltaRI value is determined by the difference between the relative improvements
+    of the original and reproduced/replicated experiments.
 
     @param orig_score_a: Scores of the original advanced run.
     @param orig_score_b: Scores of the original baseline run.
     @param rep_score_a: Scores of the reproduced/replicated advanced run.
     @param rep_score_b: Scores of the reproduced/replicated baseline run.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Generator with DeltaRI scores.
+    @param pbar: Kept for backwards compatibility, all measures are determined at once.
+    @param bootstrap: Number of bootstrap replicates. If it is specified, percentile intervals of the DeltaRI
+                      are determined by resampling the topics. The estimate and the replicates are determined
+                      with the baseline scores of the topics of the advanced runs.
+    @param confidence: Confidence level of the bootstrap intervals.
+    @param seed: Seed of the random number generator used for the bootstrap.
+    @return: Dictionary containing the DeltaRI values for the specified run combination. If bootstrap is specified,
+             the values are dictionaries with the 'estimate' and the 'lower' and 'upper' bound of the interval.
     """
-    rel_improve_orig = rel_improve(orig_score_a, orig_score_b)
-    rel_improve_rep = rel_improve(rep_score_a, rep_score_b)
-
-    generator = tqdm(rel_improve_orig.items()) if pbar else rel_improve_orig.items()
+    orig_score_a, orig_score_b = as_score_matrix(orig_score_a), as_score_matrix(orig_score_b)
+    rep_score_a, rep_score_b = as_score_matrix(rep_score_a), as_score_matrix(rep_score_b)
+    measures = _valid_measures(orig_score_a)
+    if bootstrap is not None:
+        orig_a, orig_b = orig_score_a.reindex(measures=measures), orig_score_b.reindex(orig_score_a.topics, measures)
+        rep_a, rep_b = rep_score_a.reindex(measures=measures), rep_score_b.reindex(rep_score_a.topics, measures)
+        weights_orig, weights_rep = _bootstrap_weights(orig_score_a.topics, rep_score_a.topics, bootstrap, seed)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimates = ((orig_a.mean(axis=0) - orig_b.mean(axis=0)) / orig_b.mean(axis=0)
+                         - (rep_a.mean(axis=0) - rep_b.mean(axis=0)) / rep_b.mean(axis=0))
+            mean_orig_b, mean_rep_b = weights_orig @ orig_b, weights_rep @ rep_b
+            replicates = ((weights_orig @ orig_a - mean_orig_b) / mean_orig_b
+                          - (weights_rep @ rep_a - mean_rep_b) / mean_rep_b)
+        return _intervals(estimates, replicates, measures, confidence)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dri = (_rel_improvements(orig_score_a, orig_score_b, measures)
+               - _rel_improvements(rep_score_a, rep_score_b, measures))
+    return dict(zip(measures, dri.tolist()))
+
+
+def _stacked_improvements(scores_a, scores_b, measures, relative=False):
+    """
+    Helping function that determines the (relative) improvements of many pairs of advanced and baseline runs.
+    Pairs with the same topics are stacked into (pairs x topics x measures) arrays and processed at once.
+
+    @param scores_a: List with the ScoreMatrix objects of the advanced runs.
+    @param scores_b: List with the ScoreMatrix objects of the baseline runs.
+    @param measures: List with the measures (columns) to be considered.
+    @param relative: If True, the relative improvements are determined, otherwise the mean improvements.
+    @return: 2-D array with the improvements (pairs x measures).
+    """
+    groups = defaultdict(list)
+    for i, (score_a, score_b) in enumerate(zip(scores_a, scores_b)):
+        groups[(tuple(score_a.topics), tuple(score_b.topics))].append(i)
+
+    improvements = np.empty((len(scores_a), len(measures)))
+    for pairs in groups.values():
+        values_a = np.stack([scores_a[i].reindex(measures=measures) for i in pairs])
+        if relative:
+            values_b = np.stack([scores_b[i].reindex(measures=measures) for i in pairs])
+            mean_a, mean_b = values_a.mean(axis=1), values_b.mean(axis=1)
+            improvements[pairs] = (mean_a - mean_b) / mean_b
+        else:
+            values_b = np.stack([scores_b[i].reindex(scores_a[i].topics, measures) for i in pairs])
+            improvements[pairs] = (values_a - values_b).mean(axis=1)
+    return improvements
+
+
+def er_batch(orig_score_a, orig_score_b, rep_scores_a, rep_scores_b):
+    """
+    Use this function to determine the Effect Ratio (ER) of many reproduced/replicated pairs of
+    advanced and baseline runs at once.
 
-    for measure, ri in generator:
-        yield measure, float(ri - rel_improve_rep.get(measure))
+    @param orig_score_a: Scores of the original advanced run.
+    @param orig_score_b: Scores of the original baseline run.
+    @param rep_scores_a: List with the scores of the reproduced/replicated advanced runs.
+    @param rep_scores_b: List with the scores of the reproduced/replicated baseline runs.
+    @return: Tuple with a 2-D array of ER values (pairs x measures) and the list of measures (columns).
+    """
+    orig_score_a, orig_score_b = as_score_matrix(orig_score_a), as_score_matrix(orig_score_b)
+    rep_scores_a = [as_score_matrix(score) for score in rep_scores_a]
+    rep_scores_b = [as_score_matrix(score) for score in rep_scores_b]
+    measures = _valid_measures(orig_score_a)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        er = (_stacked_improvements(rep_scores_a, rep_scores_b, measures)
+              / _mean_improvements(orig_score_a, orig_score_b, measures))
+    return er, measures
 
 
-def DRI(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=False):
+def dri_batch(orig_score_a, orig_score_b, rep_scores_a, rep_scores_b):
     """
-    Determines the Delta Relative Improvement (DeltaRI), see also: https://dl.acm.org/doi/10.1145/3397271.3401036
-
-    The DeltaRI value is determined by the difference between the relative improvements
-    of the original and reproduced/replicated experiments.
+    Use this function to determine the Delta Relative Improvement (DeltaRI) of many reproduced/replicated pairs of
+    advanced and baseline runs at once.
 
     @param orig_score_a: Scores of the original advanced run.
     @param orig_score_b: Scores of the original baseline run.
-    @param rep_score_a: Scores of the reproduced/replicated advanced run.
-    @param rep_score_b: Scores of the reproduced/replicated baseline run.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Dictionary containing the DeltaRI values for the specified run combination.
+    @param rep_scores_a: List with the scores of the reproduced/replicated advanced runs.
+    @param rep_scores_b: List with the scores of the reproduced/replicated baseline runs.
+    @return: Tuple with a 2-D array of DeltaRI values (pairs x measures) and the list of measures (columns).
     """
-    return dict(_DRI(orig_score_a, orig_score_b, rep_score_a, rep_score_b, pbar=pbar))
+    orig_score_a, orig_score_b = as_score_matrix(orig_score_a), as_score_matrix(orig_score_b)
+    rep_scores_a = [as_score_matrix(score) for score in rep_scores_a]
+    rep_scores_b = [as_score_matrix(score) for score in rep_scores_b]
+    measures = _valid_measures(orig_score_a)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dri = (_rel_improvements(orig_score_a, orig_score_b, measures)
+               - _stacked_improvements(rep_scores_a, rep_scores_b, measures, relative=True))
+    return dri, measures
@@ -1,35 +1,62 @@
-import math
-from scipy.stats.stats import ttest_rel, ttest_ind
-from tqdm import tqdm
-from repro_eval.util import topic_scores
+from collections import defaultdict
+import numpy as np
+from repro_eval.scores import as_score_matrix, paired_scores
+from repro_eval import parallel, PERMUTATION_RESAMPLES
 
+PERMUTATION_CHUNK_SIZE = 1 << 20  # number of resamples x topics cells that are processed at once
 
-def _ttest(orig_score, rep_score, rpd=True, pbar=False):
+
+def _pvalues(orig_values, rep_values, rpd=True):
     """
+    Helping function that conducts the t-tests for a stack of reproduced/replicated runs and
+    all measures at once, i.e., one scipy call along the topic axis.
 
-    @param orig_score: The original scores.
-    @param rep_score: The reproduced/replicated scores.
+    @param orig_values: 2-D array with the original scores (topics x measures).
+    @param rep_values: 3-D array with the reproduced/replicated scores (runs x topics x measures).
     @param rpd: Boolean indicating if the evaluated runs are reproduced.
-    @param pbar: Boolean value indicating if progress bar should be printed.
-    @return: Generator with p-values.
+    @return: 2-D array with p-values (runs x measures).
     """
+    from scipy.stats import ttest_rel, ttest_ind  # scipy.stats is slow to import and only needed here
+    orig_values = np.broadcast_to(orig_values, (len(rep_values),) + orig_values.shape)
     if rpd:  # paired two-tailed t-test
-        topic_scores_orig = topic_scores(orig_score)
-        topic_scores_rep = topic_scores(rep_score)
+        return ttest_rel(orig_values, rep_values, axis=1).pvalue
+    # else unpaired two-tailed t-test
+    return ttest_ind(orig_values, rep_values, axis=1).pvalue
+
+
+def ttest_batch(orig_score, rep_scores, rpd=True):
+    """
+    Use this function to conduct the t-tests between the original scores and the scores of many
+    reproduced/replicated runs. The topic scores of all runs are stacked into a single array,
+    so the p-values of all runs and measures are determined at once.
 
-        generator = tqdm(topic_scores_orig.items()) if pbar else topic_scores_orig.items()
+    @param orig_score: The original scores (ScoreMatrix or nested dictionary).
+    @param rep_scores: List with the reproduced/replicated scores (ScoreMatrix objects or nested dictionaries).
+    @param rpd: Boolean indicating if the evaluated runs are reproduced. For the paired t-test, topics that are
+                missing in the reproduced scores are scored with 0 like in the RMSE, cf. repro_eval.scores.paired_scores().
+    @return: List with a dictionary of p-values for each of the reproduced/replicated runs.
+    """
+    orig_score = as_score_matrix(orig_score)
+    rep_scores = [as_score_matrix(rep_score) for rep_score in rep_scores]
+    measures = orig_score.measures
 
-        for measure, scores in generator:
-            yield measure, float(ttest_rel(scores, topic_scores_rep.get(measure)).pvalue)
+    # runs are stacked if they have the same topics, which is always the case for paired tests
+    groups = defaultdict(list)
+    for i, rep_score in enumerate(rep_scores):
+        groups[tuple(orig_score.topics) if rpd else tuple(rep_score.topics)].append(i)
 
-    else:  # else unpaired two-tailed t-test
-        topic_scores_orig = topic_scores(orig_score)
-        topic_scores_rep = topic_scores(rep_score)
+    pvals = np.empty((len(rep_scores), len(measures)))
+    for topics, runs in groups.items():
+        rep_values = np.stack([paired_scores(orig_score, rep_scores[i], measures) if rpd
+                               else rep_scores[i].reindex(measures=measures) for i in runs])
+        pvals[runs] = _pvalues(orig_score.values, rep_values, rpd=rpd)
 
-        generator = tqdm(topic_scores_orig.items()) if pbar else topic_scores_orig.items()
+    # the p-values of equal score distributions are set to 1.0 instead of nan
+    for i in np.flatnonzero(np.isnan(pvals).all(axis=1)):
+        if orig_score == rep_scores[i]:
+            pvals[i] = 1.0
 
-        for measure, scores in generator:
-            yield measure, float(ttest_ind(scores, topic_scores_rep.get(measure)).pvalue)
+    return [dict(zip(measures, row)) for row in pvals.tolist()]
 
 
 def ttest(orig_score, rep_score, rpd=True, pbar=False):
@@ -38,13 +65,59 @@ def ttest(orig_score, rep_score, rpd=True, pbar=False):
     @param orig_score: The original scores.
     @param rep_score: The reproduced/replicated scores.
     @param rpd: Boolean indicating if the evaluated runs are reproduced.
-    @param pbar: Boolean value indicating if progress bar should be printed.
+    @param pbar: Kept for backwards compatibility, all measures are tested at once.
     @return: Dictionary with p-values that compare the score distributions of the baseline and advanced run.
     """
-    pvals = dict(_ttest(orig_score, rep_score, rpd=rpd, pbar=pbar))
-    nan_list = list(filter(lambda x: math.isnan(x), pvals.values()))
-    if len(nan_list) == len(pvals):  # is every pval is nan?
-        if orig_score == rep_score:  # equal score distributions?
-            pvals = dict.fromkeys(pvals, 1.0)
+    return ttest_batch(orig_score, [rep_score], rpd=rpd)[0]
+
+
+def _count_extreme(args):
+    """
+    Helping function that counts for one chunk of random sign flips how often the permuted sum of the
+    topic differences is at least as extreme as the observed one.
+
+    @param args: Tuple with the number of resamples of the chunk and its seed sequence.
+    @return: Array with the counts per measure.
+    """
+    n_resamples, seed = args
+    diffs, observed = parallel.get_state()
+    rng = np.random.default_rng(seed)
+    signs = rng.integers(0, 2, size=(n_resamples, diffs.shape[0]), dtype=np.int8) * 2 - 1
+    permuted = np.abs(signs.astype(np.float64) @ diffs)
+    return (permuted >= observed).sum(axis=0)
+
+
+def permutation_test(orig_score, rep_score, n_resamples=PERMUTATION_RESAMPLES, seed=None, n_jobs=None):
+    """
+    Conducts a paired two-sided randomization (permutation) test for all measures at once.
+
+    Under the null hypothesis, the original and reproduced score of a topic are exchangeable,
+    i.e., the sign of their difference is random. The random sign flips are drawn as matrices
+    (resamples x topics) in chunks of bounded size and multiplied with the topic differences
+    (topics x measures), so every chunk tests all measures with a single matrix product.
+    Topics that are missing in the reproduced scores are scored with 0, cf. repro_eval.scores.paired_scores().
+
+    @param orig_score: The original scores (ScoreMatrix or nested dictionary).
+    @param rep_score: The reproduced scores (ScoreMatrix or nested dictionary).
+    @param n_resamples: Number of random sign flips.
+    @param seed: Seed of the random number generator. The p-values do not depend on n_jobs.
+    @param n_jobs: Number of worker processes the chunks are distributed to.
+    @return: Dictionary with p-values.
+    """
+    orig_score = as_score_matrix(orig_score)
+    rep_score = as_score_matrix(rep_score)
+    measures = orig_score.measures
+    diffs = orig_score.values - paired_scores(orig_score, rep_score, measures)
+    observed = np.abs(diffs.sum(axis=0))
+    observed -= observed * 1e-12  # tolerance for rounding errors of sums that are equal to the observed one
+
+    chunk_size = max(1, PERMUTATION_CHUNK_SIZE // max(diffs.shape[0], 1))
+    sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    counts = np.zeros(len(measures), dtype=np.int64)
+    for chunk_counts in parallel.imap(_count_extreme, zip(sizes, seeds), n_jobs=n_jobs, state=(diffs, observed)):
+        counts += chunk_counts
 
-    return pvals
+    pvals = (counts + 1) / (n_resamples + 1)
+    pvals[np.isnan(observed)] = np.nan
+    return dict(zip(measures, pvals.tolist()))
@@ -1,18 +1,23 @@
 import os
 import json
+import hashlib
 import platform
-import pkg_resources
+import shutil
+import tempfile
 import warnings
-from collections import defaultdict
-from io import BytesIO, TextIOWrapper
-import cpuinfo
-import pytrec_eval
-import git
+from collections import defaultdict, Counter
+from io import BytesIO
+from itertools import chain, takewhile
 from ruamel.yaml import YAML
-from repro_eval import Evaluator
+from repro_eval import Evaluator, parallel
+from repro_eval.result import ResultTable
 
 META_START = '# ir_metadata.start'
 META_END = '# ir_metadata.end'
+# all trec_eval measure families of pytrec_eval.supported_measures that can be evaluated with ir_measures,
+# except for the counts (num_q, num_ret, ...) that are no effectiveness measures
+PRIMAD_MEASURES = ('P', 'Rprec', 'bpref', 'infAP', 'iprec_at_recall', 'map', 'map_cut', 'ndcg', 'ndcg_cut',
+                   'recall', 'recip_rank', 'set_F', 'set_P', 'set_map', 'set_recall', 'set_relative_P', 'success')
 
 class PrimadExperiment:
     """
@@ -39,6 +44,13 @@ class PrimadExperiment:
                       the experiments, i.e., it is used to evaluate runs that are 
                       derived from a different test collection. Please note that 
                       "rpd_qrels" has to be provided too.
+    @param metadata_index: Optional MetadataIndex with the metadata of the runs.
+    @param metadata_cache: Optional path to the on-disk cache of the MetadataIndex,
+                           if no metadata_index is provided.
+    @param measures: Optional list with the measures that are evaluated. By default,
+                     all measures in PRIMAD_MEASURES are evaluated. The 'arp' entries of
+                     the evaluations are ScoreMatrix objects with the topic scores of
+                     these measures (named following the convention of ir_measures).
     """
     def __init__(self, **kwargs): 
     
@@ -59,25 +71,17 @@ class PrimadExperiment:
         self.rpd_qrels = kwargs.get('rpd_qrels', None)
         self.rep_adv = kwargs.get('rep_adv', None)
         self.rpl_qrels = kwargs.get('rpl_qrels', None)
+        self.metadata_index = kwargs.get('metadata_index', None) or MetadataIndex(kwargs.get('metadata_cache', None))
+        measures = kwargs.get('measures', PRIMAD_MEASURES)
 
         if self.rpl_qrels:
-            self.rep_eval = Evaluator.RplEvaluator(qrel_orig_path=self.rpd_qrels,
-                                                   qrel_rpl_path=self.rpl_qrels)  
-            
-            with open(self.rpd_qrels, 'r') as f_rpd_qrels, open(self.rpl_qrels, 'r') as f_rpl_qrels:
-                qrels = pytrec_eval.parse_qrel(f_rpd_qrels)
-                self.rpd_rel_eval = pytrec_eval.RelevanceEvaluator(qrels, pytrec_eval.supported_measures)
-                qrels = pytrec_eval.parse_qrel(f_rpl_qrels)
-                self.rpl_rel_eval = pytrec_eval.RelevanceEvaluator(qrels, pytrec_eval.supported_measures)
-            
-        
+            self.rep_eval = Evaluator.RplEvaluator(qrels_orig_path=self.rpd_qrels,
+                                                   qrels_rpl_path=self.rpl_qrels,
+                                                   measures=measures)
+
         elif self.primad[-1].islower(): # check if data component is the same
-            self.rep_eval = Evaluator.RpdEvaluator(qrel_orig_path=self.rpd_qrels)
-            
-            with open(self.rpd_qrels, 'r') as f_qrels:
-                qrels = pytrec_eval.parse_qrel(f_qrels)
-                self.rpd_rel_eval = pytrec_eval.RelevanceEvaluator(qrels, pytrec_eval.supported_measures)
-            
+            self.rep_eval = Evaluator.RpdEvaluator(qrels_orig_path=self.rpd_qrels, measures=measures)
+
         else:
             raise ValueError('Please provide a correct combination of qrels and PRIMAD type.')
             
@@ -92,7 +96,7 @@ class PrimadExperiment:
         """
         return self.primad
     
-    def evaluate(self):
+    def evaluate(self, as_table=False, n_jobs=None):
         """
         This method validates the PRIMAD experiment in accordance with the given
         "primad" identifier. Currently, the following experiments are supported.
@@ -100,117 +104,114 @@ class PrimadExperiment:
             - PRIMAd: Reproducibility evaluation on the same test collection
             - PRIMAD: Generalizability evaluation
         
+        @param as_table: If True, the results are returned as a tidy ResultTable
+                         (cf. repro_eval.result.ResultTable) with the run or experiment
+                         names in the 'run' column.
+        @param n_jobs: Number of worker processes the runs (or pairs of runs) are
+                       evaluated with, cf. repro_eval.parallel.effective_n_jobs().
         @return: Dictionary containing the average retrieval performance and 
                  the reproducibility measures for each run.
         """
+        evaluations = dict(self.iter_evaluate(n_jobs=n_jobs, ordered=True))
+        if not as_table:
+            return evaluations
+
+        table = ResultTable()
+        for run, run_evaluations in evaluations.items():
+            for repro_measure, values in run_evaluations.items():
+                table.add(repro_measure, values, run=run)
+        return table
+
+    def iter_evaluate(self, n_jobs=None, ordered=False):
+        """
+        Use this method to get the evaluations of the single runs (or pairs of runs)
+        as soon as they are finished, cf. evaluate(). The original runs are evaluated
+        once and sent to every worker process together with their scores.
         
+        @param n_jobs: Number of worker processes, cf. repro_eval.parallel.effective_n_jobs().
+        @param ordered: If True, the evaluations are yielded in the order of the runs 
+                        instead of the order in which they are finished.
+        @return: Generator with (run or experiment name, evaluations) tuples.
+        """
+        items = self._prepare()
+        yield from parallel.imap(_evaluate_primad_item, items, n_jobs=n_jobs, state=self, ordered=ordered)
+
+    def _prepare(self):
+        """
+        Helping function that evaluates the original runs and returns the 
+        reproduced runs (or pairs of runs) that will be evaluated. The qrels 
+        are loaded before the runs are dispatched, so the workers receive them 
+        with the experiment instead of loading them again.
+        """
+        _ = self.rep_eval._qrels_rep  # loads the (lazily loaded) qrels of the reproduced runs
         if self.primad == 'priMad':
             if self.ref_adv_run is None and self.rep_adv is None:
-                
-                evaluations = {} 
-                
                 self.rep_eval.run_b_orig = self.ref_base_run
                 self.rep_eval.evaluate()
+                return self.rep_base + [self.ref_base_path]
 
-                for rep_run_path in self.rep_base + [self.ref_base_path]:
-                    
-                    run_evaluations = {}
-                
-                    rep_run = MetadataHandler.strip_metadata(rep_run_path)
-                    scores = self.rpd_rel_eval.evaluate(rep_run)
-                    
-                    run_evaluations['arp'] = scores
-                    run_evaluations['ktu'] = self.rep_eval.ktau_union(run_b_rep=rep_run).get('baseline')
-                    run_evaluations['rbo'] = self.rep_eval.rbo(run_b_rep=rep_run).get('baseline')
-                    run_evaluations['rmse'] = self.rep_eval.nrmse(run_b_score=scores).get('baseline')
-                    run_evaluations['pval'] = self.rep_eval.ttest(run_b_score=scores).get('baseline')
-                
-                    run_name = os.path.basename(rep_run_path)
-                
-                    evaluations[run_name] = run_evaluations
-        
-                return evaluations
-    
-        if self.primad == 'PRIMAd':
-            
-            evaluations = {} 
-            
+        if self.primad in ['PRIMAd', 'PRIMAD']:
             self.rep_eval.run_b_orig = self.ref_base_run
             self.rep_eval.run_a_orig = self.ref_adv_run
             self.rep_eval.trim(t=1000)
             self.rep_eval.evaluate()
-    
+
             pairs = self._find_pairs(rep_base=self.rep_base, rep_adv=self.rep_adv)
-            pairs = pairs + [{'base': self.ref_base_path, 'adv': self.ref_adv_path}]
-            
-            for pair in pairs:
-                
-                pair_evaluations = {}
-                
-                rep_run_base = MetadataHandler.strip_metadata(pair.get('base'))
-                rep_meta_base = MetadataHandler.read_metadata(pair.get('base'))                
-                rep_run_adv = MetadataHandler.strip_metadata(pair.get('adv'))
-                rep_meta_adv = MetadataHandler.read_metadata(pair.get('adv'))          
-                      
-                self.rep_eval.trim(t=1000, run=rep_run_base)
-                self.rep_eval.trim(t=1000, run=rep_run_adv)
-                scores_base = self.rpd_rel_eval.evaluate(rep_run_base)
-                scores_adv = self.rpd_rel_eval.evaluate(rep_run_adv)
-                arp = {'baseline': scores_base, 'advanced': scores_adv}
-                pair_evaluations['arp'] = arp 
-                pair_evaluations['ktu'] = self.rep_eval.ktau_union(run_b_rep=rep_run_base, run_a_rep=rep_run_adv)
-                pair_evaluations['rbo'] = self.rep_eval.rbo(run_b_rep=rep_run_base, run_a_rep=rep_run_adv)
-                pair_evaluations['rmse'] = self.rep_eval.nrmse(run_b_score=scores_base, run_a_score=scores_adv)
-                pair_evaluations['er'] = self.rep_eval.er(run_b_score=scores_base, run_a_score=scores_adv)
-                pair_evaluations['dri'] = self.rep_eval.dri(run_b_score=scores_base, run_a_score=scores_adv)
-                pair_evaluations['pval'] = self.rep_eval.ttest(run_b_score=scores_base, run_a_score=scores_adv)
-                
-                if rep_meta_base.get('actor').get('team') == rep_meta_adv.get('actor').get('team'):
-                    expid = rep_meta_base.get('actor').get('team')
-                else:
-                    expid = '_'.join([rep_meta_base.get('tag'), rep_meta_adv.get('tag')])
-                
-                evaluations[expid] = pair_evaluations
- 
-            return evaluations
-    
-        if self.primad == 'PRIMAD':
-            evaluations = {} 
+            if self.primad == 'PRIMAd':
+                pairs = pairs + [{'base': self.ref_base_path, 'adv': self.ref_adv_path}]
+            return pairs
+
+        raise ValueError('The specified type of the PRIMAD experiments is not supported yet.')
+
+    def _evaluate_item(self, item):
+        """
+        Helping function that evaluates a single run of a parameter sweep
+        or a pair of reproduced runs.
+        
+        @param item: Path to a run (priMad) or dictionary with the paths to 
+                     a baseline and an advanced run.
+        @return: Tuple with the run (or experiment) name and the evaluations.
+        """
+        if self.primad == 'priMad':
+            run_evaluations = {}
             
-            self.rep_eval.run_b_orig = self.ref_base_run
-            self.rep_eval.run_a_orig = self.ref_adv_run
-            self.rep_eval.trim(t=1000)
-            self.rep_eval.evaluate()
-    
-            pairs = self._find_pairs(rep_base=self.rep_base, rep_adv=self.rep_adv)
-            pairs = pairs
+            rep_run = MetadataHandler.strip_metadata(item)
+            scores = self.rep_eval.evaluate(run=rep_run)
             
-            for pair in pairs:
-                
-                pair_evaluations = {}
-                
-                rep_run_base = MetadataHandler.strip_metadata(pair.get('base'))
-                rep_meta_base = MetadataHandler.read_metadata(pair.get('base'))                
-                rep_run_adv = MetadataHandler.strip_metadata(pair.get('adv'))
-                rep_meta_adv = MetadataHandler.read_metadata(pair.get('adv'))          
-                      
-                self.rep_eval.trim(t=1000, run=rep_run_base)
-                self.rep_eval.trim(t=1000, run=rep_run_adv)
-                scores_base = self.rpl_rel_eval.evaluate(rep_run_base)
-                scores_adv = self.rpl_rel_eval.evaluate(rep_run_adv)
-                arp = {'baseline': scores_base, 'advanced': scores_adv}
-                pair_evaluations['arp'] = arp 
-                pair_evaluations['er'] = self.rep_eval.er(run_b_score=scores_base, run_a_score=scores_adv)
-                pair_evaluations['dri'] = self.rep_eval.dri(run_b_score=scores_base, run_a_score=scores_adv)
-                pair_evaluations['pval'] = self.rep_eval.ttest(run_b_score=scores_base, run_a_score=scores_adv)
-                
-                expid = '_'.join([rep_meta_base.get('tag'), rep_meta_adv.get('tag')])  
-                evaluations[expid] = pair_evaluations
+            run_evaluations['arp'] = scores
+            run_evaluations['ktu'] = self.rep_eval.ktu(run_b_rep=rep_run).get('baseline')
+            run_evaluations['rbo'] = self.rep_eval.rbo(run_b_rep=rep_run).get('baseline')
+            run_evaluations['rmse'] = self.rep_eval.nrmse(run_b_score=scores).get('baseline')
+            run_evaluations['pval'] = self.rep_eval.ttest(run_b_score=scores).get('baseline')
             
-            return evaluations
+            return os.path.basename(item), run_evaluations
+
+        pair_evaluations = {}
         
+        rep_meta_base, rep_run_base = MetadataHandler.read_annotated_run(item.get('base'))
+        rep_meta_adv, rep_run_adv = MetadataHandler.read_annotated_run(item.get('adv'))
+        
+        self.rep_eval.trim(t=1000, run=rep_run_base)
+        self.rep_eval.trim(t=1000, run=rep_run_adv)
+        scores_base = self.rep_eval.evaluate(run=rep_run_base)
+        scores_adv = self.rep_eval.evaluate(run=rep_run_adv)
+        arp = {'baseline': scores_base, 'advanced': scores_adv}
+        pair_evaluations['arp'] = arp
+        
+        if self.primad == 'PRIMAd':
+            pair_evaluations['ktu'] = self.rep_eval.ktu(run_b_rep=rep_run_base, run_a_rep=rep_run_adv)
+            pair_evaluations['rbo'] = self.rep_eval.rbo(run_b_rep=rep_run_base, run_a_rep=rep_run_adv)
+            pair_evaluations['rmse'] = self.rep_eval.nrmse(run_b_score=scores_base, run_a_score=scores_adv)
+        pair_evaluations['er'] = self.rep_eval.er(run_b_score=scores_base, run_a_score=scores_adv)
+        pair_evaluations['dri'] = self.rep_eval.dri(run_b_score=scores_base, run_a_score=scores_adv)
+        pair_evaluations['pval'] = self.rep_eval.ttest(run_b_score=scores_base, run_a_score=scores_adv)
+        
+        if self.primad == 'PRIMAd' and rep_meta_base.get('actor').get('team') == rep_meta_adv.get('actor').get('team'):
+            expid = rep_meta_base.get('actor').get('team')
         else:
-            raise ValueError('The specified type of the PRIMAD experiments is not supported yet.')
+            expid = '_'.join([rep_meta_base.get('tag'), rep_meta_adv.get('tag')])
+        
+        return expid, pair_evaluations
         
     def _find_pairs(self, rep_base, rep_adv):
         """
@@ -223,30 +224,12 @@ class PrimadExperiment:
         @return: List with dictionaries containing paths to a baseline and an 
                  advanced run.
         """
+        return self.metadata_index.find_pairs(rep_base, rep_adv)
+    
 
-        pairs = []
-        for brp in rep_base:
-            br = MetadataHandler.read_metadata(run_path=brp)
+def _evaluate_primad_item(item):
+    return parallel.get_state()._evaluate_item(item)
 
-            arp = None
-            cnt = 0
-            
-            for _arp in rep_adv:
-                _cnt = 0
-                ar = MetadataHandler.read_metadata(run_path=_arp)
-                
-                for k,v in br.items():
-                    if v == ar.get(k):
-                        _cnt += 1
-                        
-                if _cnt > cnt:
-                    cnt = _cnt 
-                    arp = _arp
-            
-            pairs.append({'base': brp, 'adv': arp})
-            
-        return pairs
-    
 
 class MetadataAnalyzer:
     """
@@ -256,13 +239,15 @@ class MetadataAnalyzer:
     keys and lists with the corresponding run paths as values.
     
     @param run_path: Path to the reference run file.
+    @param metadata_index: Optional MetadataIndex with the metadata of the runs.
     """
     
-    def __init__(self, run_path):
+    def __init__(self, run_path, metadata_index=None):
         
+        self.metadata_index = metadata_index or MetadataIndex()
         self.reference_run_path = run_path
         self.reference_run = MetadataHandler.strip_metadata(run_path)
-        self.reference_metadata = MetadataHandler.read_metadata(run_path)
+        self.reference_metadata = self.metadata_index.get(run_path)
         
     def set_reference(self, run_path):
         """
@@ -273,7 +258,7 @@ class MetadataAnalyzer:
         
         self.reference_run_path = run_path
         self.reference_run = MetadataHandler.strip_metadata(run_path)
-        self.reference_metadata = MetadataHandler.read_metadata(run_path)
+        self.reference_metadata = self.metadata_index.get(run_path)
         
     def analyze_directory(self, dir_path):    
         """
@@ -285,6 +270,7 @@ class MetadataAnalyzer:
         
         components = ['platform', 'research goal', 'implementation', 'method', 'actor', 'data']
         primad = {}
+        reference_hashes = self.metadata_index.component_hashes(self.reference_run_path)
         
         files = os.listdir(dir_path)
         
@@ -294,18 +280,19 @@ class MetadataAnalyzer:
             if file_path == self.reference_run_path:
                 continue
             
-            _metadata = MetadataHandler.read_metadata(file_path)
+            _hashes = self.metadata_index.component_hashes(file_path)
             
             primad_str = ''
                                         
             for component in components:
-                if self.reference_metadata[component] != _metadata[component]:
+                if reference_hashes[component] != _hashes[component]:
                     primad_str += component[0].upper()
                 else:
                     primad_str += component[0]
             
             primad[file_path] = primad_str
             
+        self.metadata_index.save()
         experiments = defaultdict(list)
         for k, v in primad.items(): 
             experiments[v].append(k)
@@ -313,20 +300,22 @@ class MetadataAnalyzer:
         return experiments  
     
     @staticmethod
-    def filter_by_baseline(ref_run, runs):
+    def filter_by_baseline(ref_run, runs, metadata_index=None):
         """
         Use this method to filter a list of runs wrt. to the baseline that is 
         specified under "research goal/evaluation/baseline" of a given reference run.
         
         @param ref_run: The reference with the baseline.
         @param runs: A list of run paths that is filtered.
+        @param metadata_index: Optional MetadataIndex with the metadata of the runs.
         """
         
-        run_tag = MetadataHandler.read_metadata(ref_run).get('tag')
+        metadata_index = metadata_index or MetadataIndex()
+        run_tag = metadata_index.get(ref_run).get('tag')
 
         filtered_list = []
         for run in runs:
-            _metadata = MetadataHandler.read_metadata(run)
+            _metadata = metadata_index.get(run)
             baseline = _metadata.get('research goal').get('evaluation').get('baseline')[0]
             if baseline == run_tag:
                 filtered_list.append(run)
@@ -334,18 +323,20 @@ class MetadataAnalyzer:
         return filtered_list
     
     @staticmethod 
-    def filter_by_test_collection(test_collection, runs):
+    def filter_by_test_collection(test_collection, runs, metadata_index=None):
         """
         Use this method to filter a list of runs wrt. to the test collection
         specified under "data/test_collection".
         
         @param test_collection: Name of the test collection.
         @param runs: A list of run paths that is filtered.
+        @param metadata_index: Optional MetadataIndex with the metadata of the runs.
         """
         
+        metadata_index = metadata_index or MetadataIndex()
         filtered_list = []
         for run in runs:
-            _metadata = MetadataHandler.read_metadata(run)
+            _metadata = metadata_index.get(run)
             name = _metadata.get('data').get('test collection').get('name')
             if test_collection == name:
                 filtered_list.append(run)
@@ -353,6 +344,145 @@ class MetadataAnalyzer:
         return filtered_list
 
 
+class MetadataIndex:
+    """
+    The MetadataIndex parses the metadata header of every run file only once
+    and keeps it in memory together with a hash of each PRIMAD component 
+    (i.e., each top-level entry of the metadata). Runs are compared and paired 
+    by these hashes instead of reading and parsing their headers again.
+    
+    Optionally, the headers and hashes are stored in a JSON file, so runs that
+    did not change (same size and modification time) are not read again later.
+    
+    @param cache_path: Optional path to the JSON file of the on-disk cache.
+    """
+    
+    def __init__(self, cache_path=None):
+        
+        self.cache_path = cache_path
+        self._entries = {}
+        self._metadata = {}
+        self._modified = False
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r') as f_in:
+                self._entries = json.load(f_in)
+    
+    def _entry(self, run_path):
+        """
+        Helping function that returns the index entry of a run and (re-)reads
+        the header if the run is not indexed yet or if it changed.
+        """
+        key = os.path.abspath(run_path)
+        stat = os.stat(run_path)
+        entry = self._entries.get(key)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            metadata_str = MetadataHandler.read_metadata_str(run_path)
+            metadata = YAML(typ='safe').load(metadata_str) if metadata_str is not None else None
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'header': metadata_str,
+                     'hashes': {str(k): _component_hash(v) for k, v in (metadata or {}).items()}}
+            self._entries[key] = entry
+            self._metadata[key] = metadata
+            self._modified = True
+        return key, entry
+    
+    def get(self, run_path):
+        """
+        Use this method to get the metadata of a run.
+        
+        @param run_path: Path to the run file.
+        
+        @return: Dictionary containing the metadata (shared by all callers, 
+                 i.e., it should not be modified) or None if the run is not annotated.
+        """
+        key, entry = self._entry(run_path)
+        if key not in self._metadata:  # loaded from the on-disk cache
+            header = entry['header']
+            self._metadata[key] = YAML(typ='safe').load(header) if header is not None else None
+        return self._metadata[key]
+    
+    def component_hashes(self, run_path):
+        """
+        Use this method to get the hashes of the PRIMAD components of a run.
+        
+        @param run_path: Path to the run file.
+        
+        @return: Dictionary with the top-level keys of the metadata and the 
+                 hashes of their values.
+        """
+        return self._entry(run_path)[1]['hashes']
+    
+    def find_pairs(self, rep_base, rep_adv):
+        """
+        Use this method to find pairs between lists of baseline and advanced runs.
+        A pair is defined by the highest number of matching PRIMAD components,
+        ties are resolved by the order of the advanced runs.
+        
+        @param rep_base: List with baseline runs.
+        @param rep_adv: List with advanced runs.
+        
+        @return: List with dictionaries containing paths to a baseline and an 
+                 advanced run.
+        """
+        postings = defaultdict(list)
+        for idx, run_path in enumerate(rep_adv):
+            for component in self.component_hashes(run_path).items():
+                postings[component].append(idx)
+        
+        pairs = []
+        for run_path in rep_base:
+            matches = Counter()
+            for component in self.component_hashes(run_path).items():
+                matches.update(postings.get(component, []))
+            best = min(matches, key=lambda idx: (-matches[idx], idx)) if matches else None
+            pairs.append({'base': run_path, 'adv': rep_adv[best] if best is not None else None})
+        
+        self.save()
+        return pairs
+    
+    def save(self):
+        """
+        Writes the index to the on-disk cache if a cache path is given and the index changed.
+        """
+        if not self.cache_path or not self._modified:
+            return
+        cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(fd, 'w') as f_out:
+            json.dump(self._entries, f_out)
+        os.replace(tmp_path, self.cache_path)
+        self._modified = False
+
+
+def _component_hash(value):
+    """
+    Helping function that hashes the value of a PRIMAD component.
+    """
+    value_str = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.blake2b(value_str.encode(), digest_size=16).hexdigest()
+
+
+def _split_header(f_in):
+    """
+    Helping function that reads the metadata header from the beginning of an 
+    opened run file and stops after META_END.
+    
+    @return: Tuple with the metadata string (None if the run is not annotated) 
+             and an iterator over the remaining lines of the run.
+    """
+    first_line = f_in.readline()
+    if first_line.strip('\n') != META_START:
+        return None, chain([first_line], f_in)
+    metadata_str = ''.join(line.strip('#') for line in takewhile(lambda line: line.strip('\n') != META_END, f_in))
+    return metadata_str, f_in
+
+
+def _run_lines(lines):
+    """
+    Helping function that skips comments and empty lines of a run.
+    """
+    return (line for line in lines if line.strip() and line[0] != '#')
+
+
 class MetadataHandler:
     """
     Use the MetadataHandler for in- and output operations of annotated run files.
@@ -459,8 +589,7 @@ class MetadataHandler:
             f_out.write(''.join([META_END, '\n']))
             
             with open(self.run_path, 'r') as f_in:
-                for run_line in f_in.readlines():
-                    f_out.write(run_line)
+                shutil.copyfileobj(f_in, f_out)
                 
     def complete_metadata(self, repo_path='.'):
         """
@@ -497,16 +626,29 @@ class MetadataHandler:
         @return: defaultdict that can be used with pytrec_eval or repro_eval.
         '''
 
-        with TextIOWrapper(buffer=BytesIO(), encoding='utf-8', line_buffering=True) as text_io_wrapper:
-            with open(annotated_run, 'r') as f_in:
-                lines = f_in.readlines()
-                for line in lines:
-                    if line[0] != '#':
-                        text_io_wrapper.write(line)
-            text_io_wrapper.seek(0,0)        
-            run = pytrec_eval.parse_run(text_io_wrapper)
-                        
-        return run
+        import pytrec_eval
+        with open(annotated_run, 'r') as f_in:
+            _, lines = _split_header(f_in)
+            return pytrec_eval.parse_run(_run_lines(lines))
+
+    @staticmethod
+    def read_annotated_run(annotated_run):
+        '''
+        Reads the metadata and the run of an annotated run file in a single pass.
+        
+        @param annotated_run: Path to the annotated run file.
+        
+        @return: Tuple with the metadata dictionary (None if the run is not 
+                 annotated) and the run, cf. strip_metadata().
+        '''
+        
+        import pytrec_eval
+        with open(annotated_run, 'r') as f_in:
+            metadata_str, lines = _split_header(f_in)
+            run = pytrec_eval.parse_run(_run_lines(lines))
+        
+        metadata = YAML(typ='safe').load(metadata_str) if metadata_str is not None else None
+        return metadata, run
 
     @staticmethod
     def read_metadata(run_path):
@@ -519,22 +661,27 @@ class MetadataHandler:
                  run file.
         '''
         
-        _metadata = None
+        metadata_str = MetadataHandler.read_metadata_str(run_path)
+        if metadata_str is None:
+            return None
+        yaml = YAML(typ='safe')
+        return yaml.load(metadata_str)
+
+    @staticmethod
+    def read_metadata_str(run_path):
+        '''
+        Reads the metadata header out of an annotated run without parsing it.
+        
+        @param run_path: Path to the run file.
+        
+        @return: String with the YAML metadata (without the leading '#') or None
+                 if the run file is not annotated.
+        '''
         
         with open(run_path, 'r') as f_in: 
-            lines = f_in.readlines()
-            if lines[0].strip('\n') == META_START:
-                metadata_str = ''
-                yaml=YAML(typ='safe')
-
-                for line in lines[1:]:
-                    if line.strip('\n') != META_END:
-                        metadata_str += line.strip('#')
-                    else:
-                        break
-                _metadata = yaml.load(metadata_str)
-        
-        return _metadata
+            metadata_str, _ = _split_header(f_in)
+        
+        return metadata_str
     
     @staticmethod
     def read_metadata_template(metadata_path):
@@ -556,6 +703,7 @@ class MetadataHandler:
         the architectures, the operation mode and the number of available cores.
         """
         
+        import cpuinfo  # the platform packages are only imported when the metadata is completed
         cpu = cpuinfo.get_cpu_info()
         return {
             'model': cpu['brand_raw'],
@@ -604,6 +752,7 @@ class MetadataHandler:
         Reads out all installed Python packages of the active environment.
         """
         
+        import pkg_resources
         installed_packages = [d.project_name for d in pkg_resources.working_set]
         return {'libraries': {'python': installed_packages}}
 
@@ -617,6 +766,8 @@ class MetadataHandler:
                           directory of the git repository.        
         """
         
+        import git
+        import pkg_resources
         extensions_path = pkg_resources.resource_filename(__name__, 'resources/extensions.json')
 
         repo = git.Repo(repo_path)
@@ -0,0 +1,131 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+_state = None  # object that is shipped once to every worker process, cf. init_worker()
+_executors = {}  # pools of imap() calls without shared state, reused by later calls, cf. _shared_executor()
+
+
+def effective_n_jobs(n_jobs):
+    """
+    Use this function to determine the number of worker processes.
+
+    @param n_jobs: Number of worker processes. If it is None or 1, no worker processes are used.
+                   Negative values are counted back from the number of CPUs, e.g., -1 uses all CPUs.
+    @return: Number of worker processes (1 means that the work is done in the calling process).
+    """
+    if not n_jobs:
+        return 1
+    if n_jobs < 0:
+        return max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def init_worker(state):
+    """
+    Initializer of the worker processes that keeps the shared state in memory.
+
+    @param state: Object that is needed by every task, e.g., the original runs and their scores.
+    """
+    global _state
+    _state = state
+
+
+def get_state():
+    """
+    @return: The shared state of the current (worker) process.
+    """
+    return _state
+
+
+def imap(func, items, n_jobs=None, state=None, max_pending=None, ordered=True):
+    """
+    Use this function to apply func to all items in a pool of worker processes.
+
+    The shared state is sent once to every worker (cf. get_state()) instead of being pickled
+    with every task. Calls without shared state reuse the same pool of worker processes, so
+    repeated calls (e.g., KTU() at every cutoff of a sweep) do not start new processes.
+    At most max_pending tasks are submitted at the same time, so only a bounded
+    number of inputs and results are held in memory. The results are yielded in the order of the items
+    unless ordered is False, in which case they are yielded as soon as they are completed.
+
+    @param func: Module-level function that is applied to every item.
+    @param items: Iterable with the items.
+    @param n_jobs: Number of worker processes, cf. effective_n_jobs().
+    @param state: Object that is shared by all tasks.
+    @param max_pending: Maximum number of submitted tasks. Defaults to twice the number of workers.
+    @param ordered: Boolean value indicating if the results are yielded in the order of the items.
+    @return: Generator with the results.
+    """
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs == 1:
+        outer_state = get_state()  # calls can be nested, e.g., KTU() within a batch task
+        init_worker(state)
+        try:
+            for item in items:
+                yield func(item)
+        finally:
+            init_worker(outer_state)
+        return
+
+    max_pending = max_pending or 2 * n_jobs
+    if state is None:  # e.g., KTU() at every cutoff of a sweep, the pool is started only once
+        yield from _imap_executor(_shared_executor(n_jobs), func, items, max_pending, ordered)
+        return
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_worker, initargs=(state,)) as executor:
+        yield from _imap_executor(executor, func, items, max_pending, ordered)
+
+
+def _shared_executor(n_jobs):
+    """
+    Helping function that returns a pool of n_jobs worker processes without shared state.
+    The pool is created on first use and kept for the lifetime of the process.
+    """
+    pid, executor = _executors.get(n_jobs, (None, None))
+    if executor is None or pid != os.getpid():  # pools are not inherited by forked processes
+        executor = ProcessPoolExecutor(max_workers=n_jobs)
+        _executors[n_jobs] = (os.getpid(), executor)
+    return executor
+
+
+def _imap_executor(executor, func, items, max_pending, ordered):
+    """
+    Helping function of imap() that applies func to the items with the given executor.
+    Tasks that are still pending when the generator is closed are cancelled.
+    """
+    if not ordered:
+        yield from _imap_unordered(executor, func, items, max_pending)
+        return
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _imap_unordered(executor, func, items, max_pending):
+    """
+    Helping function of imap() that yields the results in the order in which they are completed.
+    Tasks that are still pending when the generator is closed are cancelled.
+    """
+    pending = set()
+    try:
+        for item in items:
+            pending.add(executor.submit(func, item))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,279 @@
+import csv
+import importlib
+import json
+import math
+from collections.abc import Mapping
+import numpy as np
+from repro_eval.scores import ScoreMatrix
+
+COLUMNS = ('run', 'side', 'repro_measure', 'measure', 'topic', 'value')
+SIDES = ('baseline', 'advanced')
+
+
+def _import_export(module):
+    """
+    Helping function that imports an optional dependency of the export functions.
+
+    @param module: Name of the module, e.g., 'pandas' or 'pyarrow.parquet'.
+    @return: The module.
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError('{} is required to export results, please install it with '
+                          'pip install repro_eval[export]'.format(module.split('.')[0])) from e
+
+
+class ResultTable(Mapping):
+    """
+    Tidy, columnar table with one row per value of a reproducibility measure. The columns are:
+
+    - run: Name of the reproduced/replicated run (or experiment).
+    - side: 'baseline' or 'advanced', None for values of run pairs like ER and DRI.
+    - repro_measure: Name of the reproducibility measure, e.g., 'ktu', 'rmse', or 'er'.
+    - measure: Name of the evaluation measure, e.g., 'P@10', None for KTU and RBO.
+    - topic: Topic of per-topic values, None for values across all topics.
+    - value: The value as a float (nan if there is no value).
+
+    The table can be used like a dictionary with the column names as keys. The values are kept in a
+    contiguous float64 buffer and the 'value' column is a view of it, so exporting the table to pandas
+    or Arrow does not copy the values. The other columns are lists of strings that are converted on
+    every export. The buffer grows geometrically, rows that are added later do not change previously
+    exported columns.
+    """
+
+    def __init__(self):
+        self._columns = {column: [] for column in COLUMNS[:-1]}
+        self._values = np.empty(16)
+        self._size = 0
+
+    def __getitem__(self, column):
+        if column == 'value':
+            return self._values[:self._size]
+        return self._columns[column]
+
+    def __iter__(self):
+        return iter(COLUMNS)
+
+    def __len__(self):
+        return len(COLUMNS)
+
+    @property
+    def num_rows(self):
+        return self._size
+
+    def _reserve(self, size):
+        if size > len(self._values):
+            values = np.empty(max(size, 2 * len(self._values)))
+            values[:self._size] = self._values[:self._size]
+            self._values = values
+
+    def rows(self):
+        """
+        @return: Generator with the rows as (run, side, repro_measure, measure, topic, value) tuples.
+        """
+        return zip(*[self[column] for column in COLUMNS[:-1]], self['value'].tolist())
+
+    def append(self, run, side, repro_measure, measure, topic, value):
+        """
+        Use this method to add a single row to the table.
+        """
+        for column, _value in zip(COLUMNS[:-1], (run, side, repro_measure, measure, topic)):
+            self._columns[column].append(_value)
+        self._reserve(self._size + 1)
+        self._values[self._size] = math.nan if value is None else value
+        self._size += 1
+
+    def extend(self, other):
+        """
+        Use this method to add all rows of another ResultTable.
+        """
+        for column in COLUMNS[:-1]:
+            self._columns[column].extend(other[column])
+        self._reserve(self._size + other.num_rows)
+        self._values[self._size:self._size + other.num_rows] = other['value']
+        self._size += other.num_rows
+
+    def add(self, repro_measure, values, run=None, side=None, per_topic=False):
+        """
+        Use this method to add the (nested) output of an Evaluator method to the table, e.g.,
+        table.add('ktu', rpd_eval.ktu(), run='rpd_b') or table.add('er', rpd_eval.er(), run='rpd').
+
+        @param repro_measure: Name of the reproducibility measure.
+        @param values: A single value, a dictionary with 'baseline' and 'advanced' values, a dictionary with
+                       measures as keys (e.g., the output of er()), a dictionary with topics as keys (if per_topic),
+                       or a ScoreMatrix with topic scores. The bootstrap intervals of er() and dri() are added as
+                       the repro_measures '<repro_measure>_lower' and '<repro_measure>_upper'.
+        @param run: Name of the run.
+        @param side: 'baseline' or 'advanced'.
+        @param per_topic: Boolean value indicating if the keys of the dictionaries are topics instead of measures.
+        @return: The table itself.
+        """
+        if isinstance(values, ScoreMatrix):
+            for topic, row in zip(values.topics, values.values.tolist()):
+                for measure, value in zip(values.measures, row):
+                    self.append(run, side, repro_measure, measure, topic, value)
+        elif isinstance(values, dict) and values and side is None and set(values) <= set(SIDES):
+            for _side, _values in values.items():
+                self.add(repro_measure, _values, run=run, side=_side, per_topic=per_topic)
+        elif isinstance(values, dict):
+            for key, value in values.items():
+                if isinstance(value, dict):  # bootstrap interval
+                    self.append(run, side, repro_measure, str(key), None, value.get('estimate'))
+                    self.append(run, side, repro_measure + '_lower', str(key), None, value.get('lower'))
+                    self.append(run, side, repro_measure + '_upper', str(key), None, value.get('upper'))
+                elif per_topic:
+                    self.append(run, side, repro_measure, None, key, value)
+                else:
+                    self.append(run, side, repro_measure, str(key), None, value)
+        elif values is not None:
+            self.append(run, side, repro_measure, None, None, values)
+        return self
+
+    def to_dict(self):
+        """
+        @return: Dictionary with the column names as keys and lists with the column values.
+        """
+        return {column: list(self[column]) if column != 'value' else self['value'].tolist() for column in COLUMNS}
+
+    def to_pandas(self):
+        """
+        Use this method to convert the table into a pandas.DataFrame. The 'value' column shares
+        its memory with the table, the other columns are copied.
+
+        @return: pandas.DataFrame with the columns of the table.
+        """
+        pd = _import_export('pandas')
+        return pd.DataFrame({column: self[column] for column in COLUMNS}, copy=False)
+
+    def to_arrow(self):
+        """
+        Use this method to convert the table into a pyarrow.Table. The 'value' column is
+        created without copying the values, the other columns are copied.
+
+        @return: pyarrow.Table with the columns of the table.
+        """
+        pa = _import_export('pyarrow')
+        arrays = [pa.array(self[column], type=pa.string()) for column in COLUMNS[:-1]]
+        arrays.append(pa.array(self['value'], type=pa.float64()))
+        return pa.Table.from_arrays(arrays, names=list(COLUMNS))
+
+    def write(self, path, format=None):
+        """
+        Use this method to write the table to a JSON lines, CSV, or Parquet file.
+
+        @param path: Path to the output file.
+        @param format: 'jsonl', 'csv', or 'parquet'. If not specified, the format is derived from the file extension.
+        """
+        with open_writer(path, format=format) as writer:
+            writer.write(self)
+
+
+def json_safe(value):
+    """
+    Use this function to replace nan and infinite values of (nested) results with None, so they can be written as JSON.
+
+    @param value: A value or a (nested) dictionary with values.
+    @return: The value or a copy of the dictionary without non-finite values.
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(_value) for key, _value in value.items()}
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class _Writer(object):
+    """
+    Base class of the streaming writers that can be used as context managers.
+    """
+
+    def write(self, table):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JsonlWriter(_Writer):
+    """
+    Streaming writer that writes the rows of ResultTables as JSON lines, one object per row.
+    Non-finite values are written as null.
+
+    @param f_out: File object opened in text mode.
+    """
+
+    def __init__(self, f_out):
+        self.f_out = f_out
+
+    def write(self, table):
+        for row in table.rows():
+            self.f_out.write(json.dumps(dict(zip(COLUMNS, map(json_safe, row)))) + '\n')
+        self.f_out.flush()
+
+    def close(self):
+        self.f_out.close()
+
+
+class CsvWriter(JsonlWriter):
+    """
+    Streaming writer that writes the rows of ResultTables as CSV with a header line.
+    Missing values are written as empty fields.
+
+    @param f_out: File object opened in text mode with newline=''.
+    """
+
+    def __init__(self, f_out):
+        super(CsvWriter, self).__init__(f_out)
+        self._writer = csv.writer(f_out)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, table):
+        self._writer.writerows([json_safe(value) for value in row] for row in table.rows())
+        self.f_out.flush()
+
+
+class ParquetWriter(_Writer):
+    """
+    Streaming writer that writes every ResultTable as a row group of a Parquet file (requires pyarrow).
+
+    @param path: Path to the Parquet file.
+    """
+
+    def __init__(self, path):
+        pa = _import_export('pyarrow')
+        pq = _import_export('pyarrow.parquet')
+        schema = pa.schema([(column, pa.string()) for column in COLUMNS[:-1]] + [('value', pa.float64())])
+        self._writer = pq.ParquetWriter(path, schema)
+
+    def write(self, table):
+        if table.num_rows:
+            self._writer.write_table(table.to_arrow())
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(path, format=None):
+    """
+    Use this function to open a streaming writer for ResultTables.
+
+    @param path: Path to the output file.
+    @param format: 'jsonl', 'csv', or 'parquet'. If not specified, the format is derived from the file extension.
+    @return: JsonlWriter, CsvWriter, or ParquetWriter.
+    """
+    if format is None:
+        format = path.rsplit('.', 1)[-1].lower()
+    if format in ['jsonl', 'json']:
+        return JsonlWriter(open(path, 'w'))
+    if format == 'csv':
+        return CsvWriter(open(path, 'w', newline=''))
+    if format == 'parquet':
+        return ParquetWriter(path)
+    raise ValueError('Unknown format {}, please use jsonl, csv, or parquet.'.format(format))
@@ -0,0 +1,314 @@
+from collections.abc import Mapping
+from itertools import repeat
+import numpy as np
+
+
+class Run(Mapping):
+    """
+    Compact columnar representation of a run in TREC-format.
+
+    Topic and document identifiers are interned into sorted vocabularies, so the
+    rankings are stored as flat integer arrays alongside a float array with the scores.
+    The documents retrieved for the i-th topic are found between offsets[i] and offsets[i+1].
+    Since the document vocabulary is sorted, comparing document indices is equivalent to
+    comparing the document identifiers.
+
+    For backwards compatibility, a Run can be used like the nested dictionary
+    returned by pytrec_eval, i.e., run[topic] returns a dictionary with the
+    document identifiers as keys and the scores as values (in ranking order).
+
+    @param topics: Sorted array with the topic identifiers.
+    @param docnos: Sorted array with the document identifiers (the vocabulary of the run).
+    @param docs: Array with the vocabulary index of every retrieved document.
+    @param scores: Array with the score of every retrieved document.
+    @param offsets: Array with len(topics) + 1 entries delimiting the rankings of the topics.
+    """
+
+    def __init__(self, topics, docnos, docs, scores, offsets):
+        self.topics = topics
+        self.docnos = docnos
+        self.docs = docs
+        self.scores = scores
+        self.offsets = offsets
+        self._topic_index = None
+        self._ordered = False
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Use this method to build a run from an iterable of (query_id, doc_id, score) records,
+        e.g., the ScoredDoc tuples yielded by ir_measures.read_trec_run().
+        The order of the documents within a topic is preserved. If a document is retrieved
+        more than once for a topic, it keeps its first position and its last score
+        (like the nested dictionaries of pytrec_eval).
+
+        @param records: Iterable with (query_id, doc_id, score) records.
+        @return: Run object.
+        """
+        topic_ids = {}
+        doc_ids = {}
+        topic_col = []
+        doc_col = []
+        score_col = []
+        for query_id, doc_id, score in records:
+            topic_col.append(topic_ids.setdefault(query_id, len(topic_ids)))
+            doc_col.append(doc_ids.setdefault(doc_id, len(doc_ids)))
+            score_col.append(score)
+        return cls._from_columns(topic_ids, doc_ids,
+                                 np.array(topic_col, dtype=np.int64),
+                                 np.array(doc_col, dtype=np.int64),
+                                 np.array(score_col, dtype=np.float64))
+
+    @classmethod
+    def from_dict(cls, run):
+        """
+        Use this method to convert a nested dictionary {topic: {doc_id: score}},
+        e.g., a run parsed with pytrec_eval, into the columnar representation.
+
+        @param run: Nested dictionary with the run.
+        @return: Run object.
+        """
+        topic_ids = {}
+        doc_ids = {}
+        topic_col = []
+        doc_col = []
+        score_col = []
+        for topic, ranking in run.items():
+            topic_id = topic_ids.setdefault(topic, len(topic_ids))
+            topic_col.extend([topic_id] * len(ranking))
+            doc_col.extend([doc_ids.setdefault(doc_id, len(doc_ids)) for doc_id in ranking.keys()])
+            score_col.extend(ranking.values())
+        return cls._from_columns(topic_ids, doc_ids,
+                                 np.array(topic_col, dtype=np.int64),
+                                 np.array(doc_col, dtype=np.int64),
+                                 np.array(score_col, dtype=np.float64))
+
+    @classmethod
+    def _from_columns(cls, topic_ids, doc_ids, topic_col, doc_col, score_col):
+        """
+        Helping function that sorts the interned vocabularies and groups the records by topic.
+
+        @param topic_ids: Dictionary mapping topic identifiers to their order of appearance.
+        @param doc_ids: Dictionary mapping document identifiers to their order of appearance.
+        @param topic_col: Topic index of every record.
+        @param doc_col: Document index of every record.
+        @param score_col: Score of every record.
+        @return: Run object.
+        """
+        topics = np.array(list(topic_ids.keys()), dtype=str)
+        docnos = np.array(list(doc_ids.keys()), dtype=str)
+        topic_order = np.argsort(topics, kind='stable')
+        doc_order = np.argsort(docnos, kind='stable')
+        topic_rank = np.empty_like(topic_order)
+        topic_rank[topic_order] = np.arange(len(topic_order))
+        doc_rank = np.empty_like(doc_order)
+        doc_rank[doc_order] = np.arange(len(doc_order))
+        topic_col = topic_rank[topic_col]
+        doc_col = doc_rank[doc_col]
+
+        # dictionary semantics for duplicates: first position, last score
+        keys = topic_col * max(len(docnos), 1) + doc_col
+        _, first = np.unique(keys, return_index=True)
+        if len(first) < len(keys):
+            _, last = np.unique(keys[::-1], return_index=True)
+            score_col = score_col.copy()
+            score_col[first] = score_col[len(keys) - 1 - last]
+            first.sort()
+            topic_col, doc_col, score_col = topic_col[first], doc_col[first], score_col[first]
+
+        order = np.argsort(topic_col, kind='stable')
+        counts = np.bincount(topic_col, minlength=len(topics))
+        offsets = np.zeros(len(topics) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(topics[topic_order], docnos[doc_order],
+                   doc_col[order], score_col[order], offsets)
+
+    def _index(self, topic):
+        if self._topic_index is None:
+            self._topic_index = {t: i for i, t in enumerate(self.topics.tolist())}
+        return self._topic_index[topic]
+
+    def __getitem__(self, topic):
+        i = self._index(topic)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return dict(zip(self.docnos[self.docs[start:end]].tolist(), self.scores[start:end].tolist()))
+
+    def __iter__(self):
+        return iter(self.topics.tolist())
+
+    def __len__(self):
+        return len(self.topics)
+
+    def __contains__(self, topic):
+        try:
+            self._index(topic)
+        except KeyError:
+            return False
+        return True
+
+    def __repr__(self):
+        return '{}(topics={}, documents={})'.format(type(self).__name__, len(self.topics), len(self.docs))
+
+    @property
+    def sizes(self):
+        """
+        @return: Array with the number of retrieved documents for every topic.
+        """
+        return np.diff(self.offsets)
+
+    def ranking(self, topic):
+        """
+        Use this method to get the vocabulary indices of the documents retrieved for a topic.
+
+        @param topic: The topic identifier.
+        @return: Array with document indices in ranking order.
+        """
+        i = self._index(topic)
+        return self.docs[self.offsets[i]:self.offsets[i + 1]]
+
+    def doc_ids(self, topic):
+        """
+        Use this method to get the identifiers of the documents retrieved for a topic.
+
+        @param topic: The topic identifier.
+        @return: List with document identifiers in ranking order.
+        """
+        return self.docnos[self.ranking(topic)].tolist()
+
+    def rankings(self, topics=None, depth=None):
+        """
+        Use this method to get the (top-k) rankings of several topics as one flat array.
+
+        @param topics: List with topic identifiers. If not specified, all topics of the run are used.
+        @param depth: Number of top-ranked documents per topic. If not specified, the full rankings are used.
+        @return: Tuple with the document indices and the offsets delimiting the rankings of the topics.
+        """
+        if topics is None:
+            index = None
+        else:
+            index = np.array([self._index(topic) for topic in topics], dtype=np.int64)
+        flat, offsets = self._prefix(index, depth)
+        return self.docs[flat], offsets
+
+    def head(self, depth):
+        """
+        Use this method to get the top-k documents of every ranking as a new run.
+        In contrast to trim(), the run itself is not modified and the vocabularies are shared,
+        so the rankings do not have to be sorted again to evaluate several cutoffs.
+
+        @param depth: Number of top-ranked documents per topic.
+        @return: Run object with the truncated rankings.
+        """
+        flat, offsets = self._prefix(None, depth)
+        run = Run(self.topics, self.docnos, self.docs[flat], self.scores[flat], offsets)
+        run._topic_index = self._topic_index
+        run._ordered = self._ordered
+        return run
+
+    def _prefix(self, index, depth):
+        """
+        Helping function that returns the positions of the (top-k) documents of the topics in the flat arrays.
+
+        @param index: Array with topic indices or None for all topics.
+        @param depth: Number of top-ranked documents per topic or None for the full rankings.
+        @return: Tuple with the positions and the offsets delimiting the rankings of the topics.
+        """
+        if index is None:
+            starts, sizes = self.offsets[:-1], self.sizes
+        else:
+            starts, sizes = self.offsets[index], self.sizes[index]
+        if depth is not None:
+            sizes = np.minimum(sizes, depth)
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        flat = np.arange(offsets[-1]) + np.repeat(starts - offsets[:-1], sizes)
+        return flat, offsets
+
+    def records(self):
+        """
+        Use this method to iterate over the run as (query_id, doc_id, score) records in the order of
+        the rankings, e.g., to evaluate the run without converting it into nested dictionaries.
+        The records are generated topic by topic from the columns of the run.
+
+        @return: Generator with (query_id, doc_id, score) tuples.
+        """
+        for topic, start, end in zip(self.topics.tolist(), self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            yield from zip(repeat(topic), self.docnos[self.docs[start:end]].tolist(), self.scores[start:end].tolist())
+
+    def to_dict(self):
+        """
+        Use this method to convert the run into a nested dictionary that can be used with pytrec_eval.
+
+        @return: Nested dictionary {topic: {doc_id: score}}.
+        """
+        return {topic: self[topic] for topic in self}
+
+    def _topic_rows(self):
+        """
+        Helping function that returns the topic index of every stored document.
+        """
+        return np.repeat(np.arange(len(self.topics)), self.sizes)
+
+    def _positions(self):
+        """
+        Helping function that returns the (zero-based) rank of every stored document within its topic.
+        """
+        return np.arange(len(self.docs)) - np.repeat(self.offsets[:-1], self.sizes)
+
+    def break_ties(self):
+        """
+        Use this method to order the rankings like it is implemented in trec_eval.
+        The documents of all topics are sorted at once by descending score and
+        documents with the same score are sorted in reverse alphabetical order.
+        The run is reordered in place. Runs that are already ordered are not sorted again.
+
+        @return: The reordered run.
+        """
+        if not self._ordered:
+            order = np.lexsort((-self.docs, -self.scores, self._topic_rows()))
+            self.docs = self.docs[order]
+            self.scores = self.scores[order]
+            self._ordered = True
+        return self
+
+    def copy(self):
+        """
+        Use this method to get a shallow copy of the run. The arrays are shared, but since break_ties()
+        and trim() replace the arrays instead of writing into them, reordering or trimming the copy
+        does not modify this run.
+
+        @return: Run object.
+        """
+        run = Run(self.topics, self.docnos, self.docs, self.scores, self.offsets)
+        run._topic_index = self._topic_index
+        run._ordered = self._ordered
+        return run
+
+    def trim(self, thresh):
+        """
+        Use this method to trim every ranking of the run to the top-k documents specified by thresh.
+        The run is trimmed in place.
+
+        @param thresh: The threshold value of the run length.
+        @return: The trimmed run.
+        """
+        sizes = self.sizes
+        if sizes.size and sizes.max() > thresh:
+            keep = self._positions() < thresh
+            self.docs = self.docs[keep]
+            self.scores = self.scores[keep]
+            self.offsets = np.zeros_like(self.offsets)
+            np.cumsum(np.minimum(sizes, thresh), out=self.offsets[1:])
+        return self
+
+
+def as_run(run):
+    """
+    Use this function to get a columnar Run object from either a Run or a nested dictionary.
+
+    @param run: Run object or nested dictionary (cf. pytrec_eval).
+    @return: Run object.
+    """
+    if isinstance(run, Run):
+        return run
+    return Run.from_dict(run)
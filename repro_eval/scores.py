@@ -0,0 +1,170 @@
+from collections.abc import Mapping
+import numpy as np
+
+
+class ScoreMatrix(Mapping):
+    """
+    Topic x measure matrix with the scores of an evaluated run.
+
+    The scores are stored in a 2-D NumPy array whose rows correspond to the topics and whose
+    columns correspond to the measures, so reproducibility measures can be computed for
+    all measures at once along the topic axis. For backwards compatibility, a ScoreMatrix
+    can be used like the nested dictionary returned by pytrec_eval, i.e., scores[topic]
+    returns a dictionary with the measure names as keys and the topic scores as values.
+
+    @param values: 2-D array with the scores (topics x measures).
+    @param topics: List with the topic identifiers (row index).
+    @param measures: List with the measure names (column index).
+    """
+
+    def __init__(self, values, topics, measures):
+        self.values = values
+        self.topics = list(topics)
+        self.measures = list(measures)
+        self._topic_index = None
+        self._measure_index = None
+
+    @classmethod
+    def from_dict(cls, scores):
+        """
+        Use this method to convert nested dictionaries {topic: {measure: score}}, e.g.,
+        the output of pytrec_eval, into a score matrix. The measures of the first topic are used as columns.
+
+        @param scores: Nested dictionary with the topic scores.
+        @return: ScoreMatrix object.
+        """
+        topics = list(scores.keys())
+        measures = list(scores[topics[0]].keys()) if topics else []
+        values = np.array([[scores[topic].get(measure, np.nan) for measure in measures] for topic in topics],
+                          dtype=np.float64).reshape(len(topics), len(measures))
+        return cls(values, topics, measures)
+
+    def topic_index(self, topic):
+        if self._topic_index is None:
+            self._topic_index = {t: i for i, t in enumerate(self.topics)}
+        return self._topic_index[topic]
+
+    def measure_index(self, measure):
+        if self._measure_index is None:
+            self._measure_index = {m: i for i, m in enumerate(self.measures)}
+        return self._measure_index[measure]
+
+    def __getitem__(self, topic):
+        return dict(zip(self.measures, self.values[self.topic_index(topic)].tolist()))
+
+    def __iter__(self):
+        return iter(self.topics)
+
+    def __len__(self):
+        return len(self.topics)
+
+    def __contains__(self, topic):
+        try:
+            self.topic_index(topic)
+        except KeyError:
+            return False
+        return True
+
+    def __eq__(self, other):
+        if not isinstance(other, ScoreMatrix):
+            return super(ScoreMatrix, self).__eq__(other)
+        return (self.topics == other.topics and self.measures == other.measures
+                and np.array_equal(self.values, other.values, equal_nan=True))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}(topics={}, measures={})'.format(type(self).__name__, len(self.topics), len(self.measures))
+
+    def column(self, measure):
+        """
+        Use this method to get the topic scores of a single measure.
+
+        @param measure: Name of the measure.
+        @return: Array with the topic scores.
+        """
+        return self.values[:, self.measure_index(measure)]
+
+    def reindex(self, topics=None, measures=None, fill_value=np.nan):
+        """
+        Use this method to get the scores for a given order of topics and measures.
+
+        @param topics: List with topic identifiers. If not specified, the topics of the matrix are used.
+        @param measures: List with measure names. If not specified, the measures of the matrix are used.
+        @param fill_value: Value of topics and measures that are not contained in the matrix.
+        @return: 2-D array with the scores (topics x measures).
+        """
+        values = self.values
+        if measures is not None and measures != self.measures:
+            cols = [self._get_index(self.measure_index, m) for m in measures]
+            values = self._take(values, cols, axis=1, fill_value=fill_value)
+        if topics is not None and list(topics) != self.topics:
+            rows = [self._get_index(self.topic_index, t) for t in topics]
+            values = self._take(values, rows, axis=0, fill_value=fill_value)
+        return values
+
+    @staticmethod
+    def _get_index(lookup, key):
+        try:
+            return lookup(key)
+        except KeyError:
+            return -1
+
+    @staticmethod
+    def _take(values, index, axis, fill_value):
+        index = np.array(index, dtype=np.int64)
+        taken = np.take(values, np.maximum(index, 0), axis=axis)
+        if (index < 0).any():
+            taken = taken.copy()
+            mask = index < 0
+            if axis == 0:
+                taken[mask, :] = fill_value
+            else:
+                taken[:, mask] = fill_value
+        return taken
+
+    def mean(self):
+        """
+        Use this method to get the mean scores across the topics for every measure.
+
+        @return: Array with the mean scores.
+        """
+        return self.values.mean(axis=0)
+
+    def to_dict(self):
+        """
+        Use this method to convert the score matrix into nested dictionaries.
+
+        @return: Nested dictionary {topic: {measure: score}}.
+        """
+        return {topic: dict(zip(self.measures, row)) for topic, row in zip(self.topics, self.values.tolist())}
+
+
+def as_score_matrix(scores):
+    """
+    Use this function to get a ScoreMatrix from either a ScoreMatrix or nested dictionaries.
+
+    @param scores: ScoreMatrix object or nested dictionary (cf. pytrec_eval).
+    @return: ScoreMatrix object.
+    """
+    if isinstance(scores, ScoreMatrix):
+        return scores
+    return ScoreMatrix.from_dict(scores)
+
+
+def paired_scores(orig_score, rep_score, measures):
+    """
+    Use this function to align reproduced/replicated scores to the topics of the original scores for
+    paired comparisons like the RMSE, the paired t-test, and the permutation test. Topics that are missing
+    in the reproduced/replicated scores are scored with 0 (like trec_eval -c), while topics that are
+    not part of the original scores are ignored.
+
+    @param orig_score: The original scores (ScoreMatrix).
+    @param rep_score: The reproduced/replicated scores (ScoreMatrix).
+    @param measures: List with the measures.
+    @return: 2-D array with the reproduced/replicated scores (original topics x measures).
+    """
+    values = rep_score.reindex(measures=measures)
+    if rep_score.topics != orig_score.topics:
+        values = ScoreMatrix(values, rep_score.topics, measures).reindex(orig_score.topics, fill_value=0.)
+    return values
@@ -0,0 +1,244 @@
+"""
+Long-running evaluation server that keeps the qrels and the evaluated original runs in memory and
+answers reproducibility queries for reproduced runs, e.g., started with
+
+python -m repro_eval serve -q qrels_orig -r orig_b orig_a --port 8765 --workers 4
+
+The server speaks HTTP (on localhost or a UNIX socket) and accepts the following requests:
+
+GET  /health    -> {"status": "ok", "measures": [...]}
+POST /evaluate  {"run_b": path, "run_a": path (optional), "p": 0.95 (optional), "depth": 1000 (optional)}
+                -> reproducibility measures of the run (pair), cf. BatchRpdEvaluator.iter_batch()
+POST /batch     {"runs": [path or [baseline path, advanced path], ...]}
+                -> one JSON line per run as soon as it is completed
+"""
+
+import json
+import os
+import socketserver
+import stat
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from repro_eval import parallel, RBO_P, RBO_DEPTH
+from repro_eval.Evaluator import BatchRpdEvaluator, _evaluate_batch_item
+from repro_eval.result import json_safe
+
+
+class EvaluationService(object):
+    """
+    Holds the BatchRpdEvaluator with the evaluated original runs and evaluates reproduced runs on request.
+    Requests are evaluated in a pool of worker processes that receive the evaluator once, or in the
+    calling thread if no workers are used (one request at a time, since the evaluator is not thread-safe).
+
+    @param workers: Number of worker processes, cf. repro_eval.parallel.effective_n_jobs().
+    @param kwargs: Keyword arguments of the BatchRpdEvaluator, e.g., qrels_orig_path and run_b_orig_path.
+    """
+
+    def __init__(self, workers=None, **kwargs):
+        self.evaluator = BatchRpdEvaluator(**kwargs)
+        self.evaluator.trim()
+        self.evaluator.evaluate()
+        self.workers = parallel.effective_n_jobs(workers)
+        self._lock = threading.Lock()
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=parallel.init_worker,
+                                                 initargs=(self.evaluator,))
+
+    def evaluate(self, item, p=RBO_P, depth=RBO_DEPTH):
+        """
+        @param item: Path to a reproduced baseline run or (baseline path, advanced path) tuple.
+        @return: Dictionary with the reproducibility measures, cf. BatchRpdEvaluator.iter_batch().
+        """
+        if self._executor:
+            return self._executor.submit(_evaluate_batch_item, (item, p, depth)).result()
+        with self._lock:
+            return self.evaluator._evaluate_batch_item(item, p, depth)
+
+    def evaluate_many(self, items, p=RBO_P, depth=RBO_DEPTH):
+        """
+        @param items: List with paths to reproduced baseline runs or (baseline path, advanced path) tuples.
+        @return: Generator with the reproducibility measures of the runs in the order of their completion.
+                 At most twice as many runs as there are workers are evaluated at the same time.
+        """
+        if self._executor:
+            tasks = ((item, p, depth) for item in items)
+            yield from parallel._imap_unordered(self._executor, _evaluate_batch_item, tasks, 2 * self.workers)
+            return
+        for item in items:
+            yield self.evaluate(item, p=p, depth=depth)
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+
+
+def _run_item(item):
+    """
+    Helping function that validates a run (pair) of a request.
+    """
+    if isinstance(item, str):
+        paths = [item]
+    elif isinstance(item, (list, tuple)) and len(item) == 2:
+        paths = list(item)
+    else:
+        raise ValueError('Runs have to be given as a path or a pair of paths.')
+    for path in paths:
+        if not isinstance(path, str) or not os.path.isfile(path):
+            raise ValueError('The run {} does not exist.'.format(path))
+    return item if isinstance(item, str) else tuple(item)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handler of the HTTP requests, cf. the documentation of this module.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super(RequestHandler, self).log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(json_safe(payload)).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            raise ValueError('Invalid Content-Length header.')
+        try:
+            payload = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        except UnicodeDecodeError:
+            raise ValueError('The request has to be encoded in UTF-8.')
+        if not isinstance(payload, dict):
+            raise ValueError('The request has to be a JSON object.')
+        return payload
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send_json(404, {'error': 'Unknown path {}.'.format(self.path)})
+        self._send_json(200, {'status': 'ok', 'measures': [str(m) for m in self.server.service.evaluator.measures]})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+            kwargs = {'p': float(payload.get('p', RBO_P)), 'depth': int(payload.get('depth', RBO_DEPTH))}
+            if not 0 < kwargs['p'] < 1:
+                raise ValueError('The parameter p of the RBO has to be between 0 and 1.')
+            if kwargs['depth'] < 1:
+                raise ValueError('The depth of the RBO has to be at least 1.')
+            if self.path == '/evaluate':
+                if 'run_b' not in payload:
+                    raise ValueError('Please provide the path to the reproduced baseline run as run_b.')
+                item = _run_item([payload['run_b'], payload['run_a']] if payload.get('run_a') else payload['run_b'])
+            elif self.path == '/batch':
+                items = [_run_item(item) for item in payload.get('runs', [])]
+            else:
+                return self._send_json(404, {'error': 'Unknown path {}.'.format(self.path)})
+        except (TypeError, ValueError) as e:  # json.JSONDecodeError is a ValueError
+            return self._send_json(400, {'error': str(e)})
+
+        if self.path == '/evaluate':
+            try:
+                result = self.server.service.evaluate(item, **kwargs)
+            except Exception as e:
+                return self._send_json(500, {'error': str(e)})
+            return self._send_json(200, result)
+
+        # the results of a batch are streamed as JSON lines in chunked transfer encoding
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for result in self.server.service.evaluate_many(items, **kwargs):
+                self._write_chunk((json.dumps(json_safe(result)) + '\n').encode())
+        except Exception as e:
+            self._write_chunk((json.dumps({'error': str(e)}) + '\n').encode())
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data):
+        self.wfile.write('{:x}\r\n'.format(len(data)).encode() + data + b'\r\n')
+        self.wfile.flush()
+
+
+class EvaluationServer(ThreadingHTTPServer):
+    """
+    HTTP server on a TCP port that handles every client in a separate thread.
+
+    @param address: Tuple with host and port, e.g., ('127.0.0.1', 8765).
+    @param service: The EvaluationService.
+    @param verbose: Boolean value indicating if the requests are logged.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        self.service = service
+        self.verbose = verbose
+        super(EvaluationServer, self).__init__(address, RequestHandler)
+
+
+class UnixEvaluationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    HTTP server on a UNIX socket that handles every client in a separate thread.
+
+    @param path: Path to the UNIX socket. An existing socket file is replaced, other files are not.
+    @param service: The EvaluationService.
+    @param verbose: Boolean value indicating if the requests are logged.
+    """
+    daemon_threads = True
+
+    def __init__(self, path, service, verbose=False):
+        self.service = service
+        self.verbose = verbose
+        _remove_socket(path)
+        super(UnixEvaluationServer, self).__init__(path, RequestHandler)
+
+    def server_close(self):
+        super(UnixEvaluationServer, self).server_close()
+        _remove_socket(self.server_address)
+
+
+def _remove_socket(path):
+    """
+    Helping function that removes a UNIX socket file and refuses to remove any other kind of file.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError('{} exists and is not a socket.'.format(path))
+    os.remove(path)
+
+
+def serve(service, host='127.0.0.1', port=8765, socket_path=None, verbose=False):
+    """
+    Use this function to answer requests until the process is interrupted.
+
+    @param service: The EvaluationService.
+    @param host: Host name of the HTTP server.
+    @param port: Port of the HTTP server.
+    @param socket_path: If provided, the server listens on this UNIX socket instead of the port.
+    @param verbose: Boolean value indicating if the requests are logged.
+    """
+    server = UnixEvaluationServer(socket_path, service, verbose=verbose) if socket_path \
+        else EvaluationServer((host, port), service, verbose=verbose)
+    print('Serving on {}'.format(socket_path or 'http://{}:{}'.format(*server.server_address[:2])), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,79 @@
+import json
+import subprocess
+import sys
+import pytest
+from repro_eval.Evaluator import RpdEvaluator, BatchRpdEvaluator
+
+
+rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                        run_b_orig_path='./example/orig_b.txt',
+                        run_a_orig_path='./example/orig_a.txt',
+                        run_b_rep_path='./example/rpd_b.txt',
+                        run_a_rep_path='./example/rpd_a.txt')
+rpd_eval.trim()
+rpd_eval.evaluate()
+
+batch_eval = BatchRpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                               run_b_orig_path='./example/orig_b.txt',
+                               run_a_orig_path='./example/orig_a.txt')
+runs = [('./example/rpd_b.txt', './example/rpd_a.txt'), './example/orig_b.txt']
+
+
+def _values(table, run, repro_measure):
+    return {(side, measure): value for _run, side, _repro_measure, measure, _, value in table.rows()
+            if _run == run and _repro_measure == repro_measure}
+
+
+@pytest.mark.parametrize('n_jobs', [None, 2])
+def test_batch(n_jobs):
+    table = batch_eval.evaluate_batch(runs, n_jobs=n_jobs)
+    assert list(table.keys()) == ['run', 'side', 'repro_measure', 'measure', 'topic', 'value']
+    assert set(table['run']) == {'rpd_b.txt', 'orig_b.txt'}
+
+    ktu = _values(table, 'rpd_b.txt', 'ktu')
+    assert ktu == {('baseline', None): rpd_eval.ktu().get('baseline'),
+                   ('advanced', None): rpd_eval.ktu().get('advanced')}
+    rbo = _values(table, 'rpd_b.txt', 'rbo')
+    assert rbo[('advanced', None)] == rpd_eval.rbo().get('advanced')
+    er = _values(table, 'rpd_b.txt', 'er')
+    assert {measure: value for (_, measure), value in er.items()} == pytest.approx(rpd_eval.er(), nan_ok=True)
+    pval = _values(table, 'rpd_b.txt', 'pval')
+    assert pval[('baseline', 'P@10')] == pytest.approx(rpd_eval.ttest().get('baseline').get('P@10'))
+
+    assert _values(table, 'orig_b.txt', 'ktu') == {('baseline', None): 1.0}
+    assert not _values(table, 'orig_b.txt', 'er')
+
+
+def test_iter_batch_unordered():
+    results = list(batch_eval.iter_batch(runs, n_jobs=2, ordered=False))
+    assert sorted(result['run'] for result in results) == ['orig_b.txt', 'rpd_b.txt']
+    result = next(result for result in results if result['run'] == 'rpd_b.txt')
+    assert result['ktu'] == rpd_eval.ktu()
+    assert 'er' not in next(result for result in results if result['run'] == 'orig_b.txt')
+
+
+def test_iter_batch_size():
+    items = runs + [('./example/orig_b.txt', './example/orig_a.txt')]
+    expected = [batch_eval._evaluate_batch_item(item, 0.95, 1000) for item in items]
+    for batch_size in [1, 2, len(items)]:
+        results = list(batch_eval.iter_batch(items, batch_size=batch_size))
+        assert [list(result.keys()) for result in results] == [list(result.keys()) for result in expected]
+        assert results[0]['rmse'] == rpd_eval.rmse()
+        for side in ['baseline', 'advanced']:
+            assert results[0]['pval'][side] == pytest.approx(rpd_eval.ttest()[side], nan_ok=True)
+        assert results[0]['dri'] == pytest.approx(rpd_eval.dri(), nan_ok=True)
+        assert {value for value in results[2]['er'].values() if value == value} == {1.0}
+        for result, single in zip(results, expected):
+            for side, values in single['nrmse'].items():
+                assert result['nrmse'][side] == pytest.approx(values, nan_ok=True)
+
+
+def test_batch_cli(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    subprocess.run([sys.executable, '-m', 'repro_eval', 'batch', '-q', './example/qrels/core17.txt',
+                    '-r', './example/orig_b.txt', '-p', './example/rpd_b.txt', './example/orig_*.txt',
+                    '-e', 'P_10', '--ordered', '-o', str(output)], check=True)
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line['run'] for line in lines] == ['rpd_b.txt', 'orig_a.txt', 'orig_b.txt']
+    assert lines[0]['ktu']['baseline'] == rpd_eval.ktu().get('baseline')
+    assert lines[2]['rmse']['baseline'] == {'P@10': 0.0}
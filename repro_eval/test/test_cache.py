@@ -0,0 +1,97 @@
+import os
+import pytest
+from repro_eval.util import load_run, load_qrels
+from repro_eval import cache
+from repro_eval.cache import ScoreCache
+from repro_eval.Evaluator import RpdEvaluator
+
+
+def test_run_cache(tmp_path):
+    run = load_run('./example/rpd_b.txt')
+    _run = load_run('./example/rpd_b.txt', cache_dir=str(tmp_path))
+    assert any(entry.endswith('.run') for entry in os.listdir(str(tmp_path)))
+    cached_run = load_run('./example/rpd_b.txt', cache_dir=str(tmp_path))
+    assert cached_run.to_dict() == run.to_dict() == _run.to_dict()
+
+
+def test_qrels_cache(tmp_path):
+    qrels = load_qrels('./example/qrels/core17.txt')
+    load_qrels('./example/qrels/core17.txt', cache_dir=str(tmp_path))
+    cached_qrels = load_qrels('./example/qrels/core17.txt', cache_dir=str(tmp_path))
+    assert cached_qrels == qrels
+
+
+def test_score_cache():
+    cache = ScoreCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_evaluator_score_cache():
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_a_orig_path='./example/orig_a.txt')
+    rpd_eval.trim()
+    rpd_eval.evaluate()
+    assert len(rpd_eval.score_cache) == 2
+    er = rpd_eval.er(run_b_path='./example/rpd_b.txt', run_a_path='./example/rpd_a.txt')
+    assert len(rpd_eval.score_cache) == 4  # one entry per run file
+    scores = rpd_eval.evaluate(run_path='./example/rpd_b.txt')
+    assert scores is rpd_eval.evaluate(run_path='./example/rpd_b.txt')
+    assert rpd_eval.er(run_b_path='./example/rpd_b.txt', run_a_path='./example/rpd_a.txt') == pytest.approx(er, nan_ok=True)
+    assert len(rpd_eval.score_cache) == 4
+    assert rpd_eval.evaluate(run=rpd_eval.run_b_orig) is rpd_eval.run_b_orig_score
+
+
+def test_evaluator_hashes_unchanged_runs_once(tmp_path, monkeypatch):
+    digests = []
+    file_digest = cache._file_digest
+    monkeypatch.setattr(cache, '_file_digest', lambda path: digests.append(path) or file_digest(path))
+    monkeypatch.setattr(cache, '_content_hashes', {})
+    run_path = str(tmp_path / 'rpd_b.txt')
+    with open('./example/rpd_b.txt') as f_in, open(run_path, 'w') as f_out:
+        f_out.write(f_in.read())
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt')
+    rpd_eval.trim()
+    rpd_eval.evaluate()
+    rmse = rpd_eval.rmse(run_b_path=run_path)
+    assert rpd_eval.rmse(run_b_path=run_path) == rmse
+    assert rpd_eval.nrmse(run_b_path=run_path)
+    assert digests == [run_path]
+    with open(run_path, 'a') as f_out:
+        f_out.write('\n')
+    rpd_eval.rmse(run_b_path=run_path)
+    assert digests == [run_path, run_path]
+
+
+def test_evaluator_no_score_cache():
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            score_cache_size=0)
+    rpd_eval.evaluate()
+    assert len(rpd_eval.score_cache) == 0
+
+
+def test_lazy_loading(tmp_path):
+    missing = str(tmp_path / 'missing.txt')
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_b_rep_path=missing,
+                            measures=['P_10'])
+    # nothing is read before the runs are accessed
+    assert '_run_b_orig' not in rpd_eval.__dict__
+    assert rpd_eval.run_a_orig is None
+    run_b_rep = load_run('./example/rpd_b.txt')
+    ktu = rpd_eval.ktu(run_b_rep=run_b_rep)
+    assert 0 < ktu['baseline'] <= 1
+    assert '_run_b_rep' not in rpd_eval.__dict__
+    with pytest.raises(FileNotFoundError):
+        rpd_eval.run_b_rep
+    assert rpd_eval.measures == RpdEvaluator(measures=['P_10']).measures
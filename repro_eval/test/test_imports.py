@@ -0,0 +1,20 @@
+import subprocess
+import sys
+
+
+def imported_modules(code):
+    proc = subprocess.run([sys.executable, '-c', code + '; import sys; print(" ".join(sys.modules))'],
+                          stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return set(proc.stdout.split())
+
+
+def test_cli_help_imports():
+    modules = imported_modules('import sys; sys.argv = ["repro_eval", "--help"]; import runpy\n'
+                               'try:\n    runpy.run_module("repro_eval", run_name="__main__")\n'
+                               'except SystemExit:\n    pass')
+    assert not modules & {'scipy', 'ir_measures', 'tqdm', 'repro_eval.Evaluator'}
+
+
+def test_evaluator_imports():
+    modules = imported_modules('import repro_eval.Evaluator')
+    assert not modules & {'scipy', 'ir_measures', 'tqdm'}
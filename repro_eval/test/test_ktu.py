@@ -0,0 +1,55 @@
+import random
+import pytest
+from scipy.stats import kendalltau
+from repro_eval import parallel
+from repro_eval.run import Run
+from repro_eval.measure.document_order import KTU
+
+
+def reference_ktu(orig_docs, rep_docs):
+    union = list(sorted(set(orig_docs + rep_docs)))
+    orig_idx = [union.index(doc) for doc in orig_docs]
+    rep_idx = [union.index(doc) for doc in rep_docs]
+    return float(round(kendalltau(orig_idx, rep_idx).correlation, 14))
+
+
+def random_run(rng, topics, docs, depth):
+    return {topic: {doc: float(depth - rank) for rank, doc in enumerate(rng.sample(docs, depth))}
+            for topic in topics}
+
+
+@pytest.mark.parametrize('depth', [2, 3, 10, 100, 257])
+def test_ktu_reference(depth):
+    rng = random.Random(depth)
+    topics = [str(topic) for topic in range(20)]
+    docs = ['doc{}'.format(i) for i in range(3 * depth)]
+    orig_run = random_run(rng, topics, docs, depth)
+    rep_run = random_run(rng, topics, docs, depth)
+    rep_run['0'] = dict(orig_run['0'])  # identical rankings
+    rep_run['1'] = {doc: float(rank) for rank, doc in enumerate(orig_run['1'].keys())}  # reversed rankings
+    rep_run['1'] = dict(sorted(rep_run['1'].items(), key=lambda item: -item[1]))
+
+    ktu = KTU(orig_run, rep_run, per_topic=True)
+    for topic in topics:
+        assert ktu[topic] == reference_ktu(list(orig_run[topic].keys()), list(rep_run[topic].keys()))
+
+    trimmed_ktu = KTU(Run.from_dict(orig_run), Run.from_dict(rep_run), trim_thresh=depth // 2 + 1, per_topic=True)
+    for topic in topics:
+        assert trimmed_ktu[topic] == reference_ktu(list(orig_run[topic].keys())[:depth // 2 + 1],
+                                                   list(rep_run[topic].keys())[:depth // 2 + 1])
+
+
+def test_ktu_n_jobs():
+    rng = random.Random(0)
+    topics = [str(topic) for topic in range(20)]
+    docs = ['doc{}'.format(i) for i in range(300)]
+    orig_run = random_run(rng, topics, docs, 100)
+    rep_run = random_run(rng, topics, docs, 100)
+    ktu = KTU(orig_run, rep_run, per_topic=True)
+    parallel_ktu = KTU(orig_run, rep_run, per_topic=True, n_jobs=3)
+    assert list(parallel_ktu.items()) == list(ktu.items())
+
+    # repeated calls reuse the pool of worker processes
+    executor = parallel._shared_executor(3)
+    assert KTU(orig_run, rep_run, per_topic=True, n_jobs=3) == parallel_ktu
+    assert parallel._shared_executor(3) is executor
@@ -57,3 +57,26 @@ def test_run_rbo():
     assert rbo_base == _rbo.get('baseline')
     assert 'advanced' in _rbo.keys()
     assert rbo_adv == _rbo.get('advanced')
+
+
+def test_measures():
+    _rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                             run_b_orig_path='./example/orig_b.txt',
+                             run_b_rep_path='./example/rpd_b.txt',
+                             measures=['P_10', 'ndcg', 'AP'])
+    _rpd_eval.trim()
+    _rpd_eval.evaluate()
+    _rmse = _rpd_eval.rmse().get('baseline')
+    assert set(_rmse.keys()) == {'P@10', 'nDCG', 'AP'}
+    assert _rmse.get('P@10') == rpd_eval.rmse().get('baseline').get('P@10')
+
+
+def test_no_measures():
+    _rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                             run_b_orig_path='./example/orig_b.txt',
+                             run_b_rep_path='./example/rpd_b.txt',
+                             measures=[])
+    _rpd_eval.trim()
+    _rpd_eval.evaluate()
+    assert _rpd_eval.run_b_orig_score is None
+    assert ktu_base == _rpd_eval.ktu().get('baseline')
@@ -0,0 +1,147 @@
+import pytest
+import io
+import os
+from repro_eval import metadata
+from repro_eval.metadata import PrimadExperiment, MetadataIndex, MetadataHandler, META_START, META_END, \
+    PRIMAD_MEASURES, _split_header
+
+
+def annotate(tmp_path, run_path, tag, team):
+    path = tmp_path / tag
+    with open(run_path) as f_in:
+        run = f_in.read()
+    path.write_text('\n'.join([META_START, '# tag: ' + tag, '# actor:', '#   team: ' + team, META_END, run]))
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def experiment(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('primad')
+    rep_base = [annotate(tmp_path, './example/rpd_b.txt', 'rpd_b', 'rpd'),
+                annotate(tmp_path, './example/orig_b.txt', 'copy_b', 'copy')]
+    rep_adv = [annotate(tmp_path, './example/rpd_a.txt', 'rpd_a', 'rpd'),
+               annotate(tmp_path, './example/orig_a.txt', 'copy_a', 'copy')]
+    return PrimadExperiment(primad='PRIMAd',
+                            ref_base_path=annotate(tmp_path, './example/orig_b.txt', 'orig_b', 'orig'),
+                            ref_adv_path=annotate(tmp_path, './example/orig_a.txt', 'orig_a', 'orig'),
+                            rep_base=rep_base, rep_adv=rep_adv,
+                            rpd_qrels='./example/qrels/core17.txt')
+
+
+def test_primad_n_jobs(experiment):
+    evaluations = experiment.evaluate()
+    assert list(evaluations.keys()) == ['rpd', 'copy', 'orig']
+    assert evaluations['copy']['ktu'] == {'baseline': 1.0, 'advanced': 1.0}
+
+    parallel_evaluations = experiment.evaluate(n_jobs=2)
+    assert list(parallel_evaluations.keys()) == list(evaluations.keys())
+    for expid, pair_evaluations in evaluations.items():
+        assert parallel_evaluations[expid]['ktu'] == pair_evaluations['ktu']
+        assert parallel_evaluations[expid]['er'] == pytest.approx(pair_evaluations['er'], nan_ok=True)
+
+
+def test_primad_arp_measures(experiment):
+    import ir_measures
+    arp = experiment.evaluate()['copy']['arp']
+    expected = {str(ir_measures.parse_measure(measure))
+                for family in PRIMAD_MEASURES for measure in ir_measures.convert_trec_name(family)}
+    assert set(arp['baseline'].measures) == expected
+    # the copied baseline has the same topic scores as the reference baseline
+    assert arp['baseline'] == experiment.rep_eval.run_b_orig_score
+
+
+def test_primad_no_count_measures(experiment):
+    counts = {'NumQ', 'NumRel', 'NumRet', 'NumRet(rel=1)'}
+    for evaluations in experiment.evaluate().values():
+        assert not counts & set(evaluations['arp']['baseline'].measures)
+        for repro_measure in ['er', 'dri', 'rmse', 'pval']:
+            values = evaluations.get(repro_measure, {})
+            for _values in [values.get('baseline', {}), values.get('advanced', {}), values]:
+                assert not counts & set(_values)
+
+
+def test_primad_iter_evaluate(experiment):
+    results = dict(experiment.iter_evaluate(n_jobs=2))
+    assert set(results) == {'rpd', 'copy', 'orig'}
+    table = experiment.evaluate(as_table=True)
+    assert set(table['run']) == {'rpd', 'copy', 'orig'}
+
+
+def reference_pairs(rep_base, rep_adv):
+    pairs = []
+    for brp in rep_base:
+        br = MetadataHandler.read_metadata(brp)
+        arp, cnt = None, 0
+        for _arp in rep_adv:
+            ar = MetadataHandler.read_metadata(_arp)
+            _cnt = sum(v == ar.get(k) for k, v in br.items())
+            if _cnt > cnt:
+                arp, cnt = _arp, _cnt
+        pairs.append({'base': brp, 'adv': arp})
+    return pairs
+
+
+def test_metadata_index(experiment, tmp_path, monkeypatch):
+    rep_base, rep_adv = experiment.rep_base, experiment.rep_adv[::-1]
+    pairs = reference_pairs(rep_base, rep_adv)
+    reads = []
+    read_metadata_str = MetadataHandler.read_metadata_str
+    monkeypatch.setattr(MetadataHandler, 'read_metadata_str',
+                        staticmethod(lambda run_path: reads.append(run_path) or read_metadata_str(run_path)))
+
+    cache_path = str(tmp_path / 'index.json')
+    index = MetadataIndex(cache_path)
+    assert index.find_pairs(rep_base, rep_adv) == pairs
+    assert len(reads) == 4
+    assert index.get(rep_base[0])['actor'] == {'team': 'rpd'}
+    assert len(reads) == 4
+
+    # unchanged runs are not read again with the on-disk cache, changed runs are
+    index = MetadataIndex(cache_path)
+    assert index.find_pairs(rep_base, rep_adv) == pairs
+    assert index.get(rep_adv[0])['tag'] == 'copy_a'
+    assert len(reads) == 4
+    reads.clear()
+    stat = os.stat(rep_base[0])
+    os.utime(rep_base[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    MetadataIndex(cache_path).find_pairs(rep_base, rep_adv)
+    assert reads == [rep_base[0]]
+
+
+def test_read_annotated_run(experiment):
+    import pytrec_eval
+    with open('./example/rpd_b.txt') as f_in:
+        run = pytrec_eval.parse_run(f_in)
+    metadata, annotated_run = MetadataHandler.read_annotated_run(experiment.rep_base[0])
+    assert metadata == {'tag': 'rpd_b', 'actor': {'team': 'rpd'}}
+    assert annotated_run == run
+    assert MetadataHandler.strip_metadata(experiment.rep_base[0]) == run
+    assert MetadataHandler.read_annotated_run('./example/rpd_b.txt') == (None, run)
+    assert MetadataHandler.read_metadata('./example/rpd_b.txt') is None
+
+
+def test_header_only_read():
+    f_in = io.StringIO('\n'.join([META_START, '# tag: header', META_END, '301 Q0 doc 1 1.0 run', '']))
+    metadata_str, _ = _split_header(f_in)
+    assert metadata_str == ' tag: header\n'
+    assert f_in.readline() == '301 Q0 doc 1 1.0 run\n'
+
+
+def test_primad_single_pass(experiment, monkeypatch):
+    headers = []
+    split_header = metadata._split_header
+    monkeypatch.setattr(metadata, '_split_header', lambda f_in: headers.append(f_in.name) or split_header(f_in))
+    items = experiment._prepare()
+    headers.clear()
+    experiment._evaluate_item(items[0])
+    assert sorted(headers) == sorted([items[0]['base'], items[0]['adv']])
+
+
+def test_primad_qrels_loaded_once(experiment):
+    rpl_experiment = PrimadExperiment(primad='PRIMAD', ref_base_path=experiment.ref_base_path,
+                                      ref_adv_path=experiment.ref_adv_path, rep_base=experiment.rep_base,
+                                      rep_adv=experiment.rep_adv, rpd_qrels='./example/qrels/core17.txt',
+                                      rpl_qrels='./example/qrels/core18.txt')
+    assert '_qrels_rpl' not in rpl_experiment.rep_eval.__dict__
+    rpl_experiment._prepare()
+    assert '_qrels_rpl' in rpl_experiment.rep_eval.__dict__
@@ -1,5 +1,6 @@
 import pytest
 from repro_eval.Evaluator import RpdEvaluator
+from repro_eval.measure.document_order import _rbo
 
 rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
                         run_b_orig_path='./example/orig_b.txt',
@@ -19,3 +20,20 @@ def test_rbo():
     assert isinstance(rbo.get('advanced'), float)
 
 
+
+
+@pytest.mark.parametrize('p', [0.5, 0.8, 0.95, 0.99])
+@pytest.mark.parametrize('depth', [1, 5, 100, 1000, 1500])
+def test_rbo_reference(p, depth):
+    rbo = rpd_eval.rbo(p=p, depth=depth, per_topic=True)
+    run_b_rep = rpd_eval.run_b_rep
+    run_b_orig = rpd_eval.run_b_orig
+    for topic, value in rbo.get('baseline').items():
+        assert value == _rbo(run_b_rep.doc_ids(topic), run_b_orig.doc_ids(topic), p=p, depth=depth)
+
+
+def test_rbo_n_jobs():
+    rbo = rpd_eval.rbo(per_topic=True)
+    parallel_rbo = rpd_eval.rbo(per_topic=True, n_jobs=3)
+    assert list(parallel_rbo.get('baseline').items()) == list(rbo.get('baseline').items())
+    assert list(parallel_rbo.get('advanced').items()) == list(rbo.get('advanced').items())
@@ -0,0 +1,98 @@
+import csv
+import json
+import sys
+import numpy as np
+import pytest
+from repro_eval.Evaluator import RpdEvaluator
+from repro_eval.result import ResultTable, open_writer
+
+rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                        run_b_orig_path='./example/orig_b.txt',
+                        run_a_orig_path='./example/orig_a.txt',
+                        run_b_rep_path='./example/rpd_b.txt',
+                        run_a_rep_path='./example/rpd_a.txt',
+                        measures=['P_10', 'map'])
+rpd_eval.trim()
+rpd_eval.evaluate()
+
+
+def _values(table, repro_measure, side=None):
+    return {measure or topic: value for _, _side, _repro_measure, measure, topic, value in table.rows()
+            if _repro_measure == repro_measure and _side == side}
+
+
+def test_add():
+    table = ResultTable()
+    table.add('ktu', rpd_eval.ktu(), run='rpd')
+    table.add('er', rpd_eval.er(), run='rpd')
+    table.add('rbo', rpd_eval.rbo(per_topic=True), run='rpd', per_topic=True)
+    table.add('er', rpd_eval.er(bootstrap=10, seed=0), run='boot')
+    table.add('score', rpd_eval.run_b_orig_score, run='orig', side='baseline')
+
+    assert _values(table, 'ktu', 'baseline') == {None: rpd_eval.ktu().get('baseline')}
+    assert _values(table, 'er') == pytest.approx(rpd_eval.er(), nan_ok=True)
+    assert _values(table, 'rbo', 'advanced') == rpd_eval.rbo(per_topic=True).get('advanced')
+    assert set(table['repro_measure']) >= {'er_lower', 'er_upper'}
+    assert _values(table, 'score', 'baseline')
+    assert table.num_rows == len(table['run']) == len(table['value'])
+
+
+def test_results():
+    table = rpd_eval.results()
+    assert set(table['run']) == {'rpd_b.txt'}
+    assert set(table['repro_measure']) == {'ktu', 'rbo', 'rmse', 'nrmse', 'er', 'dri', 'pval'}
+    assert _values(table, 'rmse', 'advanced') == rpd_eval.rmse().get('advanced')
+    assert _values(table, 'pval', 'baseline') == rpd_eval.ttest().get('baseline')
+
+    table = rpd_eval.results(['ktu'], run='rpd', per_topic=True)
+    assert table['topic'][0] is not None
+    with pytest.raises(ValueError):
+        rpd_eval.results(['permutation'])
+
+
+def test_export():
+    table = rpd_eval.results()
+    df = table.to_pandas()
+    assert list(df.columns) == list(table.keys())
+    assert np.shares_memory(df['value'].to_numpy(), table['value'])
+    table.add('ktu', 0.5, run='other')  # rows that are added later do not change the exported columns
+    assert len(df) == table.num_rows - 1
+
+
+def test_writers(tmp_path):
+    table = rpd_eval.results()
+    table.write(str(tmp_path / 'results.jsonl'))
+    with open(str(tmp_path / 'results.jsonl')) as f_in:
+        rows = [json.loads(line) for line in f_in]
+    assert len(rows) == table.num_rows
+    assert rows[0] == dict(zip(table.keys(), next(table.rows())))
+
+    with open_writer(str(tmp_path / 'results.csv')) as writer:
+        writer.write(table)
+        writer.write(table)
+    with open(str(tmp_path / 'results.csv'), newline='') as f_in:
+        rows = list(csv.DictReader(f_in))
+    assert len(rows) == 2 * table.num_rows
+    assert float(rows[0]['value']) == table['value'][0]
+
+    with pytest.raises(ValueError):
+        open_writer(str(tmp_path / 'results.xlsx'))
+
+
+def test_parquet(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    table = rpd_eval.results()
+    with open_writer(str(tmp_path / 'results.parquet')) as writer:
+        writer.write(table)
+        writer.write(table)
+    assert pq.read_table(str(tmp_path / 'results.parquet')).num_rows == 2 * table.num_rows
+
+
+def test_missing_export_dependencies(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pandas', None)
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    monkeypatch.setitem(sys.modules, 'pyarrow.parquet', None)
+    table = ResultTable().add('ktu', 0.5)
+    for export in [table.to_pandas, table.to_arrow, lambda: open_writer(str(tmp_path / 'results.parquet'))]:
+        with pytest.raises(ImportError, match=r'repro_eval\[export\]'):
+            export()
@@ -1,5 +1,8 @@
+import numpy as np
 import pytest
 from repro_eval.Evaluator import RpdEvaluator
+from repro_eval.measure.overall_effects import DRI
+from repro_eval.scores import ScoreMatrix
 
 rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
                         run_b_orig_path='./example/orig_b.txt',
@@ -52,4 +55,41 @@ def test_dri():
 def test_ttest():
     ttest = rpd_eval.ttest()
     assert 'baseline' in ttest.keys()
-    assert 'advanced' in ttest.keys()
\ No newline at end of file
+    assert 'advanced' in ttest.keys()
+
+def test_er_bootstrap():
+    er = rpd_eval.er()
+    er_bootstrap = rpd_eval.er(bootstrap=1000, seed=0)
+    assert er_bootstrap.get('AP') == rpd_eval.er(bootstrap=1000, seed=0).get('AP')
+    assert set(er_bootstrap.keys()) == set(er.keys())
+    assert er_bootstrap.get('AP').get('estimate') == pytest.approx(er.get('AP'))
+    assert er_bootstrap.get('AP').get('lower') <= er.get('AP') <= er_bootstrap.get('AP').get('upper')
+
+    # reference with explicit resampling of the topics
+    rng = np.random.default_rng(0)
+    index = rng.integers(0, len(rpd_eval.run_a_orig_score), size=(1000, len(rpd_eval.run_a_orig_score)))
+    delta_orig = rpd_eval.run_a_orig_score.column('AP') - rpd_eval.run_b_orig_score.column('AP')
+    delta_rep = rpd_eval.run_a_rep_score.column('AP') - rpd_eval.run_b_rep_score.column('AP')
+    replicates = delta_rep[index].mean(axis=1) / delta_orig[index].mean(axis=1)
+    assert er_bootstrap.get('AP').get('lower') == pytest.approx(np.percentile(replicates, 2.5))
+    assert er_bootstrap.get('AP').get('upper') == pytest.approx(np.percentile(replicates, 97.5))
+
+
+def test_dri_bootstrap():
+    dri = rpd_eval.dri()
+    dri_bootstrap = rpd_eval.dri(bootstrap=1000, seed=0)
+    assert set(dri_bootstrap.keys()) == set(dri.keys())
+    assert dri_bootstrap.get('nDCG').get('estimate') == pytest.approx(dri.get('nDCG'))
+    assert dri_bootstrap.get('nDCG').get('lower') <= dri.get('nDCG') <= dri_bootstrap.get('nDCG').get('upper')
+
+
+def test_dri_bootstrap_unequal_topics():
+    # the original baseline has an additional topic that is not part of the advanced run
+    orig_b = rpd_eval.run_b_orig_score
+    orig_b_extra = ScoreMatrix(np.vstack([orig_b.values, np.zeros((1, len(orig_b.measures)))]),
+                               orig_b.topics + ['extra'], orig_b.measures)
+    dri_bootstrap = DRI(rpd_eval.run_a_orig_score, orig_b_extra, rpd_eval.run_a_rep_score,
+                        rpd_eval.run_b_rep_score, bootstrap=1000, seed=0)
+    dri = DRI(rpd_eval.run_a_orig_score, orig_b, rpd_eval.run_a_rep_score, rpd_eval.run_b_rep_score)
+    assert dri_bootstrap.get('nDCG').get('estimate') == pytest.approx(dri.get('nDCG'))
+    assert dri_bootstrap.get('nDCG').get('lower') <= dri.get('nDCG') <= dri_bootstrap.get('nDCG').get('upper')
@@ -0,0 +1,62 @@
+import pytrec_eval
+from repro_eval.run import Run, as_run
+from repro_eval.util import load_run, load_qrels, load_measures, evaluate_run, break_ties, trim_run
+
+
+run = load_run('./example/rpd_b.txt')
+
+with open('./example/rpd_b.txt') as _run_file:
+    run_dict = pytrec_eval.parse_run(_run_file)
+
+
+def test_dict_view():
+    assert isinstance(run, Run)
+    assert sorted(run_dict.keys()) == list(run.keys())
+    for topic, ranking in run_dict.items():
+        assert run[topic] == ranking
+        assert list(run[topic].keys()) == list(ranking.keys())
+
+
+def test_from_dict():
+    _run = as_run(run_dict)
+    assert _run.to_dict() == run.to_dict()
+    assert len(_run.docs) == sum(len(ranking) for ranking in run_dict.values())
+
+
+def test_records():
+    records = list(run.records())
+    assert records == [(topic, doc, score) for topic, ranking in run.to_dict().items() for doc, score in ranking.items()]
+    measures = load_measures(['P_10', 'map', 'ndcg'])
+    qrels = load_qrels('./example/qrels/core17.txt')
+    assert evaluate_run(measures, qrels, run) == evaluate_run(measures, qrels, run.to_dict())
+
+
+def test_duplicates():
+    _run = Run.from_records([('1', 'd1', 3.0), ('1', 'd2', 2.0), ('1', 'd1', 1.0)])
+    assert _run['1'] == {'d1': 1.0, 'd2': 2.0}
+    assert list(_run['1'].keys()) == ['d1', 'd2']
+
+
+def test_break_ties_and_trim():
+    _run = load_run('./example/rpd_b.txt')
+    _run_dict = {topic: dict(ranking) for topic, ranking in run_dict.items()}
+    break_ties(_run)
+    break_ties(_run_dict)
+    trim_run(_run, 10)
+    trim_run(_run_dict, 10)
+    for topic, ranking in _run_dict.items():
+        assert list(_run[topic].items()) == list(ranking.items())
+
+
+def test_trec_eval_order():
+    records = [('1', 'a', 1.0), ('1', 'c', 2.0), ('1', 'b', 2.0), ('1', 'd', 3.0), ('2', 'x', 1.0), ('2', 'y', 1.0)]
+    _run = Run.from_records(records)
+    _run_dict = {'1': {'a': 1.0, 'c': 2.0, 'b': 2.0, 'd': 3.0}, '2': {'x': 1.0, 'y': 1.0}}
+    break_ties(_run)
+    break_ties(_run_dict)
+    assert _run.doc_ids('1') == ['d', 'c', 'b', 'a']
+    assert _run.doc_ids('2') == ['y', 'x']
+    assert list(_run_dict['1'].keys()) == ['d', 'c', 'b', 'a']
+    trim_run(_run, 2)
+    assert _run.doc_ids('1') == ['d', 'c']
+    assert _run.doc_ids('2') == ['y', 'x']
@@ -0,0 +1,157 @@
+import math
+import numpy as np
+import pytest
+from repro_eval import exclude
+from repro_eval.Evaluator import RpdEvaluator
+from repro_eval.scores import ScoreMatrix
+from repro_eval.util import _accumulate_scores, evaluate_run, load_measures, load_qrels, load_run
+from repro_eval.measure.effectiveness import RMSE, nRMSE, rmse_batch
+from repro_eval.measure.overall_effects import ER, DRI, er_batch, dri_batch
+from repro_eval.measure.statistics import ttest
+
+rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                        run_b_orig_path='./example/orig_b.txt',
+                        run_a_orig_path='./example/orig_a.txt',
+                        run_b_rep_path='./example/rpd_b.txt',
+                        run_a_rep_path='./example/rpd_a.txt')
+
+rpd_eval.trim()
+rpd_eval.evaluate()
+
+orig_b = rpd_eval.run_b_orig_score
+orig_a = rpd_eval.run_a_orig_score
+rep_b = rpd_eval.run_b_rep_score
+rep_a = rpd_eval.run_a_rep_score
+
+
+def assert_close(scores, _scores):
+    assert scores.keys() == _scores.keys()
+    for measure, value in scores.items():
+        assert value == pytest.approx(_scores.get(measure), nan_ok=True)
+
+
+def test_score_matrix():
+    assert isinstance(orig_b, ScoreMatrix)
+    assert ScoreMatrix.from_dict(orig_b.to_dict()) == orig_b
+    topic = orig_b.topics[0]
+    assert orig_b[topic].get('AP') == orig_b.column('AP')[0]
+
+
+def reference_scores(metrics):
+    # former path: per-topic dictionaries grouped by the sorted query ids
+    scores = {}
+    for query_id, measure, value in metrics:
+        scores.setdefault(query_id, {})[str(measure)] = value
+    return {topic: scores[topic] for topic in sorted(scores)}
+
+
+def test_accumulate_scores():
+    import ir_measures
+    P_10, AP = ir_measures.parse_measure('P@10'), ir_measures.parse_measure('AP')
+    # topics and measures with uneven coverage, records are not ordered by topic
+    metrics = [ir_measures.Metric('310', P_10, 0.5), ir_measures.Metric('303', AP, 0.25),
+               ir_measures.Metric('303', P_10, 0.1), ir_measures.Metric('307', AP, 0.75)]
+    matrix, topics, measures = _accumulate_scores(iter(metrics))
+    assert topics == list(reference_scores(metrics)) == ['303', '307', '310']
+    assert measures == ['P@10', 'AP']
+    np.testing.assert_array_equal(matrix, [[0.1, 0.25], [np.nan, 0.75], [0.5, np.nan]])
+
+    matrix, topics, measures = _accumulate_scores(iter([]))
+    assert matrix.shape == (0, 0) and topics == [] and measures == []
+
+
+def test_evaluate_run_topic_order():
+    import ir_measures
+    measures = load_measures(['P_10', 'map', 'ndcg'])
+    qrels, run = load_qrels('./example/qrels/core17.txt'), load_run('./example/rpd_b.txt')
+    scores = evaluate_run(measures, qrels, run)
+    reference = reference_scores(ir_measures.iter_calc(measures, qrels, run.to_dict()))
+    assert scores.topics == list(reference)
+    assert scores.to_dict() == reference
+
+
+def reference_rmse(orig_score, rep_score, normalized=False):
+    rmse = {}
+    for measure in orig_score.measures:
+        if measure in exclude:
+            continue
+        diff = [orig_score[topic][measure] - rep_score.get(topic, {}).get(measure, 0.) for topic in orig_score]
+        rmse[measure] = math.sqrt(sum(d * d for d in diff) / len(diff))
+        if normalized:
+            maxdiff = [max(orig_score[topic][measure], 1 - orig_score[topic][measure]) for topic in orig_score]
+            rmse[measure] /= math.sqrt(sum(d * d for d in maxdiff) / len(maxdiff))
+    return rmse
+
+
+def test_rmse():
+    assert_close(RMSE(orig_b, rep_b), reference_rmse(orig_b, rep_b))
+    assert_close(nRMSE(orig_b, rep_b), reference_rmse(orig_b, rep_b, normalized=True))
+    assert_close(RMSE(orig_b.to_dict(), rep_b.to_dict()), RMSE(orig_b, rep_b))
+
+    rmse = rmse_batch([orig_b, orig_a, orig_b], [rep_b, rep_a, orig_b], normalized=True)
+    assert_close(rmse[0], nRMSE(orig_b, rep_b))
+    assert_close(rmse[1], nRMSE(orig_a, rep_a))
+    assert set(rmse[2].values()) == {0.}
+
+
+def test_rmse_missing_topics():
+    # topics missing in the reproduced scores count as 0, additional topics are ignored
+    rep_dict = rep_b.to_dict()
+    missing = list(rep_dict.keys())[:3]
+    for topic in missing:
+        del rep_dict[topic]
+    rep_dict['unknown'] = dict(rep_dict[list(rep_dict.keys())[0]])
+    assert_close(RMSE(orig_b, ScoreMatrix.from_dict(rep_dict)), reference_rmse(orig_b, rep_dict))
+
+
+def test_missing_topics_policy():
+    # RMSE and the paired tests score the missing topics of a reproduced run with 0 alike
+    from scipy.stats import ttest_rel
+    from repro_eval.measure.statistics import permutation_test
+    rep_dict = rep_b.to_dict()
+    for topic in list(rep_dict.keys())[:3]:
+        del rep_dict[topic]
+    rep_missing = ScoreMatrix.from_dict(rep_dict)
+    zero_filled = ScoreMatrix.from_dict({topic: rep_dict.get(topic, dict.fromkeys(rep_b.measures, 0.))
+                                         for topic in orig_b.topics})
+    assert_close(RMSE(orig_b, rep_missing), RMSE(orig_b, zero_filled))
+    pvals = ttest(orig_b, rep_missing)
+    assert_close(pvals, ttest(orig_b, zero_filled))
+    assert pvals['AP'] == pytest.approx(ttest_rel(orig_b.column('AP'), zero_filled.column('AP')).pvalue)
+    assert not math.isnan(pvals['AP'])
+    assert permutation_test(orig_b, rep_missing, n_resamples=100, seed=0) == \
+        permutation_test(orig_b, zero_filled, n_resamples=100, seed=0)
+
+
+def reference_er(orig_a, orig_b, rep_a, rep_b):
+    er = {}
+    for measure in rep_a.measures:
+        if measure in exclude:
+            continue
+        mi_orig = sum(orig_a[t][measure] - orig_b[t][measure] for t in orig_a) / len(orig_a)
+        mi_rep = sum(rep_a[t][measure] - rep_b[t][measure] for t in rep_a) / len(rep_a)
+        er[measure] = mi_rep / mi_orig if mi_orig else math.nan
+    return er
+
+
+def test_vectorized_paths():
+    # nested dictionaries and score matrices give the same results
+    assert_close(ER(orig_a, orig_b, rep_a, rep_b), reference_er(orig_a, orig_b, rep_a, rep_b))
+    assert_close(ER(orig_a, orig_b, rep_a, rep_b),
+                 ER(orig_a.to_dict(), orig_b.to_dict(), rep_a.to_dict(), rep_b.to_dict()))
+    assert_close(DRI(orig_a, orig_b, rep_a, rep_b),
+                 DRI(orig_a.to_dict(), orig_b.to_dict(), rep_a.to_dict(), rep_b.to_dict()))
+    assert_close(ttest(orig_b, rep_b), ttest(orig_b.to_dict(), rep_b.to_dict()))
+    assert_close(ttest(orig_b, rep_b, rpd=False), ttest(orig_b.to_dict(), rep_b.to_dict(), rpd=False))
+
+
+def test_er_dri_batch():
+    er, measures = er_batch(orig_a, orig_b, [rep_a, orig_a, rep_a.to_dict()], [rep_b, orig_b, rep_b])
+    assert er.shape == (3, len(measures))
+    assert_close(dict(zip(measures, er[0])), ER(orig_a, orig_b, rep_a, rep_b))
+    assert_close(dict(zip(measures, er[2])), ER(orig_a, orig_b, rep_a, rep_b))
+    assert set(er[1][np.isfinite(er[1])]) == {1.0}
+
+    dri, measures = dri_batch(orig_a, orig_b, [rep_a, orig_a], [rep_b, orig_b])
+    assert_close(dict(zip(measures, dri[0])), DRI(orig_a, orig_b, rep_a, rep_b))
+    assert set(dri[1][np.isfinite(dri[1])]) == {0.0}
@@ -0,0 +1,163 @@
+import http.client
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from repro_eval.Evaluator import RpdEvaluator
+from repro_eval.server import EvaluationService, EvaluationServer, UnixEvaluationServer
+
+rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                        run_b_orig_path='./example/orig_b.txt',
+                        run_a_orig_path='./example/orig_a.txt',
+                        run_b_rep_path='./example/rpd_b.txt',
+                        run_a_rep_path='./example/rpd_a.txt',
+                        measures=['P_10', 'map'])
+rpd_eval.trim()
+rpd_eval.evaluate()
+
+service = EvaluationService(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_a_orig_path='./example/orig_a.txt',
+                            measures=['P_10', 'map'])
+
+
+class UnixConnection(http.client.HTTPConnection):
+
+    def __init__(self, path):
+        super(UnixConnection, self).__init__('localhost')
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = EvaluationServer(('127.0.0.1', 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(connection, method, path, payload=None):
+    connection.request(method, path, body=json.dumps(payload) if payload is not None else None)
+    response = connection.getresponse()
+    return response.status, response.read().decode()
+
+
+def connect(server):
+    return http.client.HTTPConnection(*server.server_address[:2])
+
+
+def test_health(server):
+    status, body = request(connect(server), 'GET', '/health')
+    assert status == 200
+    assert json.loads(body) == {'status': 'ok', 'measures': ['P@10', 'AP']}
+
+
+def test_evaluate(server):
+    status, body = request(connect(server), 'POST', '/evaluate',
+                           {'run_b': './example/rpd_b.txt', 'run_a': './example/rpd_a.txt'})
+    assert status == 200
+    result = json.loads(body)
+    assert result['ktu'] == rpd_eval.ktu()
+    assert result['rmse']['baseline'] == pytest.approx(rpd_eval.rmse().get('baseline'))
+    assert result['er'] == pytest.approx({m: v for m, v in rpd_eval.er().items()})
+
+    assert request(connect(server), 'POST', '/evaluate', {'run_b': './example/missing.txt'})[0] == 400
+    assert request(connect(server), 'POST', '/unknown', {})[0] == 404
+
+
+def test_invalid_requests(server):
+    for payload in [{'run_b': './example/rpd_b.txt', 'p': None}, {'run_b': './example/rpd_b.txt', 'depth': [1]},
+                    {'runs': 1}, [], {'run_b': None}, {'run_b': './example/rpd_b.txt', 'p': 1.5},
+                    {'run_b': './example/rpd_b.txt', 'depth': 0}, {'runs': ['./example/rpd_b.txt'], 'p': 0}]:
+        assert request(connect(server), 'POST', '/batch' if 'runs' in payload else '/evaluate', payload)[0] == 400
+
+    for headers, body in [({'Content-Length': 'abc'}, b''), ({'Content-Length': '2'}, b'\xff\xfe'),
+                          ({'Content-Length': '3'}, b'{x}')]:
+        connection = connect(server)
+        connection.putrequest('POST', '/evaluate')
+        for header, value in headers.items():
+            connection.putheader(header, value)
+        connection.endheaders(body)
+        response = connection.getresponse()
+        assert response.status == 400
+        assert 'error' in json.loads(response.read())
+
+
+def test_concurrent_clients(server):
+    def evaluate(path):
+        return json.loads(request(connect(server), 'POST', '/evaluate', {'run_b': path})[1])
+
+    paths = ['./example/rpd_b.txt', './example/orig_b.txt'] * 3
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(evaluate, paths))
+    assert [result['ktu']['baseline'] for result in results] == \
+        [rpd_eval.ktu().get('baseline'), 1.0] * 3
+
+
+def test_batch(server):
+    status, body = request(connect(server), 'POST', '/batch',
+                           {'runs': ['./example/rpd_b.txt', ['./example/orig_b.txt', './example/orig_a.txt']]})
+    assert status == 200
+    results = {result['run']: result for result in map(json.loads, body.splitlines())}
+    assert results['orig_b.txt']['er'] == pytest.approx({'P@10': 1.0, 'AP': 1.0})
+    assert results['rpd_b.txt']['ktu'] == {'baseline': rpd_eval.ktu().get('baseline')}
+
+
+def test_evaluate_many_window():
+    workers_service = EvaluationService(workers=2, qrels_orig_path='./example/qrels/core17.txt',
+                                        run_b_orig_path='./example/orig_b.txt', measures=['P_10'])
+    futures = []
+    in_flight = []
+    submit = workers_service._executor.submit
+
+    def _submit(*args):
+        futures.append(submit(*args))
+        in_flight.append(sum(not future.done() for future in futures))
+        return futures[-1]
+
+    workers_service._executor.submit = _submit
+    try:
+        results = list(workers_service.evaluate_many(['./example/rpd_b.txt', './example/orig_b.txt'] * 4))
+    finally:
+        workers_service.close()
+    assert len(results) == 8
+    assert sorted(result['ktu']['baseline'] for result in results)[-4:] == [1.0] * 4
+    assert max(in_flight) <= 4
+
+
+def test_unix_socket(tmp_path):
+    path = str(tmp_path / 'repro_eval.sock')
+    server = UnixEvaluationServer(path, service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        status, body = request(UnixConnection(path), 'GET', '/health')
+        assert status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unix_socket_path(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_text('data')
+    with pytest.raises(FileExistsError):
+        UnixEvaluationServer(str(path), service)
+    assert path.read_text() == 'data'
+
+    # a stale socket is replaced
+    path = str(tmp_path / 'repro_eval.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    server = UnixEvaluationServer(path, service)
+    server.server_close()
+    assert not os.path.exists(path)
@@ -0,0 +1,59 @@
+import pytest
+from repro_eval.Evaluator import RpdEvaluator, RplEvaluator
+
+
+def rpd_evaluator():
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_a_orig_path='./example/orig_a.txt',
+                            run_b_rep_path='./example/rpd_b.txt',
+                            run_a_rep_path='./example/rpd_a.txt')
+    rpd_eval.trim()
+    return rpd_eval
+
+
+def test_rpd_sweep():
+    cutoffs = [1000, 20, 5]
+    sweep = rpd_evaluator().sweep(cutoffs)
+    assert list(sweep.keys()) == cutoffs
+    for cutoff in cutoffs:
+        rpd_eval = rpd_evaluator()
+        rpd_eval.trim(cutoff)
+        rpd_eval.evaluate()
+        assert sweep[cutoff]['ktu'] == rpd_eval.ktu()
+        assert sweep[cutoff]['rbo'] == rpd_eval.rbo()
+        for side, rmse in rpd_eval.rmse().items():
+            assert sweep[cutoff]['rmse'][side] == pytest.approx(rmse, nan_ok=True)
+        assert sweep[cutoff]['er'] == pytest.approx(rpd_eval.er(), nan_ok=True)
+        assert sweep[cutoff]['dri'] == pytest.approx(rpd_eval.dri(), nan_ok=True)
+
+
+def test_sweep_keeps_runs():
+    rpd_eval = rpd_evaluator()
+    sizes = rpd_eval.run_b_rep.sizes.copy()
+    rpd_eval.sweep([10])
+    assert (rpd_eval.run_b_rep.sizes == sizes).all()
+
+    # score ties are not broken in place
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_b_rep_path='./example/rpd_b.txt')
+    docs = rpd_eval.run_b_rep.docs.copy()
+    rpd_eval.sweep([10])
+    assert (rpd_eval.run_b_rep.docs == docs).all()
+    assert not (rpd_eval.run_b_rep.copy().break_ties().docs == docs).all()
+
+
+def test_rpl_sweep():
+    rpl_eval = RplEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_a_orig_path='./example/orig_a.txt',
+                            run_b_rep_path='./example/rpl_b.txt',
+                            run_a_rep_path='./example/rpl_a.txt',
+                            qrels_rpl_path='./example/qrels/core18.txt')
+    rpl_eval.trim()
+    sweep = rpl_eval.sweep([10])
+    rpl_eval.trim(10)
+    rpl_eval.evaluate()
+    assert set(sweep[10].keys()) == {'er', 'dri'}
+    assert sweep[10]['er'] == pytest.approx(rpl_eval.er(), nan_ok=True)
@@ -1,5 +1,9 @@
+import itertools
+import numpy as np
 import pytest
 from repro_eval.Evaluator import RpdEvaluator
+from repro_eval.scores import ScoreMatrix
+from repro_eval.measure.statistics import ttest, ttest_batch, permutation_test
 
 
 def test_ttest_with_identical_score_distributions():
@@ -19,3 +23,52 @@ def test_ttest_with_identical_score_distributions():
 
     pvals = list(filter(lambda x: x == 1.0, ttest.get('advanced').values()))
     assert len(pvals) == len(ttest.get('advanced').keys())
+
+
+def test_ttest_batch():
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_a_orig_path='./example/orig_a.txt',
+                            run_b_rep_path='./example/rpd_b.txt',
+                            run_a_rep_path='./example/rpd_a.txt')
+    rpd_eval.trim()
+    rpd_eval.evaluate()
+
+    rep_scores = [rpd_eval.run_b_rep_score, rpd_eval.run_a_rep_score, rpd_eval.run_b_orig_score]
+    pvals = ttest_batch(rpd_eval.run_b_orig_score, rep_scores)
+    assert len(pvals) == 3
+    for rep_score, _pvals in zip(rep_scores, pvals):
+        assert _pvals == pytest.approx(ttest(rpd_eval.run_b_orig_score, rep_score), nan_ok=True)
+        assert _pvals == pytest.approx(ttest(rpd_eval.run_b_orig_score.to_dict(), rep_score.to_dict()), nan_ok=True)
+    assert set(pvals[2].values()) == {1.0}
+    unpaired = ttest_batch(rpd_eval.run_b_orig_score, rep_scores, rpd=False)
+    assert unpaired[0] == pytest.approx(ttest(rpd_eval.run_b_orig_score, rep_scores[0], rpd=False), nan_ok=True)
+
+
+def test_permutation_test():
+    rpd_eval = RpdEvaluator(qrels_orig_path='./example/qrels/core17.txt',
+                            run_b_orig_path='./example/orig_b.txt',
+                            run_a_orig_path='./example/orig_a.txt',
+                            run_b_rep_path='./example/rpd_b.txt',
+                            run_a_rep_path='./example/rpd_a.txt')
+    rpd_eval.trim()
+    rpd_eval.evaluate()
+
+    pvals = rpd_eval.permutation_test(n_resamples=2000, seed=42)
+    assert set(pvals.keys()) == {'baseline', 'advanced'}
+    assert pvals == rpd_eval.permutation_test(n_resamples=2000, seed=42, n_jobs=2)
+
+    identical = permutation_test(rpd_eval.run_b_orig_score, rpd_eval.run_b_orig_score, n_resamples=100, seed=0)
+    assert set(identical.values()) == {1.0}
+
+
+def test_permutation_test_exact():
+    rng = np.random.default_rng(0)
+    topics = [str(topic) for topic in range(10)]
+    orig_score = ScoreMatrix(rng.random((10, 3)), topics, ['m1', 'm2', 'm3'])
+    rep_score = ScoreMatrix(orig_score.values - rng.normal(0.1, 0.2, (10, 3)), topics, ['m1', 'm2', 'm3'])
+    diffs = orig_score.values - rep_score.values
+    signs = np.array(list(itertools.product([-1, 1], repeat=10)))
+    exact = (np.abs(signs @ diffs) >= np.abs(diffs.sum(axis=0)) - 1e-12).mean(axis=0)
+    pvals = permutation_test(orig_score, rep_score, n_resamples=50000, seed=1)
+    assert list(pvals.values()) == pytest.approx(exact.tolist(), abs=0.01)
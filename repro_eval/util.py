@@ -1,9 +1,25 @@
-import itertools
 from collections import defaultdict, OrderedDict
+from functools import lru_cache
+import importlib
 import numpy as np
-import pandas as pd
-import ir_measures
-from ir_measures import *
+from repro_eval.run import Run
+from repro_eval.scores import ScoreMatrix
+from repro_eval.cache import RunCache
+
+DEFAULT_MEASURES = ('P', 'recall', 'ndcg', 'ndcg_cut', 'map_cut',
+                    'set_map', 'set_P', 'set_relative_P', 'set_recall', 'set_F',
+                    'Rprec', 'infAP', 'bpref', 'recip_rank', 'map', 'iprec_at_recall')
+
+
+def __getattr__(name):
+    # ir_measures (and all of its providers) is imported on first use, the measure names
+    # (e.g., repro_eval.util.AP) are still available from this module
+    if name.startswith('__'):
+        raise AttributeError(name)
+    try:
+        return getattr(importlib.import_module('ir_measures'), name)
+    except AttributeError:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name)) from None
 
 
 def trim_run(run, thresh):
@@ -13,6 +29,9 @@ def trim_run(run, thresh):
     @param run: The run to be trimmed.
     @param thresh: The threshold value of the run length.
     """
+    if isinstance(run, Run):
+        run.trim(thresh)
+        return
     for topic, _ in run.items():
         run[topic] = dict(list(run[topic].items())[:thresh])
 
@@ -54,6 +73,8 @@ def arp_scores(run):
     @param run: The run to be evaluated.
     @return: Dictionary containing the ARP scores for every measure outputted by trec_eval.
     """
+    if isinstance(run, ScoreMatrix):
+        return dict(zip(run.measures, run.mean().tolist()))
     return dict(_arp_scores(run))
 
 
@@ -77,6 +98,8 @@ def topic_scores(run_scores):
     @param run_scores: The run scores of the previously evaluated run.
     @return: Dictionary containing the topic scores for every measure outputted by trec_eval.
     """
+    if isinstance(run_scores, ScoreMatrix):
+        return dict(zip(run_scores.measures, run_scores.values.T.tolist()))
     return dict(_topic_scores(run_scores))
 
 
@@ -112,44 +135,61 @@ def print_simple_line(measure, repro_measure, value):
 def break_ties(run):
     """
     Use this function to break score ties like it is implemented in trec_eval.
-    Documents with the same score will be sorted in reverse alphabetical order.
+    The documents are sorted by descending score and documents with the same score
+    will be sorted in reverse alphabetical order.
     
-    @param run: Run with score ties. Nested dictionary structure (cf. pytrec_eval)
+    @param run: Run with score ties. Run object or nested dictionary structure (cf. pytrec_eval)
     @return: Reordered run
     """
+    if isinstance(run, Run):
+        return run.break_ties()
     for topic, ranking in run.items():
-        docid_score_tuple = list(ranking.items())
-        reordered_ranking = []
-        for _, v in itertools.groupby(docid_score_tuple, lambda item: item[1]):
-            reordered_ranking.extend(sorted(v, reverse=True))
-        run[topic] = OrderedDict(reordered_ranking)
+        run[topic] = OrderedDict(sorted(ranking.items(), key=lambda item: (item[1], item[0]), reverse=True))
     return run
 
 
-def load_run(path):
+def _parse_run(path):
+    import ir_measures
+    return Run.from_records(ir_measures.read_trec_run(path))
+
+
+def load_run(path, cache_dir=None):
     """
     Use this function to load a run in TREC-format with the help of ir_measures. 
-    Documents with the same score will be sorted in reverse alphabetical order.
+    The documents keep the order of the run file, use break_ties() to order them like trec_eval.
     
     @param path: Path to the run file.
-    @return: Reordered run in a nested dictionary.
+    @param cache_dir: Optional path to a cache directory. If provided, the parsed run is stored in a
+                      binary format that is memory-mapped instead of parsing the file again the next time.
+    @return: Columnar Run object that can also be used like a nested dictionary.
     """
-    run = ir_measures.read_trec_run(path)
-    nested_run = defaultdict(dict)
-    for sd in run:
-        nested_run[sd.query_id][sd.doc_id] = sd.score
-    nested_run = dict(nested_run)
-    nested_run = {t: nested_run[t] for t in sorted(nested_run)}
-    return nested_run
+    if cache_dir:
+        return RunCache(cache_dir).load(path, 'run', _parse_run)
+    return _parse_run(path)
 
 
-def load_qrels(path):
+def _parse_qrels(path):
+    import ir_measures
+    return Run.from_records((qrel.query_id, qrel.doc_id, qrel.relevance)
+                            for qrel in ir_measures.read_trec_qrels(path))
+
+
+def load_qrels(path, cache_dir=None):
     """
     Use this function to load a qrels file in TREC-format with the help of ir_measures. 
     
     @param path: Path to the qrels file.
+    @param cache_dir: Optional path to a cache directory. If provided, the parsed qrels are stored in a
+                      binary format that is memory-mapped instead of parsing the file again the next time.
     @return: Relevance labels in a nested dictionary.
     """
+    if cache_dir:
+        qrels = RunCache(cache_dir).load(path, 'qrels', _parse_qrels)
+        relevance = qrels.scores.astype(int)
+        return {topic: dict(zip(qrels.docnos[qrels.docs[start:end]].tolist(), relevance[start:end].tolist()))
+                for topic, start, end in zip(qrels.topics.tolist(), qrels.offsets[:-1], qrels.offsets[1:])}
+
+    import ir_measures
     qrels = ir_measures.read_trec_qrels(path)
     nested_qrels = defaultdict(dict)
     for d in qrels:
@@ -159,22 +199,73 @@ def load_qrels(path):
     return nested_qrels
 
 
-def load_measures():
+@lru_cache(maxsize=None)
+def _parse_measures(measures):
+    """
+    Helping function that converts and parses the measure names. The parsed measures are memoized,
+    so evaluators with the same measures share them instead of parsing the names again.
+
+    @param measures: Tuple with measure names.
+    @return: Tuple with measures following the naming convention of ir_measures.
+    """
+    import ir_measures
+    parsed_measures = []
+    for measure in measures:
+        try:
+            converted = ir_measures.convert_trec_name(measure)
+        except ValueError:
+            converted = [measure]
+        for _measure in converted:
+            _measure = ir_measures.parse_measure(_measure)
+            if _measure not in parsed_measures:
+                parsed_measures.append(_measure)
+    return tuple(parsed_measures)
+
+
+def load_measures(measures=None):
     """
     Use this function to load retrieval measures that will be evaluated. 
     
+    @param measures: Optional list with measure names. Names of trec_eval measures or measure families
+                     (e.g., 'map', 'P_10', or 'ndcg_cut') are converted, all other names are parsed following
+                     the naming convention of ir_measures (e.g., 'AP' or 'nDCG@10').
+                     If not specified, a default set of trec_eval measure families is loaded.
     @return: List with measures following the naming convention of ir_measures.
     """
-    measures = []
-    trec_eval_measures = [
-        'P', 'recall', 'ndcg', 'ndcg_cut', 'map_cut', 
-        'set_map', 'set_P', 'set_relative_P', 'set_recall', 'set_F', 
-        'Rprec', 'infAP', 'bpref', 'recip_rank', 'map', 'iprec_at_recall'
-        ]
-    for trec_eval_measure in trec_eval_measures:
-        measures += ir_measures.convert_trec_name(trec_eval_measure) 
-    parsed_measures = [ir_measures.parse_measure(measure) for measure in measures]
-    return parsed_measures
+    if measures is None:
+        measures = DEFAULT_MEASURES
+    return list(_parse_measures(tuple(measures)))
+
+
+def _accumulate_scores(metrics):
+    """
+    Helping function that collects the per-topic metric records of ir_measures in a topic x measure matrix
+    while they are generated. Cells without a record are set to NaN.
+
+    @param metrics: Iterable with Metric records (query_id, measure, value), cf. ir_measures.iter_calc().
+    @return: Tuple with the score matrix, the sorted list of topics, and the list of measure names.
+    """
+    topic_index = {}
+    measure_index = {}
+    measure_names = []
+    rows = []
+    cols = []
+    values = []
+    for query_id, measure, value in metrics:
+        col = measure_index.get(measure)
+        if col is None:
+            col = measure_index[measure] = len(measure_names)
+            measure_names.append(str(measure))
+        rows.append(topic_index.setdefault(query_id, len(topic_index)))
+        cols.append(col)
+        values.append(value)
+
+    topics = sorted(topic_index)
+    topic_rank = np.empty(len(topics), dtype=np.int64)
+    topic_rank[[topic_index[topic] for topic in topics]] = np.arange(len(topics))
+    matrix = np.full((len(topics), len(measure_names)), np.nan)
+    matrix[topic_rank[np.array(rows, dtype=np.int64)], np.array(cols, dtype=np.int64)] = values
+    return matrix, topics, measure_names
 
 
 def evaluate_run(measures, qrels, run):
@@ -183,11 +274,10 @@ def evaluate_run(measures, qrels, run):
     
     @param measures: List with a set of measures, cf. load_measures().
     @param qrels: The relevance labels (qrels), cf. load_qrels().
-    @param run: The run to be evaluated, cf. load_run().
-    @return: List with measures following ir_measures naming convention.
-    """
-    per_topic_results = pd.DataFrame(ir_measures.calc(measures, qrels, run)[1])
-    return {
-        qid: dict(zip(g["measure"].astype(str), g["value"]))
-        for qid, g in per_topic_results.groupby("query_id")
-    }
+    @param run: The run to be evaluated, a Run object (cf. load_run()) or a nested dictionary.
+    @return: ScoreMatrix with the topic scores of the measures following ir_measures naming convention.
+    """
+    import ir_measures
+    if isinstance(run, Run):  # the records are passed to ir_measures without building nested dictionaries
+        run = (ir_measures.ScoredDoc(*record) for record in run.records())
+    return ScoreMatrix(*_accumulate_scores(ir_measures.iter_calc(measures, qrels, run)))
@@ -25,6 +25,9 @@ setup(name='repro_eval',
           'GitPython',
           'py-cpuinfo'
       ],
+      extras_require={
+          'export': ['pandas', 'pyarrow']
+      },
       include_package_data=True,
       package_data={'': ['resources/*.json']},
       zip_safe=False)